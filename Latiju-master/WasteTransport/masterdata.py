@@ -0,0 +1,133 @@
+from .models import Carrier, Company, Process, Processor, Reuser, Vehicle, WasteSubstance
+
+# 主檔資料表：名稱 → (模型, 查詢鍵欄位)
+MASTER_MODELS = {
+    'company': (Company, ('company_id',)),
+    'process': (Process, ('process_code',)),
+    'substance': (WasteSubstance, ('substance_code', 'substance_type')),
+    'carrier': (Carrier, ('carrier_id',)),
+    'processor': (Processor, ('processor_id',)),
+    'reuser': (Reuser, ('reuser_id',)),
+    'vehicle': (Vehicle, ('vehicle_id',)),
+}
+
+
+def disposal_references(row):
+    """清除單資料列引用的主檔：{資料表: (查詢鍵, 新建時的預設值)}，與原本 get_or_create 的參數相同"""
+    references = {
+        'company': ((row.get('事業機構代碼', ''),), {'company_name': row.get('事業機構名稱', '')}),
+        'process': ((row.get('製程代碼', '0'),), {'process_name': row.get('製程名稱', '無資料')}),
+        'substance': ((row.get('廢棄物代碼', ''), 'waste'), {'substance_name': row.get('廢棄物名稱', '')}),
+        'carrier': ((row.get('清除者代碼', ''),), {'carrier_name': row.get('清除者名稱', '')}),
+        'processor': ((row.get('處理者代碼', ''),), {'processor_name': row.get('處理者名稱', '')}),
+    }
+    if row.get('運載車號'):
+        references['vehicle'] = ((row.get('運載車號', ''),), {
+            'vehicle_owner_id': row.get('清除者代碼', ''),
+            'owner_type': 'carrier',
+        })
+    return references
+
+
+def reuse_references(row):
+    """再利用單資料列引用的主檔：{資料表: (查詢鍵, 新建時的預設值)}，與原本 get_or_create 的參數相同"""
+    references = {
+        'company': ((row.get('事業機構代碼', ''),), {'company_name': row.get('事業機構名稱', '')}),
+        'process': ((row.get('製程代碼', '0'),), {'process_name': row.get('製程名稱', '無資料')}),
+        'substance': ((row.get('物質代碼', ''), 'reuse'), {'substance_name': row.get('物質名稱', '')}),
+    }
+    if row.get('清除者代碼'):
+        references['carrier'] = ((row.get('清除者代碼', ''),), {'carrier_name': row.get('清除者名稱', '') or ''})
+    if row.get('再利用者代碼'):
+        references['reuser'] = ((row.get('再利用者代碼', ''),), {
+            'reuser_name': row.get('再利用者名稱', '') or '',
+            'reuser_nature': row.get('再利用者性質', ''),
+        })
+    if row.get('運載車號'):
+        references['vehicle'] = ((row.get('運載車號', ''),), {
+            'vehicle_owner_id': row.get('清除者代碼', '') if row.get('清除者代碼') else None,
+            'owner_type': 'carrier',
+        })
+    return references
+
+
+def batchable(model, key, defaults):
+    """
+    查詢鍵的每個欄位都有值、必填欄位的預設值不是 None 時才納入批次載入與建立；
+    其他主檔留給該列單獨 get_or_create，錯誤只影響這一列
+    """
+    if any(part in (None, '') for part in key):
+        return False
+    return all(value is not None or model._meta.get_field(field).null for field, value in defaults.items())
+
+
+class MasterDataResolver:
+    """
+    匯入時的主檔快取：每個區塊先以每個資料表一次查詢載入資料列引用的主檔，
+    不存在的以 bulk_create 一次建立，之後逐列取得主檔不需再查詢資料庫。
+    每次匯入建立一個，區塊的交易回復時需呼叫 clear()
+    """
+
+    def __init__(self, import_type):
+        self.references = disposal_references if import_type == 'disposal' else reuse_references
+        self.cache = {table: {} for table in MASTER_MODELS}
+
+    def clear(self):
+        for instances in self.cache.values():
+            instances.clear()
+
+    def preload(self, rows):
+        """
+        載入一個區塊引用的主檔，已快取的不再查詢；同一鍵以第一筆資料列的預設值建立。
+        查詢鍵不完整或缺少必填值的主檔不納入批次，避免一筆資料列的錯誤使整個區塊的 bulk_create 失敗
+        """
+        wanted = {table: {} for table in MASTER_MODELS}
+        for row in rows:
+            # 缺少聯單編號或廢棄物ID的資料列不會匯入，不需建立主檔
+            if not row.get('聯單編號') or not row.get('廢棄物ID'):
+                continue
+            for table, (key, defaults) in self.references(row).items():
+                if key not in self.cache[table] and batchable(MASTER_MODELS[table][0], key, defaults):
+                    wanted[table].setdefault(key, defaults)
+
+        for table, missing in wanted.items():
+            if not missing:
+                continue
+            model, fields = MASTER_MODELS[table]
+            self._load(table, missing)
+            # 仍不存在的主檔一次建立，再重新查詢取得自動編號的主鍵
+            missing = {key: defaults for key, defaults in missing.items() if key not in self.cache[table]}
+            if missing:
+                model.objects.bulk_create(
+                    [model(**dict(zip(fields, key)), **defaults) for key, defaults in missing.items()],
+                    ignore_conflicts=True,
+                )
+                self._load(table, missing)
+
+    def _load(self, table, keys):
+        """以一次查詢取得指定鍵的主檔（各鍵欄位以 IN 查詢，再於記憶體中比對完整的鍵）"""
+        model, fields = MASTER_MODELS[table]
+        lookups = {f'{field}__in': {key[i] for key in keys} for i, field in enumerate(fields)}
+        for instance in model.objects.filter(**lookups):
+            key = tuple(getattr(instance, field) for field in fields)
+            if key in keys:
+                self.cache[table][key] = instance
+
+    def resolve(self, row):
+        """
+        回傳資料列引用的主檔 {資料表: 主檔}，資料列沒有引用的資料表為 None。
+        未預先載入的資料列（單獨匯入一筆時）會先載入；未納入批次的主檔與原本相同逐筆 get_or_create，
+        發生錯誤時只影響這一列
+        """
+        references = self.references(row)
+        if any(key not in self.cache[table] for table, (key, _) in references.items()):
+            self.preload([row])
+        resolved = dict.fromkeys(MASTER_MODELS)
+        for table, (key, defaults) in references.items():
+            if key in self.cache[table]:
+                resolved[table] = self.cache[table][key]
+                continue
+            # 在該列的儲存點中建立，該列回復時主檔也會回復，因此不放入快取
+            model, fields = MASTER_MODELS[table]
+            resolved[table], _ = model.objects.get_or_create(**dict(zip(fields, key)), defaults=defaults)
+        return resolved
@@ -0,0 +1,66 @@
+from django.db.models import Q
+
+from .models import Manifest
+
+# 各聯單類型的代碼/名稱欄位（經由一對一關聯的資料表）
+CODE_FIELDS = {
+    'disposal': ('disposal_data__waste_code', 'disposal_data__waste_name'),
+    'reuse': ('reuse_data__substance_code', 'reuse_data__substance_name'),
+}
+
+# 確認狀態篩選值對應的 manifest_confirmation
+CONFIRMATION_VALUES = {
+    'confirmed': True,
+    'unconfirmed': False,
+}
+
+
+def _code_filter(manifest_type, index, value):
+    """
+    代碼/名稱篩選：指定聯單類型時只連接該類型的資料表，
+    未指定時才以 OR 同時比對清除單與再利用單資料
+    """
+    types = [manifest_type] if manifest_type else list(CODE_FIELDS)
+    condition = Q()
+    for name in types:
+        condition |= Q(**{f'{CODE_FIELDS[name][index]}__icontains': value})
+    return condition
+
+
+def compile_manifest_query(cleaned_data=None):
+    """
+    將 ManifestFilterForm 的篩選條件編譯為可見聯單的查詢集，
+    清單頁面與全選功能共用同一份篩選邏輯
+    """
+    data = {key: value for key, value in (cleaned_data or {}).items() if value not in (None, '')}
+    query = Manifest.objects.filter(is_visible=True)
+
+    manifest_type = data.get('manifest_type')
+    if manifest_type:
+        query = query.filter(manifest_type=manifest_type)
+    if 'manifest_id' in data:
+        query = query.filter(manifest_id__icontains=data['manifest_id'])
+    if 'company_name' in data:
+        query = query.filter(company__company_name__icontains=data['company_name'])
+    if 'waste_code' in data:
+        query = query.filter(_code_filter(manifest_type, 0, data['waste_code']))
+    if 'waste_name' in data:
+        query = query.filter(_code_filter(manifest_type, 1, data['waste_name']))
+    if 'report_date_from' in data:
+        query = query.filter(report__report_date__gte=data['report_date_from'])
+    if 'report_date_to' in data:
+        query = query.filter(report__report_date__lte=data['report_date_to'])
+    if 'reported_weight_below' in data:
+        query = query.filter(report__reported_weight__lte=data['reported_weight_below'])
+    if 'reported_weight_above' in data:
+        query = query.filter(report__reported_weight__gte=data['reported_weight_above'])
+
+    confirmation = CONFIRMATION_VALUES.get(data.get('confirmation_status'))
+    if confirmation is not None:
+        query = query.filter(manifest_confirmation=confirmation)
+    return query
+
+
+def explain_manifest_query(cleaned_data=None, **options):
+    """取得篩選查詢的資料庫查詢計畫，供調整索引時檢查"""
+    return compile_manifest_query(cleaned_data).explain(**options)
@@ -1,3 +1,91 @@
+# 注意：WasteTransport 的遷移（只有 0001_initial）與目前正規化後的模型不一致，
+# 以本專案的設定執行時測試資料庫缺少 WasteTransport_company 等資料表，這些測試無法執行。
+# 補上遷移前需以停用遷移的設定（MIGRATION_MODULES = {'WasteTransport': None}）執行
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from .masterdata import MasterDataResolver
+from .models import Carrier, Company, Manifest, WasteSubstance
+from .views import process_csv_import
+
+
+def disposal_row(index, **values):
+    """一筆清除單 CSV 資料列"""
+    row = {
+        '聯單編號': f'E4800427{index:08d}',
+        '廢棄物ID': str(index),
+        '事業機構代碼': 'E4800427',
+        '事業機構名稱': '高雄榮民總醫院',
+        '申報日期': '2024/01/05 10:20:00',
+        '清運日期': '2024/01/06 08:00:00',
+        '製程代碼': 'P01',
+        '製程名稱': '醫療服務',
+        '廢棄物代碼': 'D-1801',
+        '廢棄物名稱': '事業活動產生之一般性垃圾',
+        '申報重量': '12.5',
+        '清除者代碼': 'K0000123',
+        '清除者名稱': '南區清運有限公司',
+        '處理者代碼': 'T0000789',
+        '處理者名稱': '南部焚化廠',
+        '運載車號': 'KEA-1234',
+    }
+    row.update(values)
+    return row
+
+
+class MasterDataResolverTests(TestCase):
+
+    def test_preload_queries_each_table_once(self):
+        resolver = MasterDataResolver('disposal')
+        rows = [disposal_row(i) for i in range(20)]
+        with CaptureQueriesContext(connection) as queries:
+            resolver.preload(rows)
+        preload_queries = len(queries)
+
+        with CaptureQueriesContext(connection) as queries:
+            for row in rows:
+                resolver.resolve(row)
+        self.assertEqual(len(queries), 0)
+        # 每個資料表：查詢、建立、重新查詢
+        self.assertLessEqual(preload_queries, 3 * 6)
+        self.assertEqual(Company.objects.count(), 1)
+        self.assertEqual(WasteSubstance.objects.filter(substance_type='waste').count(), 1)
+
+    def test_first_row_defaults_win(self):
+        resolver = MasterDataResolver('disposal')
+        resolver.preload([disposal_row(1), disposal_row(2, 事業機構名稱='另一個名稱')])
+        self.assertEqual(Company.objects.get(company_id='E4800427').company_name, '高雄榮民總醫院')
+
+    def test_existing_masters_are_reused(self):
+        Company.objects.create(company_id='E4800427', company_name='既有名稱')
+        masters = MasterDataResolver('disposal').resolve(disposal_row(1))
+        self.assertEqual(masters['company'].company_name, '既有名稱')
+        self.assertIsNone(masters['reuser'])
+
+    def test_incomplete_keys_do_not_break_the_batch(self):
+        resolver = MasterDataResolver('disposal')
+        rows = [disposal_row(1), disposal_row(2, 清除者代碼=''), disposal_row(3, 事業機構代碼=None),
+                disposal_row(4, 處理者名稱=None)]
+        resolver.preload(rows)
+
+        self.assertTrue(Carrier.objects.filter(carrier_id='K0000123').exists())
+        self.assertEqual(resolver.resolve(rows[0])['carrier'].carrier_id, 'K0000123')
+        # 空白的鍵與原本的 get_or_create 相同，逐列建立
+        self.assertEqual(resolver.resolve(rows[1])['carrier'].carrier_id, '')
+
+
+class ProcessCsvImportTests(TestCase):
+
+    def test_bad_row_is_skipped_alone(self):
+        rows = [disposal_row(1), disposal_row(2, 事業機構代碼=None), disposal_row(3, 處理者代碼='T0000999', 處理者名稱=None),
+                disposal_row(4)]
+        result = process_csv_import(rows, 'disposal', 'skip', 'manifests.csv')
+
+        # 缺少事業機構代碼的資料列與原本逐筆 get_or_create 相同可以匯入；缺少處理者名稱的資料列只略過該列
+        self.assertTrue(result['success'])
+        self.assertEqual((result['imported'], result['skipped']), (3, 1))
+        self.assertEqual(
+            set(Manifest.objects.values_list('manifest_id', flat=True)),
+            {'E480042700000001', 'E480042700000002', 'E480042700000004'},
+        )
@@ -16,9 +16,11 @@ from MedicalWasteManagementSystem.permissions import permission_required
 from .models import (
     Manifest, Report, Transport, Processing, Recycling,
     DisposalManifestData, ReuseManifestData, ImportHistory,
-    Company, Process, WasteSubstance, Carrier, Processor, Reuser, Vehicle
+    Company, WasteSubstance
 )
 from .forms import ManifestFilterForm, CSVImportForm
+from .queries import compile_manifest_query
+from .masterdata import MasterDataResolver
 
 # 設定日誌
 logger = logging.getLogger(__name__)
@@ -31,70 +33,8 @@ def manifest_list(request):
     """
     form = ManifestFilterForm(request.GET)
     
-    # 初始化查詢集 - 只查詢可見的資料
-    query = Manifest.objects.filter(is_visible=True)
-    
-    # 套用篩選條件
-    if form.is_valid():
-        data = form.cleaned_data
-        
-        # 根據聯單類型篩選
-        manifest_type = data.get('manifest_type')
-        if manifest_type:
-            query = query.filter(manifest_type=manifest_type)
-            
-        # 聯單編號篩選
-        manifest_id = data.get('manifest_id')
-        if manifest_id:
-            query = query.filter(manifest_id__icontains=manifest_id)
-            
-        # 事業機構名稱篩選
-        company_name = data.get('company_name')
-        if company_name:
-            query = query.filter(company__company_name__icontains=company_name)
-            
-        # 廢棄物代碼/物質代碼篩選
-        waste_code = data.get('waste_code')
-        if waste_code:
-            # 使用 Q 對象組合查詢條件
-            query = query.filter(
-                Q(disposal_data__waste_code__icontains=waste_code) | 
-                Q(reuse_data__substance_code__icontains=waste_code)
-            )
-            
-        # 廢棄物名稱/物質名稱篩選
-        waste_name = data.get('waste_name')
-        if waste_name:
-            # 使用 Q 對象組合查詢條件
-            query = query.filter(
-                Q(disposal_data__waste_name__icontains=waste_name) | 
-                Q(reuse_data__substance_name__icontains=waste_name)
-            )
-            
-        # 申報日期篩選
-        report_date_from = data.get('report_date_from')
-        if report_date_from:
-            query = query.filter(report__report_date__gte=report_date_from)
-            
-        report_date_to = data.get('report_date_to')
-        if report_date_to:
-            query = query.filter(report__report_date__lte=report_date_to)
-            
-        # 申報重量篩選
-        reported_weight_below = data.get('reported_weight_below')
-        if reported_weight_below:
-            query = query.filter(report__reported_weight__lte=reported_weight_below)
-            
-        reported_weight_above = data.get('reported_weight_above')
-        if reported_weight_above:
-            query = query.filter(report__reported_weight__gte=reported_weight_above)
-            
-        # 確認狀態篩選
-        confirmation_status = data.get('confirmation_status')
-        if confirmation_status == 'confirmed':
-            query = query.filter(manifest_confirmation=True)
-        elif confirmation_status == 'unconfirmed':
-            query = query.filter(manifest_confirmation=False)
+    # 編譯篩選條件（清單頁面與全選功能共用）
+    query = compile_manifest_query(form.cleaned_data if form.is_valid() else {})
     
     # 使用 select_related 和 prefetch_related 優化查詢
     query = query.select_related('company', 'report').prefetch_related(
@@ -232,70 +172,8 @@ def get_all_manifest_ids(request):
     """
     form = ManifestFilterForm(request.GET)
     
-    # 初始化查詢集 - 只查詢可見的資料
-    query = Manifest.objects.filter(is_visible=True)
-    
-    # 套用篩選條件
-    if form.is_valid():
-        data = form.cleaned_data
-        
-        # 根據聯單類型篩選
-        manifest_type = data.get('manifest_type')
-        if manifest_type:
-            query = query.filter(manifest_type=manifest_type)
-            
-        # 聯單編號篩選
-        manifest_id = data.get('manifest_id')
-        if manifest_id:
-            query = query.filter(manifest_id__icontains=manifest_id)
-            
-        # 事業機構名稱篩選
-        company_name = data.get('company_name')
-        if company_name:
-            query = query.filter(company__company_name__icontains=company_name)
-            
-        # 廢棄物代碼篩選
-        waste_code = data.get('waste_code')
-        if waste_code:
-            # 使用 Q 對象組合查詢條件
-            query = query.filter(
-                Q(disposal_data__waste_code__icontains=waste_code) | 
-                Q(reuse_data__substance_code__icontains=waste_code)
-            )
-            
-        # 廢棄物名稱篩選
-        waste_name = data.get('waste_name')
-        if waste_name:
-            # 使用 Q 對象組合查詢條件
-            query = query.filter(
-                Q(disposal_data__waste_name__icontains=waste_name) | 
-                Q(reuse_data__substance_name__icontains=waste_name)
-            )
-            
-        # 申報日期篩選
-        report_date_from = data.get('report_date_from')
-        if report_date_from:
-            query = query.filter(report__report_date__gte=report_date_from)
-            
-        report_date_to = data.get('report_date_to')
-        if report_date_to:
-            query = query.filter(report__report_date__lte=report_date_to)
-            
-        # 申報重量篩選
-        reported_weight_below = data.get('reported_weight_below')
-        if reported_weight_below:
-            query = query.filter(report__reported_weight__lte=reported_weight_below)
-            
-        reported_weight_above = data.get('reported_weight_above')
-        if reported_weight_above:
-            query = query.filter(report__reported_weight__gte=reported_weight_above)
-            
-        # 確認狀態篩選
-        confirmation_status = data.get('confirmation_status')
-        if confirmation_status == 'confirmed':
-            query = query.filter(manifest_confirmation=True)
-        elif confirmation_status == 'unconfirmed':
-            query = query.filter(manifest_confirmation=False)
+    # 編譯篩選條件（清單頁面與全選功能共用）
+    query = compile_manifest_query(form.cleaned_data if form.is_valid() else {})
     
     # 提取所有符合條件的聯單ID
     manifests = [{'type': m.manifest_type, 'manifest_id': m.manifest_id, 'waste_id': m.waste_id} 
@@ -459,6 +337,8 @@ def process_csv_import(rows, import_type, conflict_resolution, filename, apply_t
         
         # 批次處理，每100筆一個事務
         batch_size = 100
+        # 主檔資料每個批次一次載入，逐列匯入時不需再查詢
+        resolver = MasterDataResolver(import_type)
         
         with transaction.atomic():
             for i in range(0, total_records, batch_size):
@@ -466,13 +346,14 @@ def process_csv_import(rows, import_type, conflict_resolution, filename, apply_t
                 
                 try:
                     with transaction.atomic():
+                        batch = [transform_waste_record(row) for row in batch]
+                        resolver.preload(batch)
                         for row in batch:
-                            row = transform_waste_record(row)
                             # 根據聯單類型處理資料
                             if import_type == 'disposal':
-                                result = handle_disposal_import(row, conflict_resolution, apply_to_all)
+                                result = handle_disposal_import(row, conflict_resolution, apply_to_all, resolver)
                             else:  # 再利用單
-                                result = handle_reuse_import(row, conflict_resolution, apply_to_all)
+                                result = handle_reuse_import(row, conflict_resolution, apply_to_all, resolver)
                             
                             if result:
                                 imported_records += 1
@@ -481,6 +362,8 @@ def process_csv_import(rows, import_type, conflict_resolution, filename, apply_t
                 except Exception as e:
                     logger.error(f"批次處理時發生錯誤：{str(e)}", exc_info=True)
                     skipped_records += len(batch)
+                    # 批次回復後此批次建立的主檔已不存在，清除快取
+                    resolver.clear()
             
             # 儲存匯入歷史記錄
             ImportHistory.objects.create(
@@ -504,9 +387,9 @@ def process_csv_import(rows, import_type, conflict_resolution, filename, apply_t
         return {'success': False, 'error': f"匯入過程中發生錯誤：{str(e)}"}
 
 # 處理清除單匯入
-def handle_disposal_import(row, conflict_resolution, apply_to_all=False):
+def handle_disposal_import(row, conflict_resolution, apply_to_all=False, resolver=None):
     """
-    處理清除單匯入邏輯
+    處理清除單匯入邏輯，resolver 為匯入時共用的主檔快取，未提供時單獨查詢這一筆的主檔
     """
     try:
         # 轉換布林值欄位
@@ -542,57 +425,14 @@ def handle_disposal_import(row, conflict_resolution, apply_to_all=False):
                     # 取消整個匯入過程
                     return False
             
-            # 1. 建立或獲取公司資料
-            company, _ = Company.objects.get_or_create(
-                company_id=row.get('事業機構代碼', ''),
-                defaults={
-                    'company_name': row.get('事業機構名稱', ''),
-                }
-            )
-            
-            # 2. 建立或獲取製程資料
-            process, _ = Process.objects.get_or_create(
-                process_code=row.get('製程代碼', '0'),
-                defaults={
-                    'process_name': row.get('製程名稱', '無資料'),
-                }
-            )
-            
-            # 3. 建立或獲取廢棄物資料
-            waste_substance, _ = WasteSubstance.objects.get_or_create(
-                substance_code=row.get('廢棄物代碼', ''),
-                substance_type='waste',
-                defaults={
-                    'substance_name': row.get('廢棄物名稱', ''),
-                }
-            )
-            
-            # 4. 建立或獲取清除者資料
-            carrier, _ = Carrier.objects.get_or_create(
-                carrier_id=row.get('清除者代碼', ''),
-                defaults={
-                    'carrier_name': row.get('清除者名稱', ''),
-                }
-            )
-            
-            # 5. 建立或獲取處理者資料
-            processor, _ = Processor.objects.get_or_create(
-                processor_id=row.get('處理者代碼', ''),
-                defaults={
-                    'processor_name': row.get('處理者名稱', ''),
-                }
-            )
-            
-            # 6. 建立或獲取車輛資料
-            vehicle = None
-            if row.get('運載車號'):
-                vehicle, _ = Vehicle.objects.get_or_create(
-                    vehicle_id=row.get('運載車號', ''),
-                    defaults={
-                        'vehicle_owner_id': row.get('清除者代碼', ''),
-                        'owner_type': 'carrier',
-                    }
-                )
+            # 1-6. 取得公司、製程、廢棄物、清除者、處理者與車輛資料，不存在時建立
+            masters = (resolver or MasterDataResolver('disposal')).resolve(row)
+            company = masters['company']
+            process = masters['process']
+            waste_substance = masters['substance']
+            carrier = masters['carrier']
+            processor = masters['processor']
+            vehicle = masters['vehicle']
             
             # 7. 建立聯單主記錄
             manifest = Manifest.objects.create(
@@ -666,9 +506,9 @@ def handle_disposal_import(row, conflict_resolution, apply_to_all=False):
         return False
 # 處理再利用單匯入
 # 處理再利用單匯入
-def handle_reuse_import(row, conflict_resolution, apply_to_all=False):
+def handle_reuse_import(row, conflict_resolution, apply_to_all=False, resolver=None):
     """
-    處理再利用單匯入邏輯
+    處理再利用單匯入邏輯，resolver 為匯入時共用的主檔快取，未提供時單獨查詢這一筆的主檔
     """
     try:
         # 轉換布林值欄位
@@ -704,62 +544,14 @@ def handle_reuse_import(row, conflict_resolution, apply_to_all=False):
                     # 取消整個匯入過程
                     return False
             
-            # 1. 建立或獲取公司資料
-            company, _ = Company.objects.get_or_create(
-                company_id=row.get('事業機構代碼', ''),
-                defaults={
-                    'company_name': row.get('事業機構名稱', ''),
-                }
-            )
-            
-            # 2. 建立或獲取製程資料
-            process, _ = Process.objects.get_or_create(
-                process_code=row.get('製程代碼', '0'),
-                defaults={
-                    'process_name': row.get('製程名稱', '無資料'),
-                }
-            )
-            
-            # 3. 建立或獲取物質資料
-            substance, _ = WasteSubstance.objects.get_or_create(
-                substance_code=row.get('物質代碼', ''),
-                substance_type='reuse',
-                defaults={
-                    'substance_name': row.get('物質名稱', ''),
-                }
-            )
-            
-            # 4. 建立或獲取清除者資料（如果有）
-            carrier = None
-            if row.get('清除者代碼'):
-                carrier, _ = Carrier.objects.get_or_create(
-                    carrier_id=row.get('清除者代碼', ''),
-                    defaults={
-                        'carrier_name': row.get('清除者名稱', '') or '',
-                    }
-                )
-            
-            # 5. 建立或獲取再利用者資料（如果有）
-            reuser = None
-            if row.get('再利用者代碼'):
-                reuser, _ = Reuser.objects.get_or_create(
-                    reuser_id=row.get('再利用者代碼', ''),
-                    defaults={
-                        'reuser_name': row.get('再利用者名稱', '') or '',
-                        'reuser_nature': row.get('再利用者性質', ''),
-                    }
-                )
-            
-            # 6. 建立或獲取車輛資料
-            vehicle = None
-            if row.get('運載車號'):
-                vehicle, _ = Vehicle.objects.get_or_create(
-                    vehicle_id=row.get('運載車號', ''),
-                    defaults={
-                        'vehicle_owner_id': row.get('清除者代碼', '') if row.get('清除者代碼') else None,
-                        'owner_type': 'carrier',
-                    }
-                )
+            # 1-6. 取得公司、製程、物質、清除者、再利用者與車輛資料，不存在時建立（清除者、再利用者、車輛沒有填寫時為 None）
+            masters = (resolver or MasterDataResolver('reuse')).resolve(row)
+            company = masters['company']
+            process = masters['process']
+            substance = masters['substance']
+            carrier = masters['carrier']
+            reuser = masters['reuser']
+            vehicle = masters['vehicle']
             
             # 7. 建立聯單主記錄
             manifest = Manifest.objects.create(
@@ -87,6 +87,18 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# 聯單統計等快取以「聯單資料世代」失效，需讓所有行程共用同一個快取
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -128,4 +140,26 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-DATA_UPLOAD_MAX_NUMBER_FIELDS= 999999
\ No newline at end of file
+DATA_UPLOAD_MAX_NUMBER_FIELDS= 999999
+
+# 聯單匯入
+# 每次以 bulk_create 寫入的聯單筆數
+MANIFEST_IMPORT_BATCH_SIZE = 500
+# 上傳檔案大小上限（位元組），None 表示不限制；匯入時逐區塊讀取，記憶體用量與檔案大小無關
+MANIFEST_IMPORT_MAX_UPLOAD_SIZE = 1024 * 1024 * 1024
+# 檔案大小達此值（位元組）時改由背景工作匯入，上傳請求立即回傳工作編號；
+# 0 表示一律背景匯入，None 表示一律在請求中匯入。背景工作由 manage.py run_import_worker 執行
+MANIFEST_IMPORT_ASYNC_THRESHOLD = 1024 * 1024
+# 背景工作超過此秒數未回報進度，視為處理程序中斷
+MANIFEST_IMPORT_JOB_STALE_AFTER = 10 * 60
+# 發現衝突時暫存上傳檔案的秒數，逾期的暫存檔由 manage.py clean_import_staging 清除
+MANIFEST_IMPORT_STAGING_TTL = 60 * 60
+# 分段上傳每個區塊的大小上限（位元組），以及最後一個區塊上傳後保留上傳進度的秒數
+MANIFEST_IMPORT_UPLOAD_CHUNK_SIZE = 1024 * 1024
+MANIFEST_IMPORT_UPLOAD_TTL = 24 * 60 * 60
+# 背景匯入時平行轉換資料列（日期、數值解析等）的行程數，1 表示在工作處理程序中轉換
+MANIFEST_IMPORT_WORKERS = 1
+
+# 上傳檔案（背景匯入工作的暫存檔）
+MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_URL = 'media/'
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import DisposalManifest, ReuseManifest, ImportHistory
+from .models import DisposalManifest, ReuseManifest, ImportHistory, ImportJob
 
 @admin.register(DisposalManifest)
 class DisposalManifestAdmin(admin.ModelAdmin):
@@ -21,4 +21,10 @@ class ReuseManifestAdmin(admin.ModelAdmin):
 class ImportHistoryAdmin(admin.ModelAdmin):
     list_display = ('filename', 'import_date', 'import_type', 'total_records', 'imported_records', 'skipped_records')
     list_filter = ('import_date', 'import_type')
-    readonly_fields = ('import_date',)
\ No newline at end of file
+    readonly_fields = ('import_date',)
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'status', 'import_type', 'created_at', 'total_records', 'imported_records', 'skipped_records', 'worker')
+    list_filter = ('status', 'import_type')
+    readonly_fields = ('created_at', 'started_at', 'finished_at', 'heartbeat_at')
@@ -7,5 +7,5 @@ class WastetransportConfig(AppConfig):
     verbose_name = '聯單管理'
     
     def ready(self):
-        # Import signals if you have any
-        pass
\ No newline at end of file
+        # 註冊聯單異動的快取失效訊號
+        from . import signals  # noqa: F401
\ No newline at end of file
@@ -0,0 +1 @@
+"""匯入效能量測：產生環境部匯出格式的聯單檔案（generator），量測各衝突處理方式的匯入效能（runner）"""
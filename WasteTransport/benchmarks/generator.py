@@ -0,0 +1,158 @@
+import csv
+import random
+from datetime import datetime, timedelta
+
+from ..importing.rows import MANIFEST_COLUMNS
+from ..importing.stream import CSV_ENCODING
+
+# 由日期欄位拆出的時間欄位，匯出檔案中不會出現（transform_waste_record 產生）
+DERIVED_TIME_COLUMNS = {'申報時間', '清運時間', '運送時間', '收受時間', '回收時間', '處理完成時間'}
+
+COMPANIES = [
+    ('E4800427', '高雄榮民總醫院'),
+    ('A0100235', '臺大醫院'),
+    ('F2300418', '林口長庚紀念醫院'),
+    ('B1700652', '臺中榮民總醫院'),
+    ('E5600133', '高雄醫學大學附設中和紀念醫院'),
+]
+PROCESSES = [('P01', '醫療服務'), ('P02', '檢驗服務'), ('P03', '洗腎服務')]
+DISPOSAL_WASTES = [
+    ('D-1801', '事業活動產生之一般性垃圾'),
+    ('C-0501', '感染性廢棄物'),
+    ('C-0502', '生物醫療廢棄物'),
+    ('D-0299', '廢塑膠混合物'),
+]
+REUSE_SUBSTANCES = [
+    ('R-0201', '廢塑膠'),
+    ('R-0101', '廢紙'),
+    ('R-0302', '廢玻璃容器'),
+    ('R-0901', '廢單一金屬'),
+]
+CARRIERS = [('K0000123', '南區清運有限公司'), ('K0000456', '北區環保企業社')]
+PROCESSORS = [('T0000789', '南部焚化廠'), ('T0000321', '醫療廢棄物處理中心')]
+REUSERS = [('R0000111', '資源再生股份有限公司', '再利用機構'), ('R0000222', '塑膠回收工廠', '工廠')]
+CARRIER_VEHICLES = ['KEA-1234', 'KEB-5678', 'KEC-9012']
+
+
+def export_columns(import_type):
+    """匯出檔案的欄位名稱（依 MANIFEST_COLUMNS 的順序，去除重複與拆解產生的時間欄位）"""
+    columns = []
+    for _, column, _ in MANIFEST_COLUMNS[import_type]:
+        if column not in columns and column not in DERIVED_TIME_COLUMNS:
+            columns.append(column)
+    return columns
+
+
+def format_entry(dt):
+    """匯出檔案的日期時間欄位格式，例如 2024/01/05 下午 03:20:00"""
+    marker = '上午' if dt.hour < 12 else '下午'
+    return f"{dt:%Y/%m/%d} {marker} {dt.hour % 12 or 12:02d}:{dt:%M:%S}"
+
+
+class ManifestRowGenerator:
+    """
+    產生環境部聯單匯出格式的資料列。第 i 筆資料列的 (聯單編號, 廢棄物ID) 由 i 決定，
+    相同 seed 產生的檔案完全相同；不同 seed 產生相同的鍵與不同的內容，可模擬更新後的匯出檔案。
+    duplicate_rate 為重複先前資料列鍵的比例（模擬同一聯單在檔案中出現多次）
+    """
+
+    def __init__(self, import_type, duplicate_rate=0.0, seed=0, start=datetime(2024, 1, 1, 8, 0, 0)):
+        self.import_type = import_type
+        self.duplicate_rate = duplicate_rate
+        self.seed = seed
+        self.start = start
+        self.columns = export_columns(import_type)
+
+    def key(self, index):
+        company_id, _ = COMPANIES[index % len(COMPANIES)]
+        return f"{company_id}{index:09d}", str(index % 9973)
+
+    def rows(self, count):
+        rng = random.Random(self.seed)
+        for index in range(count):
+            key_index = index
+            if index and rng.random() < self.duplicate_rate:
+                key_index = rng.randrange(index)
+            yield self.row(key_index, rng)
+
+    def row(self, index, rng):
+        manifest_id, waste_id = self.key(index)
+        company_id, company_name = COMPANIES[index % len(COMPANIES)]
+        process_code, process_name = rng.choice(PROCESSES)
+        carrier_id, carrier_name = rng.choice(CARRIERS)
+        reported = self.start + timedelta(days=index % 365, minutes=rng.randrange(600))
+        transported = reported + timedelta(hours=rng.randrange(1, 48))
+        delivered = transported + timedelta(hours=rng.randrange(1, 24))
+        received = delivered + timedelta(minutes=rng.randrange(10, 240))
+
+        row = {
+            '聯單編號': manifest_id,
+            '事業機構代碼': company_id,
+            '事業機構名稱': company_name,
+            '申報日期': format_entry(reported),
+            '清運日期': format_entry(transported),
+            '廢棄物ID': waste_id,
+            '申報重量': f"{rng.uniform(0.1, 500):.2f}",
+            '製程代碼': process_code,
+            '製程名稱': process_name,
+            '是否由貯存地起運': rng.choice('YN'),
+            '起運地': '',
+            '聯單確認': rng.choice('YN'),
+            '運載車號': rng.choice(CARRIER_VEHICLES),
+            '清除者確認': 'Y',
+            '清除者代碼': carrier_id,
+            '清除者名稱': carrier_name,
+            '運送日期': format_entry(delivered),
+        }
+        if self.import_type == 'disposal':
+            waste_code, waste_name = rng.choice(DISPOSAL_WASTES)
+            processor_id, processor_name = rng.choice(PROCESSORS)
+            completed = received + timedelta(hours=rng.randrange(1, 72))
+            row.update({
+                '廢棄物代碼': waste_code,
+                '廢棄物名稱': waste_name,
+                '清除者運載車號': row['運載車號'],
+                '處理者代碼': processor_id,
+                '處理者名稱': processor_name,
+                '收受日期': format_entry(received),
+                '中間處理方式': '焚化',
+                '處理完成日期': format_entry(completed),
+                '最終處置方式': '掩埋',
+                '處理者確認': rng.choice('YN'),
+                '最終處置者代碼': processor_id,
+                '最終處置者名稱': processor_name,
+                '進場日期': f"{completed:%Y/%m/%d}",
+                '進場時間': f"{completed:%H:%M:%S}",
+                '進場編號': f"IN{index:08d}",
+                '最終處置者確認': 'Y',
+                '最終流向': '國內',
+            })
+        else:
+            substance_code, substance_name = rng.choice(REUSE_SUBSTANCES)
+            reuser_id, reuser_name, reuser_nature = rng.choice(REUSERS)
+            completed = received + timedelta(days=rng.randrange(1, 14))
+            row.update({
+                '物質代碼': substance_code,
+                '物質名稱': substance_name,
+                '再利用用途': '原料',
+                '再利用方式': '再製',
+                '清除者實際運載車號': row['運載車號'],
+                '再利用者代碼': reuser_id,
+                '再利用者名稱': reuser_name,
+                '再利用者性質': reuser_nature,
+                '回收日期': format_entry(received),
+                '再利用完成時間': f"{completed:%Y/%m/%d %H:%M:%S}",
+                '再利用者是否確認': rng.choice('YN'),
+                '產源是否已確認申報聯單內容': 'Y',
+            })
+        return row
+
+
+def write_manifest_csv(path, import_type, rows, duplicate_rate=0.0, seed=0):
+    """逐列寫出聯單 CSV 檔案（與匯出檔案相同含 BOM），記憶體用量與列數無關"""
+    generator = ManifestRowGenerator(import_type, duplicate_rate, seed)
+    with open(path, 'w', encoding=CSV_ENCODING, newline='') as output:
+        writer = csv.DictWriter(output, fieldnames=generator.columns, restval='')
+        writer.writeheader()
+        writer.writerows(generator.rows(rows))
+    return path
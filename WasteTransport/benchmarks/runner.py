@@ -0,0 +1,143 @@
+import json
+import os
+import platform
+import resource
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.files import File
+from django.db import connection
+from django.utils import timezone
+
+from ..importing.bulk import import_batch_size
+from ..importing.conflicts import manifest_model
+from ..importing.process import process_csv_import
+from ..importing.temporal import clear_temporal_caches
+from .generator import write_manifest_csv
+
+STRATEGIES = ('skip', 'replace', 'keep_both', 'smart_merge')
+
+# 量測 RSS 的取樣間隔（秒）
+RSS_SAMPLE_INTERVAL = 0.05
+
+
+def current_rss_kb():
+    """目前行程的 RSS（KB），非 Linux 系統回傳 None"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError):
+        return None
+
+
+class PeakRSS:
+    """以背景執行緒定期取樣，記錄區段內的最高 RSS；無法取樣時改用行程至今的 ru_maxrss"""
+
+    def __enter__(self):
+        self.peak_kb = current_rss_kb()
+        self._stop = threading.Event()
+        self._thread = None
+        if self.peak_kb is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(RSS_SAMPLE_INTERVAL):
+            self.peak_kb = max(self.peak_kb, current_rss_kb())
+
+    def __exit__(self, *exc_info):
+        if self._thread is None:
+            self.peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return
+        self._stop.set()
+        self._thread.join()
+        self.peak_kb = max(self.peak_kb, current_rss_kb())
+
+
+class QueryCounter:
+    """計算執行的 SQL 數量，不保存 SQL 內容（CaptureQueriesContext 在大量匯入時會佔用大量記憶體）"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measured_import(path, import_type, conflict_resolution, workers=1):
+    """匯入一個檔案並回傳耗時、最高 RSS 與 SQL 數量"""
+    clear_temporal_caches()
+    counter = QueryCounter()
+    with open(path, 'rb') as source, PeakRSS() as rss, connection.execute_wrapper(counter):
+        started = time.perf_counter()
+        result = process_csv_import(File(source), import_type, conflict_resolution, os.path.basename(path), workers=workers)
+        seconds = time.perf_counter() - started
+    if not result['success']:
+        raise RuntimeError(result['error'])
+
+    return {
+        'total': result['total'],
+        'imported': result['imported'],
+        'skipped': result['skipped'],
+        'collapsed': result['collapsed'],
+        'seconds': round(seconds, 3),
+        'rows_per_sec': round(result['total'] / seconds, 1) if seconds else None,
+        'peak_rss_kb': rss.peak_kb,
+        'queries': counter.count,
+    }
+
+
+def clear_manifests(model):
+    """
+    以一個 DELETE 清空聯單，不觸發 post_delete 訊號（逐筆使快取失效並刪除片段快取），
+    也不逐筆載入聯單；在量測範圍之外執行
+    """
+    query = model.objects.all()
+    query._raw_delete(query.db)
+
+
+def run_benchmark(import_type='disposal', rows=10000, duplicate_rate=0.0, strategies=STRATEGIES,
+                  workers=1, workdir=None, log=print):
+    """
+    以產生的聯單檔案量測各衝突處理方式的匯入效能。每個處理方式先清空聯單，
+    匯入第一個檔案（全部為新資料，記為 initial），再匯入相同鍵、不同內容的第二個檔案，
+    量測該處理方式處理衝突資料的效能。會刪除聯單資料，只能在測試資料庫中執行
+    """
+    model = manifest_model(import_type)
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        log(f"產生 {rows} 筆{'清除單' if import_type == 'disposal' else '再利用單'}（重複比例 {duplicate_rate}）")
+        initial_path = write_manifest_csv(Path(tmp) / f'{import_type}-initial.csv', import_type, rows, duplicate_rate, seed=1)
+        update_path = write_manifest_csv(Path(tmp) / f'{import_type}-update.csv', import_type, rows, duplicate_rate, seed=2)
+
+        results = []
+        for strategy in strategies:
+            clear_manifests(model)
+            initial = measured_import(initial_path, import_type, 'skip', workers)
+            measured = measured_import(update_path, import_type, strategy, workers)
+            log(f"{strategy}：每秒 {measured['rows_per_sec']} 筆，{measured['queries']} 個 SQL，"
+                f"最高 RSS {measured['peak_rss_kb']} KB（初次匯入每秒 {initial['rows_per_sec']} 筆）")
+            results.append({'strategy': strategy, 'initial': initial, **measured})
+
+    return {
+        'created_at': timezone.now().isoformat(),
+        'import_type': import_type,
+        'rows': rows,
+        'duplicate_rate': duplicate_rate,
+        'batch_size': import_batch_size(),
+        'workers': workers,
+        'database': connection.vendor,
+        'python': platform.python_version(),
+        'results': results,
+    }
+
+
+def write_results(report, path):
+    """將結果寫成 JSON 檔案，方便比較不同版本的執行結果"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump(report, output, ensure_ascii=False, indent=2)
+    return path
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import transaction
+
+# 聯單資料世代：匯入或刪除聯單後更新，所有依賴聯單資料的快取鍵都包含此值
+GENERATION_KEY = 'waste_transport:manifest_generation'
+
+# 聯單清單結果的快取時間（秒），資料變更時會因世代更新而失效
+LISTING_CACHE_TIMEOUT = 60 * 60
+
+# 目前執行緒是否暫緩世代更新（批次匯入時合併為一次）
+_deferred = threading.local()
+
+
+def manifest_generation():
+    """取得目前的聯單資料世代，快取中沒有時建立一個新的"""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = f'{time.time_ns():x}'
+        # 其他行程可能同時建立，以先寫入者為準
+        if not cache.add(GENERATION_KEY, generation, timeout=None):
+            generation = cache.get(GENERATION_KEY, generation)
+    return generation
+
+
+def _set_new_generation():
+    cache.set(GENERATION_KEY, f'{time.time_ns():x}', timeout=None)
+
+
+def bump_manifest_generation():
+    """
+    聯單資料變更後更新世代，舊世代的快取項目不會再被讀取。
+    在交易中呼叫時延到提交後才更新，避免其他請求以新世代快取到尚未提交的資料
+    """
+    if getattr(_deferred, 'depth', 0):
+        _deferred.pending = True
+        return
+    transaction.on_commit(_set_new_generation)
+
+
+@contextmanager
+def defer_generation_bump():
+    """區塊內逐筆儲存觸發的世代更新合併為離開區塊時的一次"""
+    depth = getattr(_deferred, 'depth', 0)
+    _deferred.depth = depth + 1
+    try:
+        yield
+    finally:
+        _deferred.depth = depth
+        if not depth and getattr(_deferred, 'pending', False):
+            _deferred.pending = False
+            bump_manifest_generation()
+
+
+def filter_signature(cleaned_data):
+    """將篩選條件正規化後雜湊，空值不列入，順序不影響結果"""
+    normalized = {
+        key: str(value)
+        for key, value in (cleaned_data or {}).items()
+        if value not in (None, '')
+    }
+    payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def cached_listing(signature, page_key, build):
+    """
+    依篩選條件簽章、頁碼（或游標）與聯單資料世代快取清單結果，
+    命中時不需查詢聯單資料表；資料變更後世代更新，舊結果不會再被讀取
+    """
+    key = f'waste_transport:listing:{manifest_generation()}:{signature}:{page_key}'
+    result = cache.get(key)
+    if result is None:
+        result = build()
+        cache.set(key, result, LISTING_CACHE_TIMEOUT)
+    return result
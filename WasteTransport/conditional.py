@@ -0,0 +1,58 @@
+import hashlib
+
+from .caching import manifest_generation
+
+
+def _is_ajax(request):
+    return request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+
+def manifest_version(request, model, manifest_id, waste_id):
+    """
+    只查詢聯單的 (主鍵, 更新時間)，找不到時回傳 None；
+    同一請求中 ETag、Last-Modified 與片段快取共用一次查詢
+    """
+    key = (model._meta.model_name, manifest_id, waste_id)
+    cached = getattr(request, '_manifest_version', None)
+    if cached is None or cached[0] != key:
+        version = model.objects.filter(
+            manifest_id=manifest_id, waste_id=waste_id
+        ).values_list('id', 'updated_at').first()
+        cached = (key, version)
+        request._manifest_version = cached
+    return cached[1]
+
+
+def manifest_detail_etag(model):
+    """
+    聯單詳細資訊的 ETag：由更新時間產生，
+    AJAX 片段與完整頁面內容不同，需分開驗證
+    """
+    def etag_func(request, manifest_id, waste_id):
+        version = manifest_version(request, model, manifest_id, waste_id)
+        if version is None:
+            return None
+        updated_at = version[1]
+        variant = 'xhr' if _is_ajax(request) else 'page'
+        return f'{model._meta.model_name}-{updated_at.timestamp():f}-{variant}'
+    return etag_func
+
+
+def manifest_detail_last_modified(model):
+    """聯單詳細資訊的 Last-Modified：聯單的更新時間"""
+    def last_modified_func(request, manifest_id, waste_id):
+        version = manifest_version(request, model, manifest_id, waste_id)
+        return version[1] if version else None
+    return last_modified_func
+
+
+def manifest_list_etag(request):
+    """
+    AJAX 聯單清單的 ETag：由聯單資料世代與查詢參數產生，資料變更後即不同；
+    完整頁面含有匯入表單等其他內容，不做條件式回應
+    """
+    if not _is_ajax(request):
+        return None
+    query = sorted(request.GET.lists())
+    digest = hashlib.sha1(repr(query).encode('utf-8')).hexdigest()
+    return f'list-{manifest_generation()}-{digest}'
@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.db.models import CharField, Count, Value
+from django.db.models.functions import TruncMonth
+
+from .caching import manifest_generation
+
+# 統計資料的快取時間（秒），資料變更時會因世代更新而失效
+FACET_CACHE_TIMEOUT = 60 * 60
+
+
+def _grouped_counts(query, manifest_type):
+    """單一聯單類型依確認狀態與申報月份分組計數"""
+    return query.order_by().annotate(
+        manifest_type=Value(manifest_type, output_field=CharField()),
+        month=TruncMonth('report_date'),
+    ).values('manifest_type', 'manifest_confirmation', 'month').annotate(count=Count('id'))
+
+
+def manifest_facets(disposal_query, reuse_query):
+    """
+    以一次 UNION ALL 分組查詢取得篩選結果的統計：
+    各聯單類型、各確認狀態與各申報月份的筆數
+    """
+    parts = []
+    if not disposal_query.query.is_empty():
+        parts.append(_grouped_counts(disposal_query, 'disposal'))
+    if not reuse_query.query.is_empty():
+        parts.append(_grouped_counts(reuse_query, 'reuse'))
+
+    facets = {
+        'total': 0,
+        'by_type': {'disposal': 0, 'reuse': 0},
+        'by_confirmation': {'confirmed': 0, 'unconfirmed': 0},
+        'by_month': [],
+    }
+    if not parts:
+        return facets
+
+    rows = parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+
+    by_month = {}
+    for row in rows:
+        count = row['count']
+        facets['total'] += count
+        facets['by_type'][row['manifest_type']] += count
+        facets['by_confirmation']['confirmed' if row['manifest_confirmation'] else 'unconfirmed'] += count
+        by_month[row['month']] = by_month.get(row['month'], 0) + count
+
+    # 月份由新到舊
+    facets['by_month'] = sorted(by_month.items(), key=lambda item: item[0], reverse=True)
+    return facets
+
+
+def cached_manifest_facets(signature, disposal_query, reuse_query):
+    """依篩選條件簽章與聯單資料世代快取統計結果"""
+    key = f'waste_transport:facets:{manifest_generation()}:{signature}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = manifest_facets(disposal_query, reuse_query)
+        cache.set(key, facets, FACET_CACHE_TIMEOUT)
+    return facets
@@ -1,4 +1,8 @@
 from django import forms
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
+from .importing.dedupe import DEFAULT_DUPLICATE_POLICY, DUPLICATE_POLICIES
+from .importing.xlsx import is_xlsx, xlsx_supported
 from .models import DisposalManifest, ReuseManifest
 
 class ManifestFilterForm(forms.Form):
@@ -85,6 +89,14 @@ class ManifestFilterForm(forms.Form):
         widget=forms.Select(attrs={'class': 'ts-select'})
     )
 
+def check_import_filename(filename):
+    """匯入檔案必須是 CSV，或在安裝 openpyxl 時為 Excel（.xlsx）"""
+    if is_xlsx(filename):
+        if not xlsx_supported():
+            raise forms.ValidationError("伺服器未安裝 openpyxl，無法匯入 Excel 檔案，請轉存為CSV")
+    elif not filename.endswith('.csv'):
+        raise forms.ValidationError("僅支援CSV或Excel（.xlsx）檔案格式")
+
 class CSVImportForm(forms.Form):
     """CSV匯入表單"""
     IMPORT_TYPE_CHOICES = [
@@ -102,8 +114,8 @@ class CSVImportForm(forms.Form):
     
     csv_file = forms.FileField(
         label="CSV 檔案",
-        help_text="請選擇要匯入的 CSV 檔案",
-        widget=forms.FileInput(attrs={'class': 'ts-input', 'accept': '.csv'})
+        help_text="請選擇要匯入的 CSV 或 Excel（.xlsx）檔案",
+        widget=forms.FileInput(attrs={'class': 'ts-input', 'accept': '.csv,.xlsx'})
     )
     
     import_type = forms.ChoiceField(
@@ -119,17 +131,76 @@ class CSVImportForm(forms.Form):
         widget=forms.Select(attrs={'class': 'ts-select'})
     )
     
+    duplicate_policy = forms.ChoiceField(
+        choices=list(DUPLICATE_POLICIES.items()),
+        initial=DEFAULT_DUPLICATE_POLICY,
+        required=False,
+        label="檔案中重複的聯單",
+        widget=forms.Select(attrs={'class': 'ts-select'})
+    )
+    
+    force = forms.BooleanField(
+        required=False,
+        label="重新匯入相同檔案",
+        widget=forms.CheckboxInput()
+    )
+    
+    dry_run = forms.BooleanField(
+        required=False,
+        label="只檢查不匯入",
+        widget=forms.HiddenInput()
+    )
+    
+    def clean_duplicate_policy(self):
+        # 未指定時使用預設的處理方式
+        return self.cleaned_data.get('duplicate_policy') or DEFAULT_DUPLICATE_POLICY
+    
     def clean_csv_file(self):
         file = self.cleaned_data.get('csv_file')
         
         if not file:
             raise forms.ValidationError("請選擇一個CSV檔案")
         
-        if not file.name.endswith('.csv'):
-            raise forms.ValidationError("僅支援CSV檔案格式")
+        check_import_filename(file.name)
             
-        # 檢查檔案大小，限制為5MB
-        if file.size > 5 * 1024 * 1024:
-            raise forms.ValidationError("檔案大小不得超過5MB")
+        # 檢查檔案大小（settings.MANIFEST_IMPORT_MAX_UPLOAD_SIZE，None 表示不限制）
+        max_size = getattr(settings, 'MANIFEST_IMPORT_MAX_UPLOAD_SIZE', None)
+        if max_size and file.size > max_size:
+            raise forms.ValidationError(f"檔案大小不得超過{filesizeformat(max_size)}")
             
-        return file
\ No newline at end of file
+        return file
+
+class ChunkedUploadForm(forms.Form):
+    """分段上傳：建立上傳時送出的檔案資訊與匯入選項，檔案內容之後分段上傳"""
+    filename = forms.CharField(max_length=255, label="檔案名稱")
+    
+    file_size = forms.IntegerField(min_value=0, required=False, label="檔案大小")
+    
+    import_type = forms.ChoiceField(choices=CSVImportForm.IMPORT_TYPE_CHOICES, label="匯入類型")
+    
+    conflict_resolution = forms.ChoiceField(
+        choices=CSVImportForm.CONFLICT_RESOLUTION_CHOICES,
+        label="衝突處理方式"
+    )
+    
+    duplicate_policy = forms.ChoiceField(
+        choices=list(DUPLICATE_POLICIES.items()),
+        required=False,
+        label="檔案中重複的聯單"
+    )
+    
+    def clean_duplicate_policy(self):
+        return self.cleaned_data.get('duplicate_policy') or DEFAULT_DUPLICATE_POLICY
+    
+    def clean_filename(self):
+        filename = self.cleaned_data.get('filename')
+        check_import_filename(filename)
+        return filename
+    
+    def clean_file_size(self):
+        # 預先檢查檔案大小，上傳時仍會以實際接收的位元組數檢查
+        file_size = self.cleaned_data.get('file_size')
+        max_size = getattr(settings, 'MANIFEST_IMPORT_MAX_UPLOAD_SIZE', None)
+        if max_size and file_size and file_size > max_size:
+            raise forms.ValidationError(f"檔案大小不得超過{filesizeformat(max_size)}")
+        return file_size
@@ -0,0 +1,48 @@
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+# 詳細資訊片段的快取時間（秒）；聯單更新時間不同時會重新渲染
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# 各聯單模型的詳細資訊模板：AJAX 片段與完整頁面的內容區塊
+DETAIL_TEMPLATES = {
+    'disposalmanifest': {
+        'ajax': 'waste_transport/partials/disposal_detail.html',
+        'page': 'waste_transport/partials/disposal_detail_page.html',
+    },
+    'reusemanifest': {
+        'ajax': 'waste_transport/partials/reuse_detail.html',
+        'page': 'waste_transport/partials/reuse_detail_page.html',
+    },
+}
+
+
+def fragment_key(model, pk, variant):
+    return f'waste_transport:fragment:{model._meta.model_name}:{pk}:{variant}'
+
+
+def render_detail_fragment(model, variant, pk, updated_at, get_manifest):
+    """
+    取得聯單詳細資訊的渲染結果，快取內容為 (更新時間, HTML)，
+    更新時間相符時直接使用，否則才載入聯單（get_manifest）重新渲染
+    """
+    key = fragment_key(model, pk, variant)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == updated_at:
+        return cached[1]
+
+    template_name = DETAIL_TEMPLATES[model._meta.model_name][variant]
+    html = render_to_string(template_name, {'manifest': get_manifest()})
+    cache.set(key, (updated_at, html), FRAGMENT_CACHE_TIMEOUT)
+    return html
+
+
+def evict_detail_fragments(model, pks):
+    """移除指定聯單所有版本的詳細資訊快取"""
+    keys = [
+        fragment_key(model, pk, variant)
+        for pk in pks
+        for variant in DETAIL_TEMPLATES[model._meta.model_name]
+    ]
+    if keys:
+        cache.delete_many(keys)
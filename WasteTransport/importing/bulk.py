@@ -0,0 +1,163 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from ..fragments import evict_detail_fragments
+
+logger = logging.getLogger(__name__)
+
+# 未設定 MANIFEST_IMPORT_BATCH_SIZE 時每次批次寫入的筆數
+DEFAULT_BATCH_SIZE = 500
+
+# 聯單的唯一鍵（0002 遷移建立的唯一約束）
+UNIQUE_FIELDS = ['manifest_id', 'waste_id']
+
+
+def import_batch_size():
+    """每次批次寫入的聯單筆數（settings.MANIFEST_IMPORT_BATCH_SIZE）"""
+    return max(1, int(getattr(settings, 'MANIFEST_IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE)))
+
+
+def upsert_fields(model):
+    """upsert 時覆寫的欄位：主鍵、唯一鍵與建立時間以外的所有欄位"""
+    return [
+        field.name for field in model._meta.concrete_fields
+        if not field.primary_key and field.name not in UNIQUE_FIELDS and field.name != 'created_at'
+    ]
+
+
+def bulk_write(model, instances, **options):
+    """
+    以 bulk_create 寫入一個區塊，回傳成功寫入的聯單；options 直接傳給 bulk_create。
+    區塊寫入失敗（例如違反唯一約束）時整個區塊回復，改為逐筆寫入，只略過出錯的資料列
+    """
+    if not instances:
+        return []
+
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(instances, batch_size=len(instances), **options)
+        return list(instances)
+    except Exception as e:
+        logger.warning(f"批次寫入 {len(instances)} 筆{model._meta.verbose_name}失敗，改為逐筆寫入：{e}")
+
+    saved = []
+    for instance in instances:
+        # 回復前可能已取得主鍵，重新以新增方式寫入
+        instance.pk = None
+        instance._state.adding = True
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create([instance], **options)
+            saved.append(instance)
+        except Exception as e:
+            logger.error(f"寫入聯單 {instance.manifest_id}/{instance.waste_id} 時發生錯誤: {e}", exc_info=True)
+    return saved
+
+
+class ManifestWriter:
+    """
+    累積匯入的聯單並分批寫入：新聯單以 bulk_create 新增，
+    取代與智能合併以 INSERT ... ON CONFLICT (manifest_id, waste_id) DO UPDATE 寫入，
+    內容雜湊與現有聯單相同時不寫入，計為略過。
+    existing_manifests 為 {(聯單編號, 廢棄物ID): 聯單}，累積時同步更新，
+    同一檔案中後續相同鍵值的資料列會與先前的資料列衝突
+    """
+
+    def __init__(self, model, existing_manifests, batch_size):
+        self.model = model
+        self.existing_manifests = existing_manifests
+        self.batch_size = batch_size
+        self.update_fields = upsert_fields(model)
+        # 待新增的聯單：{鍵: 聯單}
+        self.inserts = {}
+        # 待 upsert 的聯單：{鍵: [聯單, 資料列數]}，同一檔案中重複的鍵合併為一筆
+        self.upserts = {}
+        # 被覆寫聯單的主鍵，寫入後移除其詳細資訊片段快取
+        self.upsert_pks = set()
+        self.imported = 0
+        self.skipped = 0
+
+    def is_pending_insert(self, key):
+        return key in self.inserts
+
+    def insert(self, key, fields):
+        """新增一筆聯單"""
+        manifest = self.model(**fields)
+        # bulk_create 不會呼叫 save()，在此計算內容雜湊
+        manifest.row_hash = manifest.content_hash()
+        self.inserts[key] = manifest
+        self.existing_manifests[key] = manifest
+        if len(self.inserts) >= self.batch_size:
+            self.flush_inserts()
+
+    def replace(self, key, fields):
+        """以新資料取代現有聯單，保留主鍵與建立時間"""
+        self._upsert(key, fields)
+
+    def merge(self, key, fields):
+        """將有填值的欄位合併到現有聯單，空白欄位保留原值"""
+        if key in self.inserts:
+            self.flush_inserts()
+        current = self.existing_manifests[key]
+        values = {name: getattr(current, name) for name in UNIQUE_FIELDS + self.update_fields}
+        values.update(fields)
+        self._upsert(key, values)
+
+    def _upsert(self, key, values):
+        # 與尚未寫入的新聯單衝突時，先寫入新聯單再以 upsert 覆寫
+        if key in self.inserts:
+            self.flush_inserts()
+
+        manifest = self.model(**values)
+        manifest.row_hash = manifest.content_hash()
+        current = self.existing_manifests.get(key)
+        # 內容與現有聯單（或同一檔案中先前的資料列）相同，不需寫入
+        if current is not None and current.row_hash == manifest.row_hash:
+            self.skipped += 1
+            return
+        if current is not None and current.pk is not None:
+            self.upsert_pks.add(current.pk)
+
+        rows = self.upserts[key][1] if key in self.upserts else 0
+        self.upserts[key] = [manifest, rows + 1]
+        self.existing_manifests[key] = manifest
+        if len(self.upserts) >= self.batch_size:
+            self.flush_upserts()
+
+    def flush_inserts(self):
+        pending = list(self.inserts.values())
+        self.inserts = {}
+        saved = bulk_write(self.model, pending)
+        self.imported += len(saved)
+        self.skipped += len(pending) - len(saved)
+
+        # 寫入失敗的聯單自對照表移除，後續相同鍵值的資料列不會被當成衝突
+        if len(saved) < len(pending):
+            saved_ids = {id(manifest) for manifest in saved}
+            for manifest in pending:
+                if id(manifest) not in saved_ids:
+                    self.existing_manifests.pop((manifest.manifest_id, manifest.waste_id), None)
+
+    def flush_upserts(self):
+        pending = list(self.upserts.values())
+        self.upserts = {}
+        saved = bulk_write(
+            self.model, [manifest for manifest, _ in pending],
+            update_conflicts=True, unique_fields=UNIQUE_FIELDS, update_fields=self.update_fields,
+        )
+        saved_ids = {id(manifest) for manifest in saved}
+        for manifest, rows in pending:
+            if id(manifest) in saved_ids:
+                self.imported += rows
+            else:
+                self.skipped += rows
+
+        evict_detail_fragments(self.model, self.upsert_pks)
+        self.upsert_pks = set()
+
+    def flush(self):
+        """寫入所有累積的聯單"""
+        self.flush_inserts()
+        self.flush_upserts()
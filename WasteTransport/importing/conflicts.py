@@ -0,0 +1,99 @@
+from ..models import DisposalManifest, ReuseManifest
+from .stream import chunked
+
+# 每次查詢比對的鍵數量，避免超過資料庫的參數上限
+CONFLICT_CHUNK_SIZE = 500
+
+
+def manifest_model(import_type):
+    return DisposalManifest if import_type == 'disposal' else ReuseManifest
+
+
+def row_key(row):
+    """CSV 資料列的 (聯單編號, 廢棄物ID)，缺少任一欄位時回傳 None"""
+    manifest_id = row.get('聯單編號')
+    waste_id = row.get('廢棄物ID')
+    if not manifest_id or not waste_id:
+        return None
+    return manifest_id, waste_id
+
+
+def find_existing_manifests(model, keys, chunk_size=CONFLICT_CHUNK_SIZE):
+    """
+    以每批一次查詢找出已存在的聯單，回傳 {(聯單編號, 廢棄物ID): 聯單}。
+    以聯單編號 IN (...) 查詢（走唯一約束的索引），再於記憶體中比對廢棄物ID
+    """
+    keys = list(dict.fromkeys(key for key in keys if key))
+    existing = {}
+    for i in range(0, len(keys), chunk_size):
+        chunk = set(keys[i:i + chunk_size])
+        manifest_ids = {manifest_id for manifest_id, _ in chunk}
+        for manifest in model.objects.filter(manifest_id__in=manifest_ids):
+            key = (manifest.manifest_id, manifest.waste_id)
+            if key in chunk:
+                existing[key] = manifest
+    return existing
+
+
+def existing_summary(import_type, manifest):
+    """衝突報告中顯示的現有資料"""
+    summary = {
+        '聯單編號': manifest.manifest_id,
+        '事業機構代碼': manifest.company_id,
+        '事業機構名稱': manifest.company_name,
+        '申報日期': manifest.report_date.strftime('%Y/%m/%d') if manifest.report_date else '',
+    }
+    if import_type == 'disposal':
+        summary['廢棄物代碼'] = manifest.waste_code
+        summary['廢棄物名稱'] = manifest.waste_name
+    else:
+        summary['物質代碼'] = manifest.substance_code
+        summary['物質名稱'] = manifest.substance_name
+    summary['申報重量'] = str(manifest.reported_weight)
+    summary['廢棄物ID'] = manifest.waste_id
+    return summary
+
+
+def conflict_report(import_type, rows, existing_manifests):
+    """列出與現有聯單衝突的 CSV 資料列，供前端顯示衝突解決對話框"""
+    records = []
+    for row in rows:
+        existing = existing_manifests.get(row_key(row))
+        if existing is None:
+            continue
+        records.append({
+            'manifest_id': row['聯單編號'],
+            'waste_id': row['廢棄物ID'],
+            'company_name': row.get('事業機構名稱', ''),
+            'report_date': row.get('申報日期', ''),
+            'new_data': {k: v for k, v in row.items() if v},
+            'existing_data': existing_summary(import_type, existing),
+        })
+    return records
+
+
+def scan_conflicts(import_type, rows, chunk_size=CONFLICT_CHUNK_SIZE, combine=None):
+    """
+    逐區塊比對 CSV 資料列與現有聯單，每個區塊一次查詢，回傳衝突報告。
+    rows 未合併檔案中的重複資料列時（DuplicateCollapser.track()），以 combine(先前的資料列, 資料列)
+    合併同一鍵的衝突資料列，每個鍵只回報一筆
+    """
+    model = manifest_model(import_type)
+    if combine is None:
+        records = []
+        for chunk in chunked(rows, chunk_size):
+            existing_manifests = find_existing_manifests(model, map(row_key, chunk), chunk_size)
+            records.extend(conflict_report(import_type, chunk, existing_manifests))
+        return records
+
+    # 只暫存衝突的資料列，數量與回傳的衝突報告相同
+    conflicting_rows = {}
+    existing_manifests = {}
+    for chunk in chunked(rows, chunk_size):
+        found = find_existing_manifests(model, map(row_key, chunk), chunk_size)
+        existing_manifests.update(found)
+        for row in chunk:
+            key = row_key(row)
+            if key in found:
+                conflicting_rows[key] = combine(conflicting_rows.get(key), row)
+    return conflict_report(import_type, conflicting_rows.values(), existing_manifests)
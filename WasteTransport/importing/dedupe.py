@@ -0,0 +1,102 @@
+from .conflicts import row_key
+
+# 檔案中重複 (聯單編號, 廢棄物ID) 的處理方式
+DUPLICATE_POLICIES = {
+    'last': '以最後一筆為準',
+    'first': '以第一筆為準',
+    'merge': '合併有填寫的欄位',
+}
+
+DEFAULT_DUPLICATE_POLICY = 'last'
+
+
+class DuplicateCollapser:
+    """
+    將檔案中相同 (聯單編號, 廢棄物ID) 的資料列合併為一筆再匯入，
+    後續的衝突檢查與寫入每個鍵只處理一次。
+
+    open_rows 每次呼叫都從頭讀取資料列。先以一次只記錄鍵的掃描找出重複的鍵，
+    再逐列讀取並產生合併後的資料列：只有重複的鍵需要暫存資料列，
+    記憶體用量與相異鍵數量有關，與檔案大小無關。
+    last 與 merge 在該鍵最後一次出現的位置產生資料列，first 在第一次出現的位置產生。
+
+    找出重複鍵的掃描可由 track() 與其他讀取（例如衝突檢查）合併為同一次，
+    或以 positions 傳入先前掃描的結果，匯入時只需再讀取一次檔案
+    """
+
+    def __init__(self, open_rows, policy=DEFAULT_DUPLICATE_POLICY, positions=None):
+        if policy not in DUPLICATE_POLICIES:
+            raise ValueError(f"不支援的重複資料處理方式：{policy}")
+        self.open_rows = open_rows
+        self.policy = policy
+        # {鍵: 最後出現的列號}，掃描過檔案後才有值
+        self.positions = positions
+        # 合併掉的資料列數
+        self.collapsed = 0
+
+    def track(self):
+        """
+        從頭讀取資料列並原樣產生，同時記錄 {鍵: 最後出現的列號}（只包含可能重複的鍵）。
+        已出現的鍵以 hash 值記錄以節省記憶體；hash 碰撞只會多記錄一個實際不重複的鍵，
+        該鍵的最後出現列號就是唯一一次出現的位置，不影響結果
+        """
+        seen = set()
+        positions = {}
+        for index, row in enumerate(self.open_rows()):
+            key = row_key(row)
+            if key is not None:
+                digest = hash(key)
+                if digest in seen:
+                    positions[key] = index
+                else:
+                    seen.add(digest)
+            yield row
+        self.positions = positions
+
+    def duplicate_positions(self):
+        """回傳 {鍵: 最後出現的列號}，尚未掃描過檔案時先讀取一次"""
+        if self.positions is None:
+            for _ in self.track():
+                pass
+        return self.positions
+
+    def combine(self, previous, row):
+        """依處理方式合併同一鍵先前的資料列（沒有時為 None）與目前的資料列"""
+        if previous is None:
+            return dict(row)
+        if self.policy == 'first':
+            return previous
+        if self.policy == 'merge':
+            previous.update({column: value for column, value in row.items() if value not in (None, '')})
+            return previous
+        return dict(row)
+
+    def __iter__(self):
+        self.collapsed = 0
+        positions = self.duplicate_positions()
+        emitted = set()
+        pending = {}
+
+        for index, row in enumerate(self.open_rows()):
+            key = row_key(row)
+            if key is None or key not in positions:
+                yield row
+                continue
+
+            if self.policy == 'first':
+                if key in emitted:
+                    self.collapsed += 1
+                else:
+                    emitted.add(key)
+                    yield row
+                continue
+
+            if self.policy == 'merge' and key in pending:
+                row = self.combine(pending[key], row)
+            if key in pending:
+                self.collapsed += 1
+            if index == positions[key]:
+                pending.pop(key, None)
+                yield row
+            else:
+                pending[key] = dict(row)
@@ -0,0 +1,37 @@
+from django.utils import timezone
+
+from ..models import ImportHistory, ImportJob
+
+
+def find_previous_import(content_digest, import_type, conflict_resolution):
+    """
+    以檔案雜湊找出先前成功匯入的相同檔案。
+    指定衝突處理方式時只比對相同方式的匯入；'ask' 則比對任何方式（解決衝突後實際採用的方式不同）
+    """
+    imports = ImportHistory.objects.filter(content_digest=content_digest, import_type=import_type)
+    if conflict_resolution != 'ask':
+        imports = imports.filter(conflict_resolution=conflict_resolution)
+    return imports.order_by('-import_date').first()
+
+
+def find_active_job(content_digest, import_type, conflict_resolution):
+    """相同檔案已排入或正在執行的背景匯入工作"""
+    return ImportJob.objects.filter(
+        content_digest=content_digest, import_type=import_type, conflict_resolution=conflict_resolution,
+        status__in=[ImportJob.STATUS_QUEUED, ImportJob.STATUS_RUNNING],
+    ).order_by('-created_at').first()
+
+
+def previous_import_result(history):
+    """相同檔案再次上傳時回傳的結果，內容與先前匯入的結果相同"""
+    return {
+        'success': True,
+        'duplicate': True,
+        'message': (
+            f'此檔案已於 {timezone.localtime(history.import_date):%Y-%m-%d %H:%M} 匯入（匯入 {history.imported_records} 筆，'
+            f'跳過 {history.skipped_records} 筆），未重複匯入；如需重新匯入請勾選「重新匯入相同檔案」'
+        ),
+        'imported': history.imported_records,
+        'skipped': history.skipped_records,
+        'total': history.total_records,
+    }
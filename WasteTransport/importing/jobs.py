@@ -0,0 +1,199 @@
+import logging
+import os
+import secrets
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from ..models import ImportJob
+from .pipeline import import_workers
+from .process import process_csv_import
+
+logger = logging.getLogger(__name__)
+
+# 未設定 MANIFEST_IMPORT_JOB_STALE_AFTER 時，背景工作逾時未回報進度的秒數
+DEFAULT_STALE_AFTER = 10 * 60
+
+# 未設定 MANIFEST_IMPORT_STAGING_TTL 時，暫存上傳檔案的秒數
+DEFAULT_STAGING_TTL = 60 * 60
+
+
+def runs_in_background(size):
+    """
+    檔案大小達 settings.MANIFEST_IMPORT_ASYNC_THRESHOLD 時改由背景工作匯入；
+    設定為 None 時一律在請求中匯入
+    """
+    threshold = getattr(settings, 'MANIFEST_IMPORT_ASYNC_THRESHOLD', None)
+    return threshold is not None and size >= threshold
+
+
+def save_import_file(file, import_type, conflict_resolution, filename, **fields):
+    """將上傳的檔案存入 MEDIA_ROOT 並建立匯入工作"""
+    job = ImportJob(
+        filename=filename,
+        file_size=file.size,
+        import_type=import_type,
+        conflict_resolution=conflict_resolution,
+        **fields,
+    )
+    job.file.save(os.path.basename(filename), file, save=False)
+    job.save()
+    return job
+
+
+def enqueue_import(file, import_type, conflict_resolution, filename, content_digest='', duplicate_policy='last'):
+    """建立等待背景處理程序執行的匯入工作"""
+    return save_import_file(
+        file, import_type, conflict_resolution, filename,
+        content_digest=content_digest, duplicate_policy=duplicate_policy,
+    )
+
+
+def stage_import(file, import_type, filename, content_digest='', duplicate_policy='last'):
+    """
+    發現衝突時暫存上傳檔案，回傳附有 token 的工作；解決衝突時只需送回 token，不必再次上傳檔案。
+    衝突聯單不另外保存：暫存期間資料庫可能已變更，匯入時每個區塊仍會重新查詢已存在的聯單
+    """
+    ttl = getattr(settings, 'MANIFEST_IMPORT_STAGING_TTL', DEFAULT_STAGING_TTL)
+    return save_import_file(
+        file, import_type, 'ask', filename,
+        status=ImportJob.STATUS_STAGED,
+        token=secrets.token_urlsafe(32),
+        expires_at=timezone.now() + timedelta(seconds=ttl),
+        content_digest=content_digest,
+        duplicate_policy=duplicate_policy,
+    )
+
+
+def claim_staged_import(token, conflict_resolution):
+    """
+    以選擇的衝突處理方式取得暫存的匯入工作：大型檔案排入背景處理程序，其他檔案由呼叫端直接執行。
+    以 status='staged' 為條件的 UPDATE 取得，重複送出時只會匯入一次；token 無效或已逾期時回傳 None
+    """
+    job = ImportJob.objects.filter(
+        token=token, status=ImportJob.STATUS_STAGED, expires_at__gt=timezone.now()
+    ).first()
+    if job is None:
+        return None
+
+    if runs_in_background(job.file_size):
+        changes = {'status': ImportJob.STATUS_QUEUED}
+    else:
+        now = timezone.now()
+        changes = {'status': ImportJob.STATUS_RUNNING, 'worker': worker_name(), 'started_at': now, 'heartbeat_at': now}
+    claimed = ImportJob.objects.filter(pk=job.pk, status=ImportJob.STATUS_STAGED).update(
+        conflict_resolution=conflict_resolution, **changes
+    )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def clean_expired_staging():
+    """刪除逾期未解決衝突的暫存工作、逾期未完成的分段上傳與其檔案，回傳刪除的筆數"""
+    expired = ImportJob.objects.filter(
+        status__in=[ImportJob.STATUS_STAGED, ImportJob.STATUS_UPLOADING], expires_at__lte=timezone.now()
+    )
+    count = 0
+    for job in expired.iterator():
+        job.file.delete(save=False)
+        job.delete()
+        count += 1
+    return count
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next_job(worker):
+    """
+    取得最早等待中的工作。以 status='queued' 為條件的 UPDATE 取得工作，
+    多個處理程序同時執行時只有一個會更新成功，不需要外部佇列服務
+    """
+    queued = ImportJob.objects.filter(status=ImportJob.STATUS_QUEUED).order_by('created_at', 'pk')
+    for job_id in queued.values_list('pk', flat=True)[:10]:
+        now = timezone.now()
+        claimed = ImportJob.objects.filter(pk=job_id, status=ImportJob.STATUS_QUEUED).update(
+            status=ImportJob.STATUS_RUNNING, worker=worker, started_at=now, heartbeat_at=now,
+        )
+        if claimed:
+            return ImportJob.objects.get(pk=job_id)
+    return None
+
+
+def fail_stale_jobs():
+    """
+    逾時未回報進度的執行中工作視為處理程序中斷，標記為失敗。
+    背景匯入每個區塊各自提交，部分資料可能已寫入，因此不自動重新執行
+    """
+    stale_after = getattr(settings, 'MANIFEST_IMPORT_JOB_STALE_AFTER', DEFAULT_STALE_AFTER)
+    deadline = timezone.now() - timedelta(seconds=stale_after)
+    return ImportJob.objects.filter(status=ImportJob.STATUS_RUNNING, heartbeat_at__lt=deadline).update(
+        status=ImportJob.STATUS_FAILED, finished_at=timezone.now(), message='匯入工作處理程序中斷',
+    )
+
+
+class ProgressFile:
+    """包裝工作的檔案，記錄最近一次讀取已讀取的位元組數作為進度"""
+
+    def __init__(self, file):
+        self.file = file
+        self.bytes_read = 0
+
+    def chunks(self):
+        # 合併重複資料列時檔案可能讀取兩次，進度以最後一次讀取為準
+        self.bytes_read = 0
+        for chunk in self.file.chunks():
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    def __getattr__(self, name):
+        # Excel 檔案以 zip 格式隨機讀取（read、seek），直接交由原檔案；進度改以資料列統計顯示
+        return getattr(self.file, name)
+
+
+def run_import_job(job, background=True, duplicate_positions=None):
+    """
+    執行已取得的匯入工作並記錄結果，回傳匯入結果。
+    背景執行時每個區塊各自提交並更新進度；否則整個檔案在同一個交易中匯入。
+    duplicate_positions 為檢查衝突時一併掃描的重複鍵位置，提供時匯入只需讀取一次檔案
+    """
+    jobs = ImportJob.objects.filter(pk=job.pk)
+    try:
+        with job.file.open('rb'):
+            source = ProgressFile(job.file)
+
+            def progress(total, imported, skipped):
+                jobs.update(
+                    bytes_processed=source.bytes_read, total_records=total,
+                    imported_records=imported, skipped_records=skipped, heartbeat_at=timezone.now(),
+                )
+
+            # 背景工作才以多個行程轉換資料列，避免在網頁伺服器的行程中建立子行程
+            result = process_csv_import(
+                source, job.import_type, job.conflict_resolution, job.filename,
+                progress if background else None, import_workers() if background else 1,
+                content_digest=job.content_digest, duplicate_policy=job.duplicate_policy,
+                duplicate_positions=duplicate_positions,
+            )
+    except Exception as e:
+        logger.error(f"執行匯入工作 #{job.pk} 時發生錯誤：{e}", exc_info=True)
+        result = {'success': False, 'error': f"匯入過程中發生錯誤：{str(e)}"}
+
+    if result['success']:
+        jobs.update(
+            status=ImportJob.STATUS_DONE, finished_at=timezone.now(), message=result['message'],
+            bytes_processed=job.file_size, total_records=result['total'],
+            imported_records=result['imported'], skipped_records=result['skipped'],
+        )
+        # 匯入完成後刪除暫存檔，失敗的工作保留檔案以便檢查
+        job.file.delete(save=False)
+    else:
+        jobs.update(status=ImportJob.STATUS_FAILED, finished_at=timezone.now(), message=result['error'])
+
+    job.refresh_from_db()
+    return result
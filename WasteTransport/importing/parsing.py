@@ -0,0 +1,114 @@
+from .temporal import format_datetime_entry
+
+# 輔助函數：解析浮點數
+def parse_float(value):
+    if not value:
+        return 0.0
+        
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+# 根據CSV欄位名稱取得對應的模型欄位名稱
+def get_model_field_name(csv_field_name):
+    # 自訂映射表
+    field_map = {
+        '聯單編號': 'manifest_id',
+        '事業機構代碼': 'company_id',
+        '事業機構名稱': 'company_name',
+        '申報日期': 'report_date',
+        '申報時間': 'report_time',
+        '清運日期': 'transport_date',
+        '清運時間': 'transport_time',
+        '廢棄物代碼': 'waste_code',
+        '廢棄物名稱': 'waste_name',
+        '廢棄物ID': 'waste_id',
+        '申報重量': 'reported_weight',
+        '製程代碼': 'process_code',
+        '製程名稱': 'process_name',
+        '是否由貯存地起運': 'from_storage',
+        '起運地': 'origin_location',
+        '聯單確認': 'manifest_confirmation',
+        '運載車號': 'carrier_vehicle',
+        '清除者確認': 'carrier_confirmation',
+        # 清除單特有欄位
+        '清除者代碼': 'carrier_id',
+        '清除者名稱': 'carrier_name',
+        '運送日期': 'delivery_date',
+        '運送時間': 'delivery_time',
+        '清除者運載車號': 'carrier_vehicle_number',
+        '處理者代碼': 'processor_id',
+        '處理者名稱': 'processor_name',
+        '收受日期': 'receive_date',
+        '收受時間': 'receive_time',
+        '中間處理方式': 'intermediate_treatment',
+        '處理完成日期': 'processing_completion_date',
+        '處理完成時間': 'processing_completion_time',
+        '最終處置方式': 'final_disposal_method',
+        '處理者確認': 'processor_confirmation',
+        '處理者運載車號': 'processor_vehicle',
+        '最終處置者代碼': 'final_processor_id',
+        '最終處置者名稱': 'final_processor_name',
+        '進場日期': 'entry_date',
+        '進場時間': 'entry_time',
+        '進場編號': 'entry_number',
+        '最終處置者確認': 'final_processor_confirmation',
+        '最終流向': 'final_destination',
+        # 再利用單特有欄位
+        '物質代碼': 'substance_code',
+        '物質名稱': 'substance_name',
+        '再利用用途': 'reuse_purpose',
+        '再利用用途說明': 'reuse_purpose_description',
+        '再利用方式': 'reuse_method',
+        '其它清除者': 'other_carrier',
+        '清除者實際運載車號': 'carrier_vehicle_number',
+        '清除者不接受原因': 'carrier_rejection_reason',
+        '再利用者代碼': 'reuser_id',
+        '再利用者名稱': 'reuser_name',
+        '其它再利用者': 'other_reuser',
+        '再利用者性質': 'reuser_nature',
+        '回收日期': 'recovery_date',
+        '回收時間': 'recovery_time',
+        '再利用完成時間': 'reuse_completion_time',
+        '再利用者是否確認': 'reuser_confirmation',
+        '再利用者實際運載車號': 'reuser_vehicle',
+        '再利用者不接受原因': 'reuser_rejection_reason',
+        '產源是否已確認申報聯單內容': 'source_confirmed'
+    }
+    
+    return field_map.get(csv_field_name, '')
+
+def transform_waste_record(record):
+    """
+    Transforms the datetime entries in a waste record dictionary
+    
+    Args:
+        record (dict): Input dictionary with waste record information
+    
+    Returns:
+        dict: Dictionary with formatted datetime entries
+    """
+    # Dictionary of keys to transform
+    datetime_keys = {
+        '申報日期': ('申報日期', '申報時間'),
+        '清運日期': ('清運日期', '清運時間'),
+        '運送日期': ('運送日期', '運送時間'),
+        '收受日期': ('收受日期', '收受時間'),
+        '回收日期': ('回收日期', '回收時間'),
+        '處理完成日期': ('處理完成日期', '處理完成時間')
+    }
+    
+    # Create a copy of the dictionary to avoid modifying the original
+    transformed_record = record.copy()
+    
+    # Transform specified datetime entries
+    for original_key, (date_key, time_key) in datetime_keys.items():
+        try:
+            formatted_date, formatted_time = format_datetime_entry(record[original_key])
+            transformed_record[date_key] = formatted_date
+            transformed_record[time_key] = formatted_time
+        except:
+            continue
+    
+    return transformed_record
\ No newline at end of file
@@ -0,0 +1,68 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+from .parsing import transform_waste_record
+from .rows import provided_fields, row_to_fields
+from .stream import chunked
+
+
+class PreparedRow:
+    """
+    已轉換的資料列：row 為 transform_waste_record 的結果，
+    fields 為完整的模型欄位，merge_fields 為智能合併使用的有填值欄位；
+    轉換失敗時對應的欄位為 None，error 記錄錯誤訊息
+    """
+    __slots__ = ('row', 'fields', 'merge_fields', 'error')
+
+    def __init__(self, row, fields, merge_fields, error):
+        self.row = row
+        self.fields = fields
+        self.merge_fields = merge_fields
+        self.error = error
+
+
+def prepare_chunk(rows, import_type, conflict_resolution):
+    """
+    轉換一個區塊的資料列。只做字串與日期解析，不存取資料庫，
+    可在其他行程中執行（參數與結果都可 pickle）
+    """
+    prepared = []
+    for row in rows:
+        row = transform_waste_record(row)
+        fields = merge_fields = error = None
+        try:
+            fields = row_to_fields(row, import_type)
+            if conflict_resolution == 'smart_merge':
+                merge_fields = provided_fields(row, import_type)
+        except Exception as e:
+            error = str(e)
+        prepared.append(PreparedRow(row, fields, merge_fields, error))
+    return prepared
+
+
+def import_workers():
+    """背景匯入轉換資料列使用的行程數（settings.MANIFEST_IMPORT_WORKERS），1 表示在同一行程中轉換"""
+    return max(1, int(getattr(settings, 'MANIFEST_IMPORT_WORKERS', 1)))
+
+
+def prepared_chunks(rows, import_type, conflict_resolution, batch_size, workers=1):
+    """
+    將資料列分成區塊並依原順序產生轉換結果。
+    workers 大於 1 時以 ProcessPoolExecutor 平行轉換，
+    最多預先送出 workers * 2 個區塊，記憶體用量仍只與區塊大小有關
+    """
+    if workers <= 1:
+        for chunk in chunked(rows, batch_size):
+            yield prepare_chunk(chunk, import_type, conflict_resolution)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunked(rows, batch_size):
+            pending.append(pool.submit(prepare_chunk, chunk, import_type, conflict_resolution))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
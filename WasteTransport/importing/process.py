@@ -0,0 +1,211 @@
+import logging
+import time
+from contextlib import nullcontext
+
+from django.db import transaction
+
+from ..caching import bump_manifest_generation, defer_generation_bump
+from ..models import DisposalManifest, ReuseManifest, ImportHistory
+from .bulk import ManifestWriter, import_batch_size
+from .conflicts import find_existing_manifests, manifest_model, row_key
+from .dedupe import DEFAULT_DUPLICATE_POLICY, DuplicateCollapser
+from .pipeline import prepared_chunks
+from .rows import row_to_fields
+from .stream import iter_import_rows
+
+logger = logging.getLogger(__name__)
+
+
+# 處理CSV匯入
+def process_csv_import(csv_file, import_type, conflict_resolution, filename, progress=None, workers=1,
+                       content_digest='', duplicate_policy=DEFAULT_DUPLICATE_POLICY, duplicate_positions=None):
+    """
+    匯入 CSV 檔案（具有 chunks() 的上傳檔案），資料列逐區塊讀取、轉換後即寫入，
+    記憶體用量只與區塊大小有關。
+    檔案中重複的 (聯單編號, 廢棄物ID) 先依 duplicate_policy 合併為一筆，合併掉的筆數另外回報；
+    duplicate_positions 為同一個檔案先前掃描的重複鍵位置（DuplicateCollapser.positions），提供時不再另外掃描。
+    提供 progress(總筆數, 已匯入, 已略過) 時（背景匯入工作），每個區塊各自提交交易後回報進度，
+    匯入期間不會長時間鎖住資料庫；否則整個檔案在同一個交易中匯入。
+    workers 大於 1 時以多個行程平行轉換資料列，寫入仍依原順序在目前行程進行。
+    content_digest 為上傳檔案的雜湊，記錄在匯入歷史中供相同檔案再次上傳時比對
+    """
+    try:
+        # 統計資料
+        total_records = 0
+        imported_records = 0
+        skipped_records = 0
+        
+        handle_import = handle_disposal_import if import_type == 'disposal' else handle_reuse_import
+        batch_size = import_batch_size()
+        
+        rows = DuplicateCollapser(lambda: iter_import_rows(csv_file, filename), duplicate_policy, duplicate_positions)
+        
+        # 逐筆儲存觸發的快取失效合併為匯入結束後的一次
+        with defer_generation_bump(), nullcontext() if progress else transaction.atomic():
+            for prepared in prepared_chunks(rows, import_type, conflict_resolution, batch_size, workers):
+                total_records += len(prepared)
+                with transaction.atomic():
+                    imported, skipped = import_chunk(prepared, import_type, conflict_resolution, handle_import, batch_size)
+                imported_records += imported
+                skipped_records += skipped
+                
+                if progress is not None:
+                    progress(total_records, imported_records, skipped_records)
+            
+            # 總筆數包含合併掉的重複資料列
+            collapsed_records = rows.collapsed
+            total_records += collapsed_records
+            
+            # 儲存匯入歷史記錄
+            ImportHistory.objects.create(
+                filename=filename,
+                import_type=import_type,
+                total_records=total_records,
+                imported_records=imported_records,
+                skipped_records=skipped_records,
+                collapsed_records=collapsed_records,
+                content_digest=content_digest,
+                conflict_resolution=conflict_resolution,
+            )
+            
+            # 聯單資料已變更，交易提交後使統計等快取失效
+            bump_manifest_generation()
+            
+            message = f'成功匯入 {imported_records} 筆資料，跳過 {skipped_records} 筆資料'
+            if collapsed_records:
+                message += f'，合併檔案中重複的 {collapsed_records} 筆資料'
+            return {
+                'success': True, 
+                'message': message,
+                'imported': imported_records,
+                'skipped': skipped_records,
+                'collapsed': collapsed_records,
+                'total': total_records
+            }
+            
+    except Exception as e:
+        logger.error(f"匯入過程中發生錯誤：{str(e)}", exc_info=True)
+        return {'success': False, 'error': f"匯入過程中發生錯誤：{str(e)}"}
+
+def import_chunk(prepared, import_type, conflict_resolution, handle_import, batch_size):
+    """匯入一個已轉換的區塊（prepare_chunk 的結果），回傳 (匯入筆數, 略過筆數)"""
+    model = manifest_model(import_type)
+    imported_records = 0
+    skipped_records = 0
+    
+    # 每個區塊一次查詢已存在的聯單；先前的區塊已寫入資料庫，跨區塊的重複資料列同樣視為衝突
+    existing_manifests = find_existing_manifests(model, (row_key(item.row) for item in prepared))
+    writer = ManifestWriter(model, existing_manifests, batch_size)
+    
+    for item in prepared:
+        row = item.row
+        key = row_key(row)
+        
+        try:
+            if item.error is not None:
+                raise ValueError(item.error)
+            
+            # 新聯單：以 bulk_create 批次寫入
+            if key is not None and key not in existing_manifests:
+                writer.insert(key, item.fields)
+                continue
+            
+            # 取代與智能合併：以 upsert 批次寫入
+            if key is not None and conflict_resolution == 'replace':
+                writer.replace(key, item.fields)
+                continue
+            if key is not None and conflict_resolution == 'smart_merge':
+                writer.merge(key, item.merge_fields)
+                continue
+        except Exception as e:
+            logger.error(f"轉換聯單資料時發生錯誤: {e}", exc_info=True)
+            skipped_records += 1
+            continue
+        
+        # 其他衝突處理方式或缺少鍵值：逐筆處理，與尚未寫入的新聯單衝突時先寫入
+        if writer.is_pending_insert(key):
+            writer.flush_inserts()
+        if handle_import(row, conflict_resolution, existing_manifests):
+            imported_records += 1
+        else:
+            skipped_records += 1
+    
+    # 區塊結束前全部寫入，下一個區塊的衝突查詢才看得到
+    writer.flush()
+    return imported_records + writer.imported, skipped_records + writer.skipped
+
+# 處理清除單匯入
+def handle_disposal_import(row, conflict_resolution, existing_manifests=None):
+    try:
+        # 檢查聯單是否已存在
+        manifest_id = row.get('聯單編號')
+        waste_id = row.get('廢棄物ID')
+        if not manifest_id or not waste_id:
+            return False
+            
+        # 優先使用批次查詢的結果，未提供時才逐筆查詢
+        if existing_manifests is None:
+            existing_manifest = DisposalManifest.objects.filter(manifest_id=manifest_id, waste_id=waste_id).first()
+        else:
+            existing_manifest = existing_manifests.get((manifest_id, waste_id))
+        
+        # 根據衝突處理方式決定如何處理
+        if existing_manifest:
+            # 取代與智能合併由 ManifestWriter 以 upsert 批次寫入
+            if conflict_resolution == 'skip':
+                return False
+            elif conflict_resolution == 'keep_both':
+                # 修改聯單編號，保留兩者
+                new_manifest_id = f"{manifest_id}_copy_{int(time.time())}"
+                row['聯單編號'] = new_manifest_id
+        
+        # 建立新的清除單記錄
+        manifest = DisposalManifest(**row_to_fields(row, 'disposal'))
+        # 使用儲存點，違反唯一約束時只略過此筆，不影響同批次的其他資料
+        with transaction.atomic():
+            manifest.save()
+        # 同一檔案中後續重複的資料列會與此筆衝突
+        if existing_manifests is not None:
+            existing_manifests[(manifest.manifest_id, manifest.waste_id)] = manifest
+        return True
+    except Exception as e:
+        logger.error(f"處理清除單匯入時發生錯誤: {e}", exc_info=True)
+        return False
+
+# 處理再利用單匯入
+def handle_reuse_import(row, conflict_resolution, existing_manifests=None):
+    try:
+        # 檢查聯單是否已存在
+        manifest_id = row.get('聯單編號')
+        waste_id = row.get('廢棄物ID')
+        if not manifest_id or not waste_id:
+            return False
+            
+        # 優先使用批次查詢的結果，未提供時才逐筆查詢
+        if existing_manifests is None:
+            existing_manifest = ReuseManifest.objects.filter(manifest_id=manifest_id, waste_id=waste_id).first()
+        else:
+            existing_manifest = existing_manifests.get((manifest_id, waste_id))
+        
+        # 根據衝突處理方式決定如何處理
+        if existing_manifest:
+            # 取代與智能合併由 ManifestWriter 以 upsert 批次寫入
+            if conflict_resolution == 'skip':
+                return False
+            elif conflict_resolution == 'keep_both':
+                # 修改聯單編號，保留兩者
+                new_manifest_id = f"{manifest_id}_copy_{int(time.time())}"
+                row['聯單編號'] = new_manifest_id
+        
+        # 建立新的再利用單記錄
+        manifest = ReuseManifest(**row_to_fields(row, 'reuse'))
+        # 使用儲存點，違反唯一約束時只略過此筆，不影響同批次的其他資料
+        with transaction.atomic():
+            manifest.save()
+        # 同一檔案中後續重複的資料列會與此筆衝突
+        if existing_manifests is not None:
+            existing_manifests[(manifest.manifest_id, manifest.waste_id)] = manifest
+        return True
+    except Exception as e:
+        logger.error(f"處理再利用單匯入時發生錯誤: {e}", exc_info=True)
+        return False
@@ -0,0 +1,142 @@
+from .parsing import parse_float
+from .temporal import parse_date, parse_datetime, parse_time
+
+
+def parse_bool(value):
+    """是否欄位：CSV 中為 Y/N、TRUE/FALSE 或 1/0"""
+    if isinstance(value, bool):
+        return value
+    if not value:
+        return False
+    return value.upper() == 'Y' or value.upper() == 'TRUE' or value == '1'
+
+
+def parse_text(value):
+    return '' if value is None else value
+
+
+# 欄位轉換方式
+CONVERTERS = {
+    'text': parse_text,
+    'bool': parse_bool,
+    'date': parse_date,
+    'time': parse_time,
+    'datetime': parse_datetime,
+    'float': parse_float,
+}
+
+# 清除單欄位對應：(模型欄位, CSV 欄位, 轉換方式)
+DISPOSAL_COLUMNS = (
+    ('manifest_id', '聯單編號', 'text'),
+    ('company_id', '事業機構代碼', 'text'),
+    ('company_name', '事業機構名稱', 'text'),
+    ('report_date', '申報日期', 'date'),
+    ('report_time', '申報時間', 'time'),
+    ('transport_date', '清運日期', 'date'),
+    ('transport_time', '清運時間', 'time'),
+    ('waste_code', '廢棄物代碼', 'text'),
+    ('waste_name', '廢棄物名稱', 'text'),
+    ('waste_id', '廢棄物ID', 'text'),
+    ('reported_weight', '申報重量', 'float'),
+    ('process_code', '製程代碼', 'text'),
+    ('process_name', '製程名稱', 'text'),
+    ('from_storage', '是否由貯存地起運', 'bool'),
+    ('origin_location', '起運地', 'text'),
+    ('manifest_confirmation', '聯單確認', 'bool'),
+    ('carrier_vehicle', '運載車號', 'text'),
+    ('carrier_confirmation', '清除者確認', 'bool'),
+    # 清除單特有欄位
+    ('carrier_id', '清除者代碼', 'text'),
+    ('carrier_name', '清除者名稱', 'text'),
+    ('delivery_date', '運送日期', 'date'),
+    ('delivery_time', '運送時間', 'time'),
+    ('carrier_vehicle_number', '清除者運載車號', 'text'),
+    ('processor_id', '處理者代碼', 'text'),
+    ('processor_name', '處理者名稱', 'text'),
+    ('receive_date', '收受日期', 'date'),
+    ('receive_time', '收受時間', 'time'),
+    ('intermediate_treatment', '中間處理方式', 'text'),
+    ('processing_completion_date', '處理完成日期', 'date'),
+    ('processing_completion_time', '處理完成時間', 'time'),
+    ('final_disposal_method', '最終處置方式', 'text'),
+    ('processor_confirmation', '處理者確認', 'bool'),
+    ('processor_vehicle', '處理者運載車號', 'text'),
+    ('final_processor_id', '最終處置者代碼', 'text'),
+    ('final_processor_name', '最終處置者名稱', 'text'),
+    ('entry_date', '進場日期', 'date'),
+    ('entry_time', '進場時間', 'time'),
+    ('entry_number', '進場編號', 'text'),
+    ('final_processor_confirmation', '最終處置者確認', 'bool'),
+    ('final_destination', '最終流向', 'text'),
+)
+
+# 再利用單欄位對應：(模型欄位, CSV 欄位, 轉換方式)
+REUSE_COLUMNS = (
+    ('manifest_id', '聯單編號', 'text'),
+    ('company_id', '事業機構代碼', 'text'),
+    ('company_name', '事業機構名稱', 'text'),
+    ('report_date', '申報日期', 'date'),
+    ('report_time', '申報時間', 'time'),
+    ('transport_date', '清運日期', 'date'),
+    ('transport_time', '清運時間', 'time'),
+    ('reported_weight', '申報重量', 'float'),
+    ('process_code', '製程代碼', 'text'),
+    ('process_name', '製程名稱', 'text'),
+    ('from_storage', '是否由貯存地起運', 'bool'),
+    ('origin_location', '起運地', 'text'),
+    ('manifest_confirmation', '聯單確認', 'bool'),
+    ('carrier_vehicle', '運載車號', 'text'),
+    ('carrier_confirmation', '清除者確認', 'bool'),
+    # 再利用單特有欄位
+    ('waste_code', '物質代碼', 'text'),  # 使用基本欄位存物質代碼
+    ('waste_name', '物質名稱', 'text'),  # 使用基本欄位存物質名稱
+    ('waste_id', '廢棄物ID', 'text'),
+    ('substance_code', '物質代碼', 'text'),
+    ('substance_name', '物質名稱', 'text'),
+    ('reuse_purpose', '再利用用途', 'text'),
+    ('reuse_purpose_description', '再利用用途說明', 'text'),
+    ('reuse_method', '再利用方式', 'text'),
+    ('carrier_id', '清除者代碼', 'text'),
+    ('carrier_name', '清除者名稱', 'text'),
+    ('other_carrier', '其它清除者', 'text'),
+    ('delivery_date', '運送日期', 'date'),
+    ('delivery_time', '運送時間', 'time'),
+    ('carrier_vehicle_number', '清除者實際運載車號', 'text'),
+    ('carrier_rejection_reason', '清除者不接受原因', 'text'),
+    ('reuser_id', '再利用者代碼', 'text'),
+    ('reuser_name', '再利用者名稱', 'text'),
+    ('other_reuser', '其它再利用者', 'text'),
+    ('reuser_nature', '再利用者性質', 'text'),
+    ('recovery_date', '回收日期', 'date'),
+    ('recovery_time', '回收時間', 'time'),
+    ('reuse_completion_time', '再利用完成時間', 'datetime'),
+    ('reuser_confirmation', '再利用者是否確認', 'bool'),
+    ('reuser_vehicle', '再利用者實際運載車號', 'text'),
+    ('reuser_rejection_reason', '再利用者不接受原因', 'text'),
+    ('source_confirmed', '產源是否已確認申報聯單內容', 'bool'),
+)
+
+MANIFEST_COLUMNS = {
+    'disposal': DISPOSAL_COLUMNS,
+    'reuse': REUSE_COLUMNS,
+}
+
+
+def row_to_fields(row, import_type):
+    """CSV 資料列（已經過 transform_waste_record）轉換為模型欄位，不會存取資料庫"""
+    return {
+        field: CONVERTERS[kind](row.get(column))
+        for field, column, kind in MANIFEST_COLUMNS[import_type]
+    }
+
+
+def provided_fields(row, import_type):
+    """
+    只轉換 CSV 中有填值的欄位，供智能合併使用：
+    空白欄位不會覆蓋現有資料
+    """
+    return {
+        field: CONVERTERS[kind](row[column])
+        for field, column, kind in MANIFEST_COLUMNS[import_type]
+        if row.get(column) not in (None, '')
+    }
@@ -0,0 +1,58 @@
+import codecs
+import csv
+import hashlib
+from itertools import islice
+
+from .xlsx import is_xlsx, iter_xlsx_rows
+
+# CSV 檔案編碼（utf-8-sig 會自動去除 Excel 匯出時的 BOM）
+CSV_ENCODING = 'utf-8-sig'
+
+
+def iter_text_lines(chunks, encoding=CSV_ENCODING):
+    """
+    以漸進式解碼器逐塊解碼上傳檔案，逐行產生文字（保留換行字元）。
+    多位元組字元被切在兩個區塊之間時由解碼器暫存，記憶體用量只與區塊大小有關
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ''
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        lines = pending.split('\n')
+        # 最後一段可能是不完整的一行，留待下一個區塊
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def iter_csv_rows(uploaded_file):
+    """逐列讀取上傳的 CSV 檔案，每列為 {欄位名稱: 值}；可重複呼叫，每次都從檔案開頭讀取"""
+    return csv.DictReader(iter_text_lines(uploaded_file.chunks()))
+
+
+def iter_import_rows(uploaded_file, filename):
+    """依副檔名逐列讀取匯入檔案：Excel（.xlsx）或 CSV，每列為 {欄位名稱: 值}"""
+    if is_xlsx(filename):
+        return iter_xlsx_rows(uploaded_file)
+    return iter_csv_rows(uploaded_file)
+
+
+def chunked(rows, size):
+    """將資料列依序分成每 size 筆一組"""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def file_digest(uploaded_file):
+    """逐塊計算上傳檔案的 SHA-256"""
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,110 @@
+import re
+from datetime import date, datetime, time
+from functools import lru_cache
+
+# 每個解析函式記住的相異字串數量；醫院匯出的檔案通常只有數百個不同的日期與時間
+TEMPORAL_CACHE_SIZE = 4096
+
+# 各欄位的寫法與 datetime.strptime 的 %Y、%m、%d、%H、%I、%M、%S 相同，
+# 可接受的字串與原本逐一嘗試 strptime 格式時完全一致，只需比對一次正規表示式
+_YEAR = r'(\d\d\d\d)'
+_MONTH = r'(1[0-2]|0[1-9]|[1-9])'
+_DAY = r'(3[01]|[12]\d|0[1-9]|[1-9]| [1-9])'
+_HOUR = r'(2[0-3]|[0-1]\d|\d)'
+_HOUR12 = r'(1[0-2]|0[1-9]|[1-9])'
+_MINUTE = r'([0-5]\d|\d)'
+_SECOND = r'(6[0-1]|[0-5]\d|\d)'
+
+# 日期：YYYY/MM/DD 或 YYYY-MM-DD，後面可接 HH:MM:SS（parse_date 只取日期部分）
+_DATE_RE = re.compile(rf'{_YEAR}([/-]){_MONTH}\2{_DAY}(?:\s+{_HOUR}:{_MINUTE}:{_SECOND})?')
+# 時間：HH:MM:SS 或 HH:MM
+_TIME_RE = re.compile(rf'{_HOUR}:{_MINUTE}(?::{_SECOND})?')
+# 日期時間：YYYY/MM/DD HH:MM[:SS] 或 YYYY-MM-DD HH:MM[:SS]
+_DATETIME_RE = re.compile(rf'{_YEAR}([/-]){_MONTH}\2{_DAY}\s+{_HOUR}:{_MINUTE}(?::{_SECOND})?')
+# 匯出檔案的日期時間欄位：YYYY/MM/DD [上午|下午] HH:MM:SS（上午/下午時為 12 小時制）
+_ENTRY_24H_RE = re.compile(rf'{_YEAR}/{_MONTH}/{_DAY}\s+{_HOUR}:{_MINUTE}:{_SECOND}')
+_ENTRY_12H_RE = re.compile(rf'{_YEAR}/{_MONTH}/{_DAY}\s+{_HOUR12}:{_MINUTE}:{_SECOND}')
+
+
+def _datetime(year, month, day, hour=0, minute=0, second=None):
+    """以比對到的字串建立 datetime，日期不存在（例如 2 月 30 日）時回傳 None"""
+    try:
+        return datetime(int(year), int(month), int(day), int(hour), int(minute), int(second or 0))
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=TEMPORAL_CACHE_SIZE)
+def parse_date(date_str):
+    if not date_str or date_str.strip() == '':
+        return None
+
+    match = _DATE_RE.fullmatch(date_str)
+    if match is None:
+        return None
+    year, _, month, day, hour, minute, second = match.groups()
+    dt = _datetime(year, month, day, hour or 0, minute or 0, second)
+    return dt.date() if dt else None
+
+
+@lru_cache(maxsize=TEMPORAL_CACHE_SIZE)
+def parse_time(time_str):
+    if not time_str or time_str.strip() == '':
+        return None
+
+    match = _TIME_RE.fullmatch(time_str)
+    if match is None:
+        return None
+    hour, minute, second = match.groups()
+    return time(int(hour), int(minute), int(second or 0)) if int(second or 0) < 60 else None
+
+
+@lru_cache(maxsize=TEMPORAL_CACHE_SIZE)
+def parse_datetime(datetime_str):
+    if not datetime_str or datetime_str.strip() == '':
+        return None
+
+    match = _DATETIME_RE.fullmatch(datetime_str)
+    if match is None:
+        return None
+    year, _, month, day, hour, minute, second = match.groups()
+    return _datetime(year, month, day, hour, minute, second)
+
+
+@lru_cache(maxsize=TEMPORAL_CACHE_SIZE)
+def format_datetime_entry(entry):
+    """
+    將匯出檔案的日期時間欄位（例如 2024/01/05 下午 03:20:00）拆成 (日期, 24 小時制時間)；
+    無法解析時回傳 (原字串, '')
+    """
+    if not entry or entry.strip() == '':
+        return '', ''
+
+    entry = entry.strip()
+
+    twelve_hour = '上午' in entry or '下午' in entry
+    afternoon = twelve_hour and '上午' not in entry
+    if twelve_hour:
+        entry = entry.replace('下午' if afternoon else '上午', '').strip()
+    match = (_ENTRY_12H_RE if twelve_hour else _ENTRY_24H_RE).fullmatch(entry)
+    if match is None:
+        return entry, ''
+
+    year, month, day, hour, minute, second = match.groups()
+    # 與 strptime 的 %I 相同，12 小時制的 12 點視為 0 點
+    if twelve_hour and int(hour) == 12:
+        hour = 0
+    dt = _datetime(year, month, day, hour, minute, second)
+    if dt is None:
+        return entry, ''
+
+    # 下午的時間加 12 小時
+    if afternoon and dt.hour != 12:
+        dt = dt.replace(hour=dt.hour + 12)
+    return dt.strftime('%Y/%m/%d'), dt.strftime('%H:%M:%S')
+
+
+def clear_temporal_caches():
+    """清除解析結果的快取（效能測試時使用）"""
+    for parser in (parse_date, parse_time, parse_datetime, format_datetime_entry):
+        parser.cache_clear()
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+from ..models import ImportJob
+from .jobs import DEFAULT_STAGING_TTL, runs_in_background, worker_name
+
+# 未設定 MANIFEST_IMPORT_UPLOAD_CHUNK_SIZE 時，分段上傳每個區塊的大小上限
+DEFAULT_UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# 未設定 MANIFEST_IMPORT_UPLOAD_TTL 時，最後一個區塊上傳後保留上傳進度的秒數
+DEFAULT_UPLOAD_TTL = 24 * 60 * 60
+
+# 寫入暫存檔時每次讀取的位元組數
+READ_SIZE = 64 * 1024
+
+
+class ChunkRejected(Exception):
+    """區塊無法寫入；next_chunk 為伺服器預期的下一個區塊編號，用戶端由此續傳"""
+
+    def __init__(self, message, next_chunk):
+        super().__init__(message)
+        self.next_chunk = next_chunk
+
+
+def upload_chunk_size():
+    return getattr(settings, 'MANIFEST_IMPORT_UPLOAD_CHUNK_SIZE', DEFAULT_UPLOAD_CHUNK_SIZE)
+
+
+def upload_expires_at():
+    ttl = getattr(settings, 'MANIFEST_IMPORT_UPLOAD_TTL', DEFAULT_UPLOAD_TTL)
+    return timezone.now() + timedelta(seconds=ttl)
+
+
+def start_upload(filename, import_type, conflict_resolution, duplicate_policy='last'):
+    """建立分段上傳，暫存檔先建立為空檔案，之後每個區塊依序附加在檔案結尾"""
+    job = ImportJob(
+        status=ImportJob.STATUS_UPLOADING,
+        filename=filename,
+        import_type=import_type,
+        conflict_resolution=conflict_resolution,
+        duplicate_policy=duplicate_policy,
+        token=secrets.token_urlsafe(32),
+        expires_at=upload_expires_at(),
+    )
+    job.file.save(os.path.basename(filename), ContentFile(b''), save=False)
+    job.save()
+    return job
+
+
+def find_upload(token):
+    """取得上傳中且未逾期的分段上傳，token 無效時回傳 None"""
+    return ImportJob.objects.filter(
+        token=token, status=ImportJob.STATUS_UPLOADING, expires_at__gt=timezone.now()
+    ).first()
+
+
+def upload_state(job):
+    """用戶端續傳需要的上傳進度"""
+    return {
+        'token': job.token,
+        'filename': job.filename,
+        'next_chunk': job.chunks_received,
+        'bytes_received': job.file_size,
+        'chunk_size': upload_chunk_size(),
+        'expires_at': job.expires_at.isoformat(),
+    }
+
+
+def append_chunk(job, index, stream, checksum):
+    """
+    將第 index 個區塊（從 0 開始）附加到暫存檔，checksum 為區塊內容的 SHA-256。
+    區塊必須依序上傳：已接收過的區塊直接略過，跳號的區塊拒絕。
+    寫入位置固定為已確認的檔案大小，先前中斷時寫入一半的內容會被覆蓋並截斷；
+    以 chunks_received 為條件的 UPDATE 確認區塊，重複送出同一個區塊只會計算一次。
+    回傳下一個區塊編號
+    """
+    if index < job.chunks_received:
+        return job.chunks_received
+    if index > job.chunks_received:
+        raise ChunkRejected(f"應上傳第 {job.chunks_received} 個區塊", job.chunks_received)
+
+    chunk_size = upload_chunk_size()
+    max_size = getattr(settings, 'MANIFEST_IMPORT_MAX_UPLOAD_SIZE', None)
+    offset = job.file_size
+    digest = hashlib.sha256()
+    written = 0
+    with open(job.file.path, 'r+b') as staging:
+        staging.seek(offset)
+        while True:
+            data = stream.read(READ_SIZE)
+            if not data:
+                break
+            written += len(data)
+            if written > chunk_size:
+                staging.truncate(offset)
+                raise ChunkRejected(f"區塊大小不得超過 {chunk_size} 位元組", index)
+            if max_size and offset + written > max_size:
+                staging.truncate(offset)
+                raise ChunkRejected("檔案大小超過上傳上限", index)
+            digest.update(data)
+            staging.write(data)
+        if digest.hexdigest() != (checksum or '').lower():
+            staging.truncate(offset)
+            raise ChunkRejected("區塊檢查碼不符，請重新上傳此區塊", index)
+        staging.truncate(offset + written)
+
+    ImportJob.objects.filter(
+        pk=job.pk, status=ImportJob.STATUS_UPLOADING, chunks_received=index
+    ).update(chunks_received=index + 1, file_size=offset + written, expires_at=upload_expires_at())
+    job.refresh_from_db()
+    return job.chunks_received
+
+
+def finish_upload(job, content_digest, has_conflicts=False):
+    """
+    上傳完成後交由原本的匯入流程：有衝突時轉為待解決衝突（沿用同一個 token），
+    大型檔案排入背景處理程序，其他檔案標記為執行中由呼叫端直接執行。
+    以 status='uploading' 為條件的 UPDATE 轉換狀態，重複送出時回傳 None
+    """
+    changes = {'content_digest': content_digest}
+    if has_conflicts:
+        ttl = getattr(settings, 'MANIFEST_IMPORT_STAGING_TTL', DEFAULT_STAGING_TTL)
+        changes.update(
+            status=ImportJob.STATUS_STAGED,
+            expires_at=timezone.now() + timedelta(seconds=ttl),
+        )
+    elif runs_in_background(job.file_size):
+        changes.update(status=ImportJob.STATUS_QUEUED)
+    else:
+        now = timezone.now()
+        changes.update(status=ImportJob.STATUS_RUNNING, worker=worker_name(), started_at=now, heartbeat_at=now)
+    claimed = ImportJob.objects.filter(pk=job.pk, status=ImportJob.STATUS_UPLOADING).update(**changes)
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def discard_upload(job):
+    """刪除不需要匯入的上傳（例如相同檔案已匯入過）"""
+    job.file.delete(save=False)
+    job.delete()
@@ -0,0 +1,85 @@
+import re
+
+from ..models import BaseManifest
+from .parsing import transform_waste_record
+from .rows import CONVERTERS, MANIFEST_COLUMNS
+
+# 聯單編號：事業機構管制編號（1 個大寫英文字母 + 7 位數字）加流水號，
+# 至少 16 碼（例如 E480042710700819），最長為模型欄位的長度（17 碼）
+MANIFEST_ID_MIN_LENGTH = 16
+MANIFEST_ID_MAX_LENGTH = BaseManifest._meta.get_field('manifest_id').max_length
+MANIFEST_ID_RE = re.compile(rf'[A-Z][0-9]{{{MANIFEST_ID_MIN_LENGTH - 1},{MANIFEST_ID_MAX_LENGTH - 1}}}')
+WASTE_ID_MAX_LENGTH = BaseManifest._meta.get_field('waste_id').max_length
+
+# 必須填寫的欄位
+REQUIRED_COLUMNS = {
+    'disposal': ('聯單編號', '廢棄物ID', '事業機構代碼', '廢棄物代碼'),
+    'reuse': ('聯單編號', '廢棄物ID', '事業機構代碼', '物質代碼'),
+}
+
+# 每個欄位回報的錯誤範例數
+MAX_ERROR_SAMPLES = 5
+
+
+def parse_number(value):
+    """申報重量：空白視為 0，其餘必須是數字（匯入時 parse_float 會將無法解析的值當成 0）"""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def row_errors(row, import_type):
+    """
+    檢查一筆已經過 transform_waste_record 的資料列，回傳 [(CSV 欄位, 錯誤說明, 原始值)]。
+    只做字串與日期解析，不存取資料庫
+    """
+    errors = []
+    for column in REQUIRED_COLUMNS[import_type]:
+        if not (row.get(column) or '').strip():
+            errors.append((column, '必填欄位未填寫', ''))
+
+    manifest_id = row.get('聯單編號') or ''
+    if manifest_id and not MANIFEST_ID_RE.fullmatch(manifest_id):
+        errors.append(('聯單編號', f'聯單編號格式錯誤（1 個大寫英文字母加數字，共 {MANIFEST_ID_MIN_LENGTH} 至 {MANIFEST_ID_MAX_LENGTH} 碼）', manifest_id))
+    waste_id = row.get('廢棄物ID') or ''
+    if len(waste_id) > WASTE_ID_MAX_LENGTH:
+        errors.append(('廢棄物ID', f'廢棄物ID 超過 {WASTE_ID_MAX_LENGTH} 個字元', waste_id))
+
+    for field, column, kind in MANIFEST_COLUMNS[import_type]:
+        value = row.get(column)
+        if value in (None, ''):
+            continue
+        if kind in ('date', 'time', 'datetime') and CONVERTERS[kind](value) is None:
+            errors.append((column, '無法解析的日期時間', value))
+        elif kind == 'float' and parse_number(value) is None:
+            errors.append((column, '不是數字', value))
+    return errors
+
+
+def validate_rows(rows, import_type):
+    """
+    只檢查不匯入：逐列轉換並檢查資料，回傳各欄位的錯誤統計與範例。
+    line 為檔案中的行號（標題列為第 1 行）
+    """
+    total = invalid = 0
+    columns = {}
+    for index, row in enumerate(rows):
+        total += 1
+        errors = row_errors(transform_waste_record(row), import_type)
+        if not errors:
+            continue
+        invalid += 1
+        for column, message, value in errors:
+            summary = columns.setdefault(column, {'count': 0, 'samples': []})
+            summary['count'] += 1
+            if len(summary['samples']) < MAX_ERROR_SAMPLES:
+                # 範例顯示檔案中的原始值（日期時間欄位未經拆解）
+                summary['samples'].append({'line': index + 2, 'message': message, 'value': row.get(column, value)})
+
+    return {
+        'total': total,
+        'valid': total - invalid,
+        'invalid': invalid,
+        'columns': columns,
+    }
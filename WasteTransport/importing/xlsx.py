@@ -0,0 +1,78 @@
+from datetime import date, datetime, time
+
+from .parsing import get_model_field_name
+
+# openpyxl 為選用套件，未安裝時只能匯入 CSV 檔案
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+XLSX_EXTENSION = '.xlsx'
+
+
+def xlsx_supported():
+    return openpyxl is not None
+
+
+def is_xlsx(filename):
+    return (filename or '').lower().endswith(XLSX_EXTENSION)
+
+
+def cell_text(value):
+    """
+    儲存格的值轉換為與匯出 CSV 相同的字串：日期時間為 YYYY/MM/DD HH:MM:SS，
+    整數值的數字不帶小數點（例如廢棄物ID），是否欄位為 Y/N，空白儲存格為空字串
+    """
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'Y' if value else 'N'
+    if isinstance(value, datetime):
+        return value.strftime('%Y/%m/%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.strftime('%Y/%m/%d')
+    if isinstance(value, time):
+        return value.strftime('%H:%M:%S')
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def header_columns(header):
+    """標題列中可對應到聯單欄位的 {欄位位置: 欄位名稱}，其他欄位不讀取"""
+    columns = {}
+    for index, cell in enumerate(header):
+        name = cell_text(cell).strip()
+        if get_model_field_name(name):
+            columns[index] = name
+    return columns
+
+
+def iter_xlsx_rows(uploaded_file):
+    """
+    以唯讀模式逐列讀取 Excel 檔案的工作表，每列為 {欄位名稱: 值}，與 iter_csv_rows 相同；
+    記憶體用量與工作表大小無關。第一列為標題列，標題沒有「聯單編號」的工作表略過。
+    可重複呼叫，每次都從檔案開頭讀取
+    """
+    if openpyxl is None:
+        raise ValueError("伺服器未安裝 openpyxl，無法匯入 Excel 檔案")
+
+    uploaded_file.seek(0)
+    workbook = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            columns = header_columns(next(rows, ()))
+            if '聯單編號' not in columns.values():
+                continue
+            for values in rows:
+                # 略過空白列（唯讀模式下工作表範圍常包含格式化過的空白列）
+                if all(value is None for value in values):
+                    continue
+                yield {
+                    name: cell_text(values[index]) if index < len(values) else ''
+                    for index, name in columns.items()
+                }
+    finally:
+        workbook.close()
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from WasteTransport.benchmarks.runner import STRATEGIES, run_benchmark, write_results
+
+
+class Command(BaseCommand):
+    help = '以產生的聯單檔案量測各衝突處理方式的匯入效能（每秒筆數、最高 RSS、SQL 數量），結果寫成 JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', choices=['disposal', 'reuse'], default='disposal', help='聯單類型')
+        parser.add_argument('--rows', type=int, default=10000, help='每個檔案的資料列數')
+        parser.add_argument('--duplicate-rate', type=float, default=0.0, help='檔案中重複聯單的比例（0 到 1）')
+        parser.add_argument('--strategies', nargs='+', choices=STRATEGIES, default=list(STRATEGIES), help='量測的衝突處理方式')
+        parser.add_argument('--workers', type=int, default=1, help='轉換資料列的行程數')
+        parser.add_argument('--output', help='結果 JSON 檔案路徑（預設為 import-benchmark-<時間>.json）')
+
+    def handle(self, *args, **options):
+        output = options['output'] or f"import-benchmark-{timezone.now():%Y%m%d-%H%M%S}.json"
+
+        # 量測時會清空聯單資料，在測試資料庫中執行，結束後刪除
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            report = run_benchmark(
+                options['type'], options['rows'], options['duplicate_rate'], options['strategies'],
+                options['workers'], log=self.stdout.write,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        write_results(report, output)
+        self.stdout.write(self.style.SUCCESS(f"結果已寫入 {output}"))
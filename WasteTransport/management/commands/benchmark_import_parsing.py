@@ -0,0 +1,99 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+
+from WasteTransport.importing import temporal
+
+# 匯入時每列需要拆解與解析的日期時間欄位數（transform_waste_record 處理的欄位）
+DATETIME_COLUMNS = 6
+
+
+# 改寫前逐一嘗試 strptime 格式的實作，作為比較基準
+def strptime_parse_date(date_str):
+    if not date_str or date_str.strip() == '':
+        return None
+    for fmt in ['%Y/%m/%d', '%Y-%m-%d', '%Y/%m/%d %H:%M:%S', '%Y-%m-%d %H:%M:%S']:
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except (ValueError, TypeError):
+            continue
+    return None
+
+
+def strptime_parse_time(time_str):
+    if not time_str or time_str.strip() == '':
+        return None
+    for fmt in ['%H:%M:%S', '%H:%M']:
+        try:
+            return datetime.strptime(time_str, fmt).time()
+        except (ValueError, TypeError):
+            continue
+    return None
+
+
+def strptime_format_datetime_entry(entry):
+    if not entry or entry.strip() == '':
+        return '', ''
+    entry = entry.strip()
+    try:
+        if '上午' in entry:
+            entry = entry.replace('上午', '').strip()
+            dt = datetime.strptime(entry, '%Y/%m/%d %I:%M:%S')
+        elif '下午' in entry:
+            entry = entry.replace('下午', '').strip()
+            dt = datetime.strptime(entry, '%Y/%m/%d %I:%M:%S')
+            if dt.hour != 12:
+                dt = dt.replace(hour=dt.hour + 12)
+        else:
+            dt = datetime.strptime(entry, '%Y/%m/%d %H:%M:%S')
+        return dt.strftime('%Y/%m/%d'), dt.strftime('%H:%M:%S')
+    except ValueError:
+        return entry, ''
+
+
+def sample_entries(count, distinct):
+    """產生匯出檔案格式的日期時間欄位值，共 distinct 種不同的值"""
+    start = datetime(2024, 1, 1, 8, 0, 0)
+    values = []
+    for i in range(distinct):
+        dt = start + timedelta(days=i % 366, minutes=(i * 37) % 600)
+        marker = '上午' if dt.hour < 12 else '下午'
+        hour = dt.hour % 12 or 12
+        values.append(f"{dt:%Y/%m/%d} {marker} {hour:02d}:{dt:%M:%S}")
+    rng = random.Random(0)
+    return [rng.choice(values) for _ in range(count)]
+
+
+def parse_entries(entries, format_entry, parse_date, parse_time):
+    for entry in entries:
+        date_str, time_str = format_entry(entry)
+        parse_date(date_str)
+        parse_time(time_str)
+
+
+class Command(BaseCommand):
+    help = '比較匯入時日期時間解析的每列成本：原本的 strptime 實作與 importing.temporal'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000, help='模擬的資料列數')
+        parser.add_argument('--distinct', type=int, default=300, help='不同的日期時間值數量')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        entries = sample_entries(rows * DATETIME_COLUMNS, options['distinct'])
+
+        started = time.perf_counter()
+        parse_entries(entries, strptime_format_datetime_entry, strptime_parse_date, strptime_parse_time)
+        baseline = time.perf_counter() - started
+
+        temporal.clear_temporal_caches()
+        started = time.perf_counter()
+        parse_entries(entries, temporal.format_datetime_entry, temporal.parse_date, temporal.parse_time)
+        fast = time.perf_counter() - started
+
+        self.stdout.write(f"{rows} 列，每列 {DATETIME_COLUMNS} 個日期時間欄位，{options['distinct']} 種不同的值")
+        self.stdout.write(f"strptime：每列 {baseline / rows * 1e6:.2f} µs")
+        self.stdout.write(f"temporal：每列 {fast / rows * 1e6:.2f} µs")
+        self.stdout.write(self.style.SUCCESS(f"加速 {baseline / fast:.1f} 倍"))
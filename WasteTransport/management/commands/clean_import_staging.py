@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from WasteTransport.importing.jobs import clean_expired_staging
+
+
+class Command(BaseCommand):
+    help = '刪除逾期未解決衝突的暫存匯入檔案與逾期未完成的分段上傳（可由排程定期執行）'
+
+    def handle(self, *args, **options):
+        count = clean_expired_staging()
+        self.stdout.write(self.style.SUCCESS(f"已刪除 {count} 個逾期的暫存匯入檔案"))
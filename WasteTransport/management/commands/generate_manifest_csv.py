@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from WasteTransport.benchmarks.generator import write_manifest_csv
+
+
+class Command(BaseCommand):
+    help = '產生環境部匯出格式的清除單或再利用單 CSV 檔案，供測試與效能量測使用'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='輸出的 CSV 檔案路徑')
+        parser.add_argument('--type', choices=['disposal', 'reuse'], default='disposal', help='聯單類型')
+        parser.add_argument('--rows', type=int, default=10000, help='資料列數')
+        parser.add_argument('--duplicate-rate', type=float, default=0.0, help='重複先前聯單的資料列比例（0 到 1）')
+        parser.add_argument('--seed', type=int, default=0, help='亂數種子，相同種子產生相同的檔案')
+
+    def handle(self, *args, **options):
+        path = write_manifest_csv(
+            options['output'], options['type'], options['rows'], options['duplicate_rate'], options['seed']
+        )
+        self.stdout.write(self.style.SUCCESS(f"已產生 {options['rows']} 筆資料：{path}"))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from WasteTransport.importing.jobs import claim_next_job, fail_stale_jobs, run_import_job, worker_name
+
+
+class Command(BaseCommand):
+    help = '執行背景CSV匯入工作；可同時執行多個處理程序，每個工作只會由其中一個執行'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='處理完目前等待中的工作後結束')
+        parser.add_argument('--interval', type=float, default=2.0, help='沒有工作時的輪詢間隔（秒）')
+
+    def handle(self, *args, **options):
+        worker = worker_name()
+        self.stdout.write(f"匯入工作處理程序 {worker} 已啟動")
+
+        while True:
+            stale = fail_stale_jobs()
+            if stale:
+                self.stdout.write(self.style.WARNING(f"{stale} 個匯入工作逾時未回報進度，已標記為失敗"))
+
+            job = claim_next_job(worker)
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+
+            self.stdout.write(f"開始匯入工作 #{job.pk}：{job.filename}")
+            run_import_job(job)
+            job.refresh_from_db()
+            style = self.style.SUCCESS if job.status == job.STATUS_DONE else self.style.ERROR
+            self.stdout.write(style(f"匯入工作 #{job.pk} {job.get_status_display()}：{job.message}"))
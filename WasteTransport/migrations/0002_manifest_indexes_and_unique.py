@@ -0,0 +1,55 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:12
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def remove_duplicate_manifests(apps, schema_editor):
+    """建立唯一約束前，同一 (聯單編號, 廢棄物ID) 只保留最後匯入（ID 最大）的一筆"""
+    for model_name in ('DisposalManifest', 'ReuseManifest'):
+        model = apps.get_model('WasteTransport', model_name)
+        keep_ids = model.objects.values('manifest_id', 'waste_id').annotate(keep_id=Max('id')).values('keep_id')
+        model.objects.exclude(id__in=keep_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('WasteTransport', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_manifests, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='disposalmanifest',
+            index=models.Index(fields=['report_date', 'id'], name='disposalmanifest_rdate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disposalmanifest',
+            index=models.Index(fields=['manifest_confirmation', 'report_date'], name='disposalmanifest_confirm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disposalmanifest',
+            index=models.Index(fields=['company_id', 'report_date'], name='disposalmanifest_company_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reusemanifest',
+            index=models.Index(fields=['report_date', 'id'], name='reusemanifest_rdate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reusemanifest',
+            index=models.Index(fields=['manifest_confirmation', 'report_date'], name='reusemanifest_confirm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reusemanifest',
+            index=models.Index(fields=['company_id', 'report_date'], name='reusemanifest_company_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='disposalmanifest',
+            constraint=models.UniqueConstraint(fields=('manifest_id', 'waste_id'), name='disposalmanifest_manifest_waste_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='reusemanifest',
+            constraint=models.UniqueConstraint(fields=('manifest_id', 'waste_id'), name='reusemanifest_manifest_waste_uniq'),
+        ),
+    ]
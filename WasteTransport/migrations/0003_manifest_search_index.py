@@ -0,0 +1,78 @@
+import logging
+
+from django.db import migrations, OperationalError
+
+logger = logging.getLogger(__name__)
+
+# 資料表與納入全文檢索的欄位
+SEARCH_TABLES = {
+    'WasteTransport_disposalmanifest': ('company_name', 'waste_name'),
+    'WasteTransport_reusemanifest': ('company_name', 'substance_name'),
+}
+
+
+def create_search_index(apps, schema_editor):
+    """
+    為事業機構名稱與廢棄物/物質名稱建立 SQLite FTS5 trigram 檢索表（外部內容表），
+    並以觸發器在新增、修改、刪除聯單時同步索引，批次寫入與直接 SQL 也會同步。
+    已存在的檢索表與觸發器會保留，之後的遷移重建聯單資料表（觸發器隨之刪除）時可再次執行
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    for table, columns in SEARCH_TABLES.items():
+        search = f'{table}_search'
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+
+        try:
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS "{search}" USING fts5('
+                f'{column_list}, content="{table}", content_rowid="id", tokenize="trigram")'
+            )
+        except OperationalError as e:
+            # SQLite 未編譯 FTS5 或版本早於 3.34（不支援 trigram）時，查詢會退回 LIKE
+            logger.warning(f"無法建立全文檢索表 {search}：{e}")
+            return
+
+        schema_editor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "{search}_ai" AFTER INSERT ON "{table}" BEGIN '
+            f'INSERT INTO "{search}"(rowid, {column_list}) VALUES (new.id, {new_values}); '
+            f'END'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "{search}_ad" AFTER DELETE ON "{table}" BEGIN '
+            f'INSERT INTO "{search}"("{search}", rowid, {column_list}) VALUES (\'delete\', old.id, {old_values}); '
+            f'END'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "{search}_au" AFTER UPDATE OF {column_list} ON "{table}" BEGIN '
+            f'INSERT INTO "{search}"("{search}", rowid, {column_list}) VALUES (\'delete\', old.id, {old_values}); '
+            f'INSERT INTO "{search}"(rowid, {column_list}) VALUES (new.id, {new_values}); '
+            f'END'
+        )
+        # 為既有資料（重新）建立索引
+        schema_editor.execute(f'INSERT INTO "{search}"("{search}") VALUES (\'rebuild\')')
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    for table in SEARCH_TABLES:
+        search = f'{table}_search'
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS "{search}_{suffix}"')
+        schema_editor.execute(f'DROP TABLE IF EXISTS "{search}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('WasteTransport', '0002_manifest_indexes_and_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
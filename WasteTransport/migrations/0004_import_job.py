@@ -0,0 +1,40 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('WasteTransport', '0003_manifest_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', '等待中'), ('running', '匯入中'), ('done', '已完成'), ('failed', '失敗')], default='queued', max_length=10, verbose_name='狀態')),
+                ('filename', models.CharField(max_length=255, verbose_name='檔案名稱')),
+                ('file', models.FileField(upload_to='imports/', verbose_name='匯入檔案')),
+                ('file_size', models.BigIntegerField(default=0, verbose_name='檔案大小')),
+                ('import_type', models.CharField(choices=[('disposal', '清除單'), ('reuse', '再利用單')], max_length=20, verbose_name='匯入類型')),
+                ('conflict_resolution', models.CharField(max_length=20, verbose_name='衝突處理方式')),
+                ('bytes_processed', models.BigIntegerField(default=0, verbose_name='已處理位元組數')),
+                ('total_records', models.IntegerField(default=0, verbose_name='總記錄數')),
+                ('imported_records', models.IntegerField(default=0, verbose_name='已匯入記錄數')),
+                ('skipped_records', models.IntegerField(default=0, verbose_name='略過記錄數')),
+                ('message', models.TextField(blank=True, verbose_name='結果訊息')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='處理程序')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='建立時間')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='開始時間')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成時間')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='最後回報時間')),
+            ],
+            options={
+                'verbose_name': '匯入工作',
+                'verbose_name_plural': '匯入工作',
+                'indexes': [models.Index(fields=['status', 'created_at'], name='importjob_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('WasteTransport', '0004_import_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='conflict_keys',
+            field=models.JSONField(blank=True, default=list, verbose_name='衝突聯單'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='暫存到期時間'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='token',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True, verbose_name='暫存代碼'),
+        ),
+        migrations.AlterField(
+            model_name='importjob',
+            name='status',
+            field=models.CharField(choices=[('staged', '待解決衝突'), ('queued', '等待中'), ('running', '匯入中'), ('done', '已完成'), ('failed', '失敗')], default='queued', max_length=10, verbose_name='狀態'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:36
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# SQLite 新增欄位時會重建聯單資料表，0003 建立的全文檢索同步觸發器會隨舊表一起刪除
+search_index = import_module('WasteTransport.migrations.0003_manifest_search_index')
+
+
+def restore_search_index(apps, schema_editor):
+    """重新建立全文檢索同步觸發器，並以目前的聯單資料重建索引"""
+    search_index.create_search_index(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('WasteTransport', '0005_import_staging'),
+    ]
+
+    operations = [
+        # 反向遷移時移除欄位同樣會重建資料表，最後再重新建立觸發器
+        migrations.RunPython(migrations.RunPython.noop, restore_search_index),
+        migrations.AddField(
+            model_name='disposalmanifest',
+            name='row_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='內容雜湊'),
+        ),
+        migrations.AddField(
+            model_name='importhistory',
+            name='conflict_resolution',
+            field=models.CharField(blank=True, max_length=20, verbose_name='衝突處理方式'),
+        ),
+        migrations.AddField(
+            model_name='importhistory',
+            name='content_digest',
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name='檔案雜湊'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='content_digest',
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name='檔案雜湊'),
+        ),
+        migrations.AddField(
+            model_name='reusemanifest',
+            name='row_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='內容雜湊'),
+        ),
+        migrations.RunPython(restore_search_index, migrations.RunPython.noop),
+    ]
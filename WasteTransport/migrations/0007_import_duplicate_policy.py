@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('WasteTransport', '0006_import_digest_and_row_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importhistory',
+            name='collapsed_records',
+            field=models.IntegerField(default=0, verbose_name='合併重複記錄數'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='duplicate_policy',
+            field=models.CharField(default='last', max_length=10, verbose_name='重複資料處理方式'),
+        ),
+    ]
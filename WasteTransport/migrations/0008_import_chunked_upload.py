@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('WasteTransport', '0007_import_duplicate_policy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='chunks_received',
+            field=models.IntegerField(default=0, verbose_name='已接收區塊數'),
+        ),
+        migrations.AlterField(
+            model_name='importjob',
+            name='status',
+            field=models.CharField(choices=[('uploading', '上傳中'), ('staged', '待解決衝突'), ('queued', '等待中'), ('running', '匯入中'), ('done', '已完成'), ('failed', '失敗')], default='queued', max_length=10, verbose_name='狀態'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('WasteTransport', '0008_import_chunked_upload'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='importjob',
+            name='conflict_keys',
+        ),
+    ]
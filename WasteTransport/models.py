@@ -1,4 +1,6 @@
-from django.db import models
+import hashlib
+
+from django.db import connection, models
 from django.core.validators import RegexValidator
 
 class BaseManifest(models.Model):
@@ -25,9 +27,43 @@ class BaseManifest(models.Model):
     # 共有欄位但名稱不同的欄位
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="建立時間")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新時間")
+    # 聯單內容的雜湊，重新匯入時內容相同的資料列不需寫入；舊資料在下次寫入前為空白
+    row_hash = models.CharField(max_length=64, blank=True, editable=False, verbose_name="內容雜湊")
+    
+    # 不納入內容雜湊的欄位
+    HASH_EXCLUDED_FIELDS = ('id', 'created_at', 'updated_at', 'row_hash')
     
     class Meta:
         abstract = True
+        constraints = [
+            # 聯單編號與廢棄物ID唯一識別一筆聯單，詳細頁、衝突檢查與匯入皆以此查詢
+            models.UniqueConstraint(fields=['manifest_id', 'waste_id'], name='%(class)s_manifest_waste_uniq'),
+        ]
+        indexes = [
+            # 清單依申報日期排序，並以 (申報日期, ID) 做游標分頁
+            models.Index(fields=['report_date', 'id'], name='%(class)s_rdate_idx'),
+            # 確認狀態篩選後依申報日期排序
+            models.Index(fields=['manifest_confirmation', 'report_date'], name='%(class)s_confirm_idx'),
+            # 依事業機構查詢
+            models.Index(fields=['company_id', 'report_date'], name='%(class)s_company_idx'),
+        ]
+
+    def content_hash(self):
+        """
+        聯單內容的 SHA-256。各欄位先轉為資料庫儲存的格式，
+        由 CSV 轉換的值（例如浮點數重量）與自資料庫讀出的值（Decimal）得到相同的雜湊
+        """
+        digest = hashlib.sha256()
+        for field in self._meta.concrete_fields:
+            if field.name in self.HASH_EXCLUDED_FIELDS:
+                continue
+            value = field.get_db_prep_save(getattr(self, field.attname), connection)
+            digest.update(f'{field.name}={value}\x1f'.encode('utf-8'))
+        return digest.hexdigest()
+    
+    def save(self, *args, **kwargs):
+        self.row_hash = self.content_hash()
+        super().save(*args, **kwargs)
 
 class DisposalManifest(BaseManifest):
     """廢棄物清除聯單模型"""
@@ -60,7 +96,7 @@ class DisposalManifest(BaseManifest):
     final_processor_confirmation = models.BooleanField(default=False, verbose_name="最終處置者確認")
     final_destination = models.CharField(max_length=50, null=True, blank=True, verbose_name="最終流向")
     
-    class Meta:
+    class Meta(BaseManifest.Meta):
         verbose_name = "清除聯單"
         verbose_name_plural = "清除聯單"
         
@@ -101,7 +137,7 @@ class ReuseManifest(BaseManifest):
     substance_code = models.CharField(max_length=10, verbose_name="物質代碼")
     substance_name = models.CharField(max_length=100, verbose_name="物質名稱")
     
-    class Meta:
+    class Meta(BaseManifest.Meta):
         verbose_name = "再利用聯單"
         verbose_name_plural = "再利用聯單"
         
@@ -117,10 +153,91 @@ class ImportHistory(models.Model):
     total_records = models.IntegerField(default=0, verbose_name="總記錄數")
     imported_records = models.IntegerField(default=0, verbose_name="已匯入記錄數")
     skipped_records = models.IntegerField(default=0, verbose_name="略過記錄數")
+    collapsed_records = models.IntegerField(default=0, verbose_name="合併重複記錄數")
+    # 上傳檔案的 SHA-256，相同檔案再次上傳時直接回傳這次的結果
+    content_digest = models.CharField(max_length=64, blank=True, db_index=True, verbose_name="檔案雜湊")
+    conflict_resolution = models.CharField(max_length=20, blank=True, verbose_name="衝突處理方式")
     
     class Meta:
         verbose_name = "匯入歷史記錄"
         verbose_name_plural = "匯入歷史記錄"
         
     def __str__(self):
-        return f"{self.filename} ({self.import_date.strftime('%Y-%m-%d %H:%M')})"
\ No newline at end of file
+        return f"{self.filename} ({self.import_date.strftime('%Y-%m-%d %H:%M')})"
+
+class ImportJob(models.Model):
+    """背景CSV匯入工作"""
+    STATUS_UPLOADING = 'uploading'
+    STATUS_STAGED = 'staged'
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_UPLOADING, '上傳中'),
+        (STATUS_STAGED, '待解決衝突'),
+        (STATUS_QUEUED, '等待中'),
+        (STATUS_RUNNING, '匯入中'),
+        (STATUS_DONE, '已完成'),
+        (STATUS_FAILED, '失敗'),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED, verbose_name="狀態")
+    filename = models.CharField(max_length=255, verbose_name="檔案名稱")
+    file = models.FileField(upload_to='imports/', verbose_name="匯入檔案")
+    file_size = models.BigIntegerField(default=0, verbose_name="檔案大小")
+    import_type = models.CharField(max_length=20, choices=[('disposal', '清除單'), ('reuse', '再利用單')], verbose_name="匯入類型")
+    conflict_resolution = models.CharField(max_length=20, verbose_name="衝突處理方式")
+    content_digest = models.CharField(max_length=64, blank=True, db_index=True, verbose_name="檔案雜湊")
+    duplicate_policy = models.CharField(max_length=10, default='last', verbose_name="重複資料處理方式")
+    # 進度：已讀取的位元組數與資料列統計，由工作處理程序每個區塊更新一次
+    bytes_processed = models.BigIntegerField(default=0, verbose_name="已處理位元組數")
+    total_records = models.IntegerField(default=0, verbose_name="總記錄數")
+    imported_records = models.IntegerField(default=0, verbose_name="已匯入記錄數")
+    skipped_records = models.IntegerField(default=0, verbose_name="略過記錄數")
+    message = models.TextField(blank=True, verbose_name="結果訊息")
+    # 發現衝突時上傳檔案先暫存在伺服器，解決衝突時只需送回 token 與衝突處理方式
+    token = models.CharField(max_length=64, unique=True, null=True, blank=True, verbose_name="暫存代碼")
+    expires_at = models.DateTimeField(null=True, blank=True, verbose_name="暫存到期時間")
+    # 分段上傳：已依序寫入暫存檔的區塊數，上傳中時 file_size 為已接收的位元組數
+    chunks_received = models.IntegerField(default=0, verbose_name="已接收區塊數")
+    # 取得工作的處理程序，以條件式 UPDATE 取得，同一工作只會由一個處理程序執行
+    worker = models.CharField(max_length=100, blank=True, verbose_name="處理程序")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="建立時間")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="開始時間")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="完成時間")
+    # 處理程序最後回報進度的時間，逾時未更新視為處理程序中斷
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="最後回報時間")
+
+    class Meta:
+        verbose_name = "匯入工作"
+        verbose_name_plural = "匯入工作"
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='importjob_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.get_status_display()})"
+
+    @property
+    def percent(self):
+        """依已讀取的位元組數估計的完成百分比"""
+        if self.status == self.STATUS_DONE:
+            return 100
+        if not self.file_size:
+            return 0
+        return min(99, int(self.bytes_processed * 100 / self.file_size))
+
+    def as_dict(self):
+        return {
+            'id': self.pk,
+            'status': self.status,
+            'status_display': self.get_status_display(),
+            'filename': self.filename,
+            'percent': self.percent,
+            'total': self.total_records,
+            'imported': self.imported_records,
+            'skipped': self.skipped_records,
+            'message': self.message,
+            'finished': self.status in (self.STATUS_DONE, self.STATUS_FAILED),
+        }
@@ -0,0 +1,130 @@
+import base64
+import json
+from datetime import date
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+
+from .caching import cached_listing
+from .projections import MANIFEST_TYPE_DISPLAY, manifest_cards, project_manifest_query
+
+# 合併後的排序：申報日期新到舊，同日再依類型與主鍵固定順序
+MERGED_ORDERING = ('-report_date', 'manifest_type', '-id')
+
+
+def _merged_parts(disposal_query, reuse_query):
+    parts = []
+    if not disposal_query.query.is_empty():
+        parts.append(('disposal', disposal_query))
+    if not reuse_query.query.is_empty():
+        parts.append(('reuse', reuse_query))
+    return parts
+
+
+def _union(projected):
+    if len(projected) == 1:
+        return projected[0].order_by(*MERGED_ORDERING)
+    return projected[0].union(*projected[1:], all=True).order_by(*MERGED_ORDERING)
+
+
+def merge_manifest_queries(disposal_query, reuse_query):
+    """
+    在資料庫端以 UNION ALL 合併清除單與再利用單並排序，
+    切片時才會以 LIMIT/OFFSET 取出需要的資料列
+    """
+    parts = _merged_parts(disposal_query, reuse_query)
+    if not parts:
+        return project_manifest_query(disposal_query, 'disposal')
+    return _union([project_manifest_query(query, manifest_type) for manifest_type, query in parts])
+
+
+class MergedManifestPaginator(Paginator):
+    """
+    合併聯單的分頁器，只把目前頁面的資料列轉換為卡片；
+    提供篩選條件簽章時，各頁卡片會依簽章與聯單資料世代快取
+    """
+
+    def __init__(self, object_list, per_page, count=None, signature=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        # 已知總數時直接覆寫 cached_property，避免對 UNION 再做一次 COUNT
+        if count is not None:
+            self.count = count
+        self.signature = signature
+
+    def _get_page(self, object_list, number, paginator):
+        # object_list 是尚未執行的切片查詢，快取命中時不會查詢資料庫
+        if self.signature is None:
+            cards = manifest_cards(object_list)
+        else:
+            cards = cached_listing(self.signature, f'page:{self.per_page}:{number}',
+                                   lambda: manifest_cards(object_list))
+        return super()._get_page(cards, number, paginator)
+
+
+# 游標分頁（keyset pagination）
+class InvalidCursor(ValueError):
+    """游標格式錯誤或已被竄改"""
+
+
+def encode_cursor(card):
+    """以 (申報日期, 聯單類型, 主鍵) 產生不透明的游標字串"""
+    payload = json.dumps(
+        [card.report_date.isoformat(), card.type, card.id],
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """解析游標字串，回傳 (申報日期, 聯單類型, 主鍵)"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        report_date, manifest_type, pk = json.loads(base64.urlsafe_b64decode(padded))
+        report_date = date.fromisoformat(report_date)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise InvalidCursor(token)
+    if manifest_type not in MANIFEST_TYPE_DISPLAY:
+        raise InvalidCursor(token)
+    return report_date, manifest_type, pk
+
+
+def _seek(query, manifest_type, cursor):
+    """
+    依合併排序 (-report_date, manifest_type, -id) 取得游標之後的資料，
+    每個分支都只是 (report_date, id) 上的範圍條件，可直接走索引
+    """
+    report_date, cursor_type, pk = cursor
+    if manifest_type > cursor_type:
+        return query.filter(report_date__lte=report_date)
+    if manifest_type < cursor_type:
+        return query.filter(report_date__lt=report_date)
+    # 整個條件放在 OR 中時 SQLite 無法以索引範圍搜尋，會掃描整個索引直到游標位置；
+    # 另加 report_date <= 游標日期的上限，讓查詢從游標位置開始搜尋
+    return query.filter(Q(report_date__lt=report_date) | Q(id__lt=pk), report_date__lte=report_date)
+
+
+def keyset_page(disposal_query, reuse_query, cursor=None, per_page=20):
+    """
+    取得游標之後的一頁卡片，回傳 (卡片列表, 下一頁游標)；
+    沒有下一頁時游標為 None。多取一筆用來判斷是否還有下一頁
+    """
+    parts = _merged_parts(disposal_query, reuse_query)
+    if not parts:
+        return [], None
+
+    if cursor:
+        cursor = decode_cursor(cursor)
+        parts = [(manifest_type, _seek(query, manifest_type, cursor)) for manifest_type, query in parts]
+
+    projected = [project_manifest_query(query, manifest_type) for manifest_type, query in parts]
+    # 支援時讓各分支先各自排序並限制筆數（如 PostgreSQL），UNION 只需合併少量資料列；
+    # SQLite 不允許，但其 UNION ALL 搭配 ORDER BY 會以索引順序合併，同樣在 LIMIT 後停止
+    if len(projected) > 1 and connections[projected[0].db].features.supports_slicing_ordering_in_compound:
+        projected = [query.order_by(*MERGED_ORDERING)[:per_page + 1] for query in projected]
+    rows = list(_union(projected)[:per_page + 1])
+
+    cards = manifest_cards(rows[:per_page])
+    next_cursor = encode_cursor(cards[-1]) if len(rows) > per_page else None
+    return cards, next_cursor
@@ -0,0 +1,77 @@
+from django.db.models import CharField, F, Value
+
+# 聯單類型顯示名稱
+MANIFEST_TYPE_DISPLAY = {
+    'disposal': '清除單',
+    'reuse': '再利用單',
+}
+
+# 卡片顯示所需的共用欄位（兩種聯單欄位名稱相同）
+CARD_FIELDS = (
+    'id', 'manifest_id', 'waste_id', 'company_name',
+    'report_date', 'reported_weight', 'manifest_confirmation',
+)
+
+# 各聯單類型的代碼/名稱欄位，投影後統一為 card_code/card_name
+CARD_CODE_FIELDS = {
+    'disposal': ('waste_code', 'waste_name'),
+    'reuse': ('substance_code', 'substance_name'),
+}
+
+
+class ManifestCard:
+    """聯單卡片的精簡資料列，清除單與再利用單共用同一形狀，卡片模板與 JSON 回應共用"""
+
+    # 順序與 project_manifest_query 取出的欄位一致
+    __slots__ = CARD_FIELDS + ('type', 'waste_code', 'waste_name')
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    @property
+    def type_display(self):
+        return MANIFEST_TYPE_DISPLAY.get(self.type, '')
+
+    def as_dict(self):
+        """轉換為可序列化為 JSON 的字典"""
+        return {
+            'id': self.id,
+            'type': self.type,
+            'type_display': self.type_display,
+            'manifest_id': self.manifest_id,
+            'waste_id': self.waste_id,
+            'company_name': self.company_name,
+            'report_date': self.report_date.isoformat() if self.report_date else None,
+            'waste_code': self.waste_code,
+            'waste_name': self.waste_name,
+            'reported_weight': str(self.reported_weight),
+            'manifest_confirmation': self.manifest_confirmation,
+        }
+
+    def __reduce__(self):
+        # 快取時只序列化欄位值
+        return (ManifestCard, tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self):
+        return f'<ManifestCard {self.type} {self.manifest_id}/{self.waste_id}>'
+
+
+def project_manifest_query(query, manifest_type):
+    """
+    將單一聯單查詢集投影為卡片欄位的 tuple（values_list），
+    不建立模型實例；取出的欄位順序即 ManifestCard.__slots__
+    """
+    code_field, name_field = CARD_CODE_FIELDS[manifest_type]
+
+    # 三個標註的順序必須一致，UNION 才能逐欄對齊
+    return query.order_by().annotate(
+        manifest_type=Value(manifest_type, output_field=CharField()),
+        card_code=F(code_field),
+        card_name=F(name_field),
+    ).values_list(*CARD_FIELDS, 'manifest_type', 'card_code', 'card_name')
+
+
+def manifest_cards(rows):
+    """將投影後的資料列包裝為 ManifestCard"""
+    return [ManifestCard(*row) for row in rows]
@@ -0,0 +1,100 @@
+import logging
+
+from .caching import filter_signature
+from .models import DisposalManifest, ReuseManifest
+from .search import filter_contains
+
+logger = logging.getLogger(__name__)
+
+# 聯單類型對應的模型
+MANIFEST_MODELS = {
+    'disposal': DisposalManifest,
+    'reuse': ReuseManifest,
+}
+
+# 篩選條件：(表單欄位, 清除單欄位, 再利用單欄位, 查詢方式)
+# 查詢方式 'contains' 代表使用全文檢索索引的包含查詢
+MANIFEST_FILTERS = (
+    ('manifest_id', 'manifest_id', 'manifest_id', 'icontains'),
+    ('company_name', 'company_name', 'company_name', 'contains'),
+    ('waste_code', 'waste_code', 'substance_code', 'icontains'),
+    ('waste_name', 'waste_name', 'substance_name', 'contains'),
+    ('report_date_from', 'report_date', 'report_date', 'gte'),
+    ('report_date_to', 'report_date', 'report_date', 'lte'),
+    ('reported_weight_below', 'reported_weight', 'reported_weight', 'lte'),
+    ('reported_weight_above', 'reported_weight', 'reported_weight', 'gte'),
+)
+
+# 確認狀態篩選值對應的 manifest_confirmation
+CONFIRMATION_VALUES = {
+    'confirmed': True,
+    'unconfirmed': False,
+}
+
+
+class ManifestQuery:
+    """
+    由 ManifestFilterForm 編譯而成的聯單查詢：每種聯單類型各一個查詢集，
+    聯單類型篩選排除的模型直接為空查詢集，不會送出 SQL。
+    清單、統計、匯出共用同一份篩選邏輯與查詢計畫
+    """
+
+    def __init__(self, cleaned_data=None):
+        self.data = {
+            key: value for key, value in (cleaned_data or {}).items()
+            if value not in (None, '')
+        }
+        self.manifest_type = self.data.get('manifest_type', '')
+        self.signature = filter_signature(self.data)
+        self.disposal = self.compile('disposal')
+        self.reuse = self.compile('reuse')
+
+    @classmethod
+    def from_form(cls, form):
+        """表單驗證失敗時不套用任何篩選條件"""
+        return cls(form.cleaned_data if form.is_valid() else {})
+
+    def includes(self, manifest_type):
+        return not self.manifest_type or self.manifest_type == manifest_type
+
+    def compile(self, manifest_type):
+        """將篩選條件編譯為指定聯單類型的查詢集"""
+        model = MANIFEST_MODELS[manifest_type]
+        if not self.includes(manifest_type):
+            return model.objects.none()
+
+        query = model.objects.all()
+        column = 1 if manifest_type == 'disposal' else 2
+        for spec in MANIFEST_FILTERS:
+            value = self.data.get(spec[0])
+            if value is None:
+                continue
+            field, lookup = spec[column], spec[3]
+            if lookup == 'contains':
+                query = filter_contains(query, field, value)
+            else:
+                query = query.filter(**{f'{field}__{lookup}': value})
+
+        confirmation = CONFIRMATION_VALUES.get(self.data.get('confirmation_status'))
+        if confirmation is not None:
+            query = query.filter(manifest_confirmation=confirmation)
+        return query
+
+    def querysets(self):
+        """回傳 (聯單類型, 查詢集)，略過被排除的聯單類型"""
+        return [
+            (manifest_type, query)
+            for manifest_type, query in (('disposal', self.disposal), ('reuse', self.reuse))
+            if self.includes(manifest_type)
+        ]
+
+    def explain(self, **options):
+        """
+        取得各聯單類型的資料庫查詢計畫，供調整索引時檢查；
+        options 直接傳給 QuerySet.explain（例如 PostgreSQL 的 analyze=True）
+        """
+        plans = {}
+        for manifest_type, query in self.querysets():
+            plans[manifest_type] = query.explain(**options)
+            logger.debug(f"{manifest_type} 查詢計畫：\n{plans[manifest_type]}")
+        return plans
@@ -0,0 +1,67 @@
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+# 各聯單模型納入全文檢索的欄位（由 0003 遷移建立 FTS5 索引與同步觸發器）
+SEARCH_FIELDS = {
+    'disposalmanifest': ('company_name', 'waste_name'),
+    'reusemanifest': ('company_name', 'substance_name'),
+}
+
+# trigram 斷詞至少需要三個字元才能使用索引，較短的字詞退回 LIKE 查詢
+MIN_TERM_LENGTH = 3
+
+# 同步檢索表的觸發器名稱後綴：新增、刪除、修改
+SYNC_TRIGGERS = ('ai', 'ad', 'au')
+
+# 各資料庫連線是否已建立檢索表與同步觸發器的快取
+_index_available = {}
+
+
+def search_table(model):
+    """模型對應的 FTS5 檢索表名稱"""
+    return f'{model._meta.db_table}_search'
+
+
+def search_index_available(model, using='default'):
+    """
+    目前資料庫是否有此模型的全文檢索表與三個同步觸發器（僅 SQLite 且支援 FTS5 時會建立）。
+    缺少任何觸發器時索引不會隨聯單更新，查詢改用 LIKE 以免結果不正確
+    """
+    key = (using, model._meta.db_table)
+    if key not in _index_available:
+        connection = connections[using]
+        available = False
+        if connection.vendor == 'sqlite':
+            table = search_table(model)
+            names = [table] + [f'{table}_{suffix}' for suffix in SYNC_TRIGGERS]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT COUNT(*) FROM sqlite_master WHERE "
+                    "(type = 'table' AND name = %s) OR (type = 'trigger' AND name IN (%s, %s, %s))",
+                    names,
+                )
+                available = cursor.fetchone()[0] == len(names)
+        _index_available[key] = available
+    return _index_available[key]
+
+
+def reset_search_index_cache():
+    """清除檢索表是否可用的快取（遷移或手動修改索引後使用）"""
+    _index_available.clear()
+
+
+def filter_contains(query, field, term):
+    """
+    篩選欄位包含指定字詞的聯單，結果等同 field__icontains=term，
+    但可用時改由 trigram 全文檢索索引找出符合的 ID，避免 LIKE '%...%' 全表掃描
+    """
+    model = query.model
+    if (field in SEARCH_FIELDS.get(model._meta.model_name, ())
+            and len(term) >= MIN_TERM_LENGTH
+            and search_index_available(model, query.db)):
+        table = connections[query.db].ops.quote_name(search_table(model))
+        # 欄位篩選 + 片語查詢；trigram 斷詞下片語即為子字串比對
+        match = '%s : "%s"' % (field, term.replace('"', '""'))
+        return query.filter(id__in=RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [match]))
+
+    return query.filter(**{f'{field}__icontains': term})
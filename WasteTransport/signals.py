@@ -0,0 +1,44 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import bump_manifest_generation
+from .fragments import evict_detail_fragments
+from .models import DisposalManifest, ReuseManifest
+
+# 目前執行緒尚未處理的聯單變更 {模型: {主鍵}}，交易提交後一次處理
+_pending = threading.local()
+
+
+@receiver(post_save, sender=DisposalManifest)
+@receiver(post_save, sender=ReuseManifest)
+@receiver(post_delete, sender=DisposalManifest)
+@receiver(post_delete, sender=ReuseManifest)
+def manifest_changed(sender, instance, created=False, **kwargs):
+    """
+    聯單新增、修改或刪除（含管理後台）後使清單與統計快取失效，並移除其詳細資訊片段。
+    同一個交易中的變更合併為提交後的一次世代更新與一次片段刪除
+    """
+    changes = getattr(_pending, 'changes', None)
+    if changes is None:
+        changes = _pending.changes = {}
+    pks = changes.setdefault(sender, set())
+    if not created:
+        pks.add(instance.pk)
+    # 每次變更都登記，只有第一個執行的會處理；儲存點回復時其中的登記會被捨棄，
+    # 由同一交易中其他的登記處理（不在交易中時立即執行）
+    transaction.on_commit(flush_manifest_changes)
+
+
+def flush_manifest_changes():
+    """處理累積的聯單變更；回復的交易中的變更也會一併處理，只會多移除一些片段快取"""
+    changes = getattr(_pending, 'changes', None)
+    if not changes:
+        return
+    _pending.changes = None
+    bump_manifest_generation()
+    for model, pks in changes.items():
+        if pks:
+            evict_detail_fragments(model, pks)
@@ -0,0 +1,70 @@
+import csv
+import tempfile
+from pathlib import Path
+
+from django.db.models.signals import post_delete
+from django.test import SimpleTestCase
+
+from ..benchmarks.generator import ManifestRowGenerator, write_manifest_csv
+from ..benchmarks.runner import run_benchmark
+from ..importing.stream import CSV_ENCODING
+from ..importing.validation import validate_rows
+from ..models import DisposalManifest, ReuseManifest
+from .utils import ManifestTestCase
+
+
+class ManifestRowGeneratorTests(SimpleTestCase):
+
+    def test_same_seed_same_rows(self):
+        first = list(ManifestRowGenerator('disposal', 0.2, seed=3).rows(50))
+        self.assertEqual(first, list(ManifestRowGenerator('disposal', 0.2, seed=3).rows(50)))
+
+    def test_other_seed_same_keys_other_content(self):
+        first = list(ManifestRowGenerator('reuse', seed=1).rows(20))
+        second = list(ManifestRowGenerator('reuse', seed=2).rows(20))
+        keys = lambda rows: [(row['聯單編號'], row['廢棄物ID']) for row in rows]
+        self.assertEqual(keys(first), keys(second))
+        self.assertNotEqual(first, second)
+
+    def test_duplicate_rate(self):
+        rows = list(ManifestRowGenerator('disposal', 0.5, seed=1).rows(200))
+        distinct = {(row['聯單編號'], row['廢棄物ID']) for row in rows}
+        self.assertLess(len(distinct), 150)
+
+    def test_rows_pass_validation(self):
+        for import_type in ('disposal', 'reuse'):
+            report = validate_rows(ManifestRowGenerator(import_type).rows(100), import_type)
+            self.assertEqual(report['invalid'], 0, report['columns'])
+
+    def test_written_file_matches_export_format(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_manifest_csv(Path(tmp) / 'manifests.csv', 'disposal', 5)
+            raw = path.read_bytes()
+            with open(path, encoding=CSV_ENCODING, newline='') as source:
+                rows = list(csv.DictReader(source))
+        self.assertTrue(raw.startswith(b'\xef\xbb\xbf'))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(list(rows[0]), ManifestRowGenerator('disposal').columns)
+
+
+class RunBenchmarkTests(ManifestTestCase):
+
+    def test_reports_each_strategy_without_delete_signals(self):
+        deleted = []
+
+        def record_delete(sender, **kwargs):
+            deleted.append(sender)
+
+        post_delete.connect(record_delete)
+        self.addCleanup(post_delete.disconnect, record_delete)
+        report = run_benchmark('disposal', rows=20, strategies=('skip', 'replace'), log=lambda message: None)
+
+        self.assertEqual([result['strategy'] for result in report['results']], ['skip', 'replace'])
+        skip, replace = report['results']
+        self.assertEqual((skip['initial']['imported'], skip['imported'], skip['skipped']), (20, 0, 20))
+        self.assertEqual((replace['imported'], replace['skipped']), (20, 0))
+        self.assertGreater(replace['queries'], 0)
+        self.assertEqual(DisposalManifest.objects.count(), 20)
+        # 每個處理方式開始前清空聯單，不逐筆觸發刪除訊號
+        self.assertEqual(deleted, [])
+        self.assertFalse(ReuseManifest.objects.exists())
@@ -0,0 +1,115 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..fragments import fragment_key, render_detail_fragment
+from ..importing.bulk import bulk_write
+from ..importing.process import process_csv_import
+from ..models import DisposalManifest, ImportHistory
+from .utils import ManifestTestCase, disposal_manifest, manifest_csv, manifest_rows
+
+
+def import_rows(rows, conflict_resolution='skip', import_type='disposal'):
+    csv_file = SimpleUploadedFile('manifests.csv', manifest_csv(import_type, rows), content_type='text/csv')
+    return process_csv_import(csv_file, import_type, conflict_resolution, csv_file.name)
+
+
+@override_settings(MANIFEST_IMPORT_BATCH_SIZE=10)
+class BulkInsertTests(ManifestTestCase):
+
+    def test_new_manifests_are_written_in_batches(self):
+        rows = manifest_rows('disposal', 45)
+        with CaptureQueriesContext(connection) as queries:
+            result = import_rows(rows)
+        self.assertTrue(result['success'])
+        self.assertEqual((result['imported'], result['skipped'], result['total']), (45, 0, 45))
+        self.assertEqual(DisposalManifest.objects.count(), 45)
+
+        # 每 10 筆一次 INSERT，不是每筆一次
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "WasteTransport_disposalmanifest"')]
+        self.assertEqual(len(inserts), 5)
+
+        history = ImportHistory.objects.get()
+        self.assertEqual((history.total_records, history.imported_records), (45, 45))
+
+    def test_bulk_created_manifests_have_content_hash(self):
+        import_rows(manifest_rows('disposal', 3))
+        for manifest in DisposalManifest.objects.all():
+            self.assertEqual(manifest.row_hash, manifest.content_hash())
+
+    def test_skip_keeps_existing_manifests(self):
+        import_rows(manifest_rows('disposal', 5, seed=1))
+        result = import_rows(manifest_rows('disposal', 8, seed=2), 'skip')
+        self.assertEqual((result['imported'], result['skipped']), (3, 5))
+        self.assertEqual(DisposalManifest.objects.count(), 8)
+
+    def test_failed_batch_falls_back_to_single_rows(self):
+        existing = disposal_manifest(1)
+        instances = [disposal_manifest(2, save=False), disposal_manifest(1, save=False), disposal_manifest(3, save=False)]
+
+        with self.assertLogs('WasteTransport.importing.bulk', 'WARNING') as logs:
+            saved = bulk_write(DisposalManifest, instances)
+        self.assertEqual(len(logs.records), 2)
+        # 只有違反唯一約束的那筆未寫入
+        self.assertEqual([manifest.waste_id for manifest in saved], ['2', '3'])
+        self.assertEqual(DisposalManifest.objects.get(manifest_id=existing.manifest_id, waste_id='1').pk, existing.pk)
+        self.assertEqual(DisposalManifest.objects.count(), 3)
+
+
+@override_settings(MANIFEST_IMPORT_BATCH_SIZE=10)
+class BulkUpsertTests(ManifestTestCase):
+
+    def setUp(self):
+        super().setUp()
+        import_rows(manifest_rows('disposal', 25, seed=1))
+        self.original = {(m.manifest_id, m.waste_id): m for m in DisposalManifest.objects.all()}
+
+    def test_replace_overwrites_in_batches(self):
+        rows = manifest_rows('disposal', 25, seed=2)
+        with CaptureQueriesContext(connection) as queries:
+            result = import_rows(rows, 'replace')
+        self.assertEqual((result['imported'], result['skipped']), (25, 0))
+
+        upserts = [query for query in queries if 'ON CONFLICT' in query['sql']]
+        self.assertEqual(len(upserts), 3)
+
+        # 保留主鍵與建立時間，其他欄位為新資料
+        for manifest in DisposalManifest.objects.all():
+            original = self.original[(manifest.manifest_id, manifest.waste_id)]
+            self.assertEqual((manifest.pk, manifest.created_at), (original.pk, original.created_at))
+            self.assertEqual(manifest.row_hash, manifest.content_hash())
+        first = DisposalManifest.objects.get(manifest_id=rows[0]['聯單編號'], waste_id=rows[0]['廢棄物ID'])
+        self.assertEqual((first.waste_code, first.reported_weight), (rows[0]['廢棄物代碼'], Decimal(rows[0]['申報重量'])))
+
+    def test_merge_keeps_values_of_blank_columns(self):
+        rows = manifest_rows('disposal', 3, seed=2)
+        for row in rows:
+            row['廢棄物名稱'] = ''
+        result = import_rows(rows, 'smart_merge')
+        self.assertEqual(result['imported'], 3)
+
+        for row in rows:
+            manifest = DisposalManifest.objects.get(manifest_id=row['聯單編號'], waste_id=row['廢棄物ID'])
+            original = self.original[(manifest.manifest_id, manifest.waste_id)]
+            self.assertEqual(manifest.waste_name, original.waste_name)
+            self.assertEqual(manifest.waste_code, row['廢棄物代碼'])
+            self.assertEqual(manifest.pk, original.pk)
+
+    def test_new_and_replaced_rows_in_one_file(self):
+        rows = manifest_rows('disposal', 30, seed=2)
+        result = import_rows(rows, 'replace')
+        self.assertEqual((result['imported'], result['skipped']), (30, 0))
+        self.assertEqual(DisposalManifest.objects.count(), 30)
+
+    def test_replaced_manifests_lose_cached_fragments(self):
+        manifest = next(iter(self.original.values()))
+        render_detail_fragment(DisposalManifest, 'ajax', manifest.pk, manifest.updated_at, lambda: manifest)
+        key = fragment_key(DisposalManifest, manifest.pk, 'ajax')
+        self.assertIsNotNone(cache.get(key))
+
+        import_rows(manifest_rows('disposal', 25, seed=2), 'replace')
+        self.assertIsNone(cache.get(key))
@@ -0,0 +1,91 @@
+from unittest import mock
+
+from django.db import transaction
+
+from ..caching import cached_listing, defer_generation_bump, filter_signature, manifest_generation
+from ..models import DisposalManifest
+from ..signals import _pending
+from .utils import ManifestTestCase, disposal_manifest, reuse_manifest
+
+
+class FilterSignatureTests(ManifestTestCase):
+
+    def test_empty_values_and_order_are_ignored(self):
+        self.assertEqual(
+            filter_signature({'company_name': '榮總', 'waste_code': '', 'manifest_id': None}),
+            filter_signature({'company_name': '榮總'}),
+        )
+        self.assertEqual(filter_signature({'a': 1, 'b': 2}), filter_signature({'b': 2, 'a': 1}))
+        self.assertNotEqual(filter_signature({'company_name': '榮總'}), filter_signature({'company_name': '臺大'}))
+
+
+class CachedListingTests(ManifestTestCase):
+
+    def test_result_is_reused_until_manifests_change(self):
+        build = mock.Mock(return_value=['first'])
+        self.assertEqual(cached_listing('signature', 'page:1', build), ['first'])
+        self.assertEqual(cached_listing('signature', 'page:1', build), ['first'])
+        self.assertEqual(build.call_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            disposal_manifest(1)
+        build.return_value = ['second']
+        self.assertEqual(cached_listing('signature', 'page:1', build), ['second'])
+        self.assertEqual(build.call_count, 2)
+
+    def test_generation_changes_only_after_commit(self):
+        generation = manifest_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            disposal_manifest(1)
+            self.assertEqual(manifest_generation(), generation)
+        self.assertNotEqual(manifest_generation(), generation)
+
+    def test_deferred_bumps_are_combined(self):
+        with mock.patch('WasteTransport.caching._set_new_generation') as set_generation:
+            with self.captureOnCommitCallbacks(execute=True), defer_generation_bump():
+                disposal_manifest(1)
+                reuse_manifest(2)
+        self.assertEqual(set_generation.call_count, 1)
+
+
+@mock.patch('WasteTransport.signals.evict_detail_fragments')
+@mock.patch('WasteTransport.signals.bump_manifest_generation')
+class ManifestSignalTests(ManifestTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # 先前測試的交易回復後未處理的變更
+        _pending.changes = None
+
+    def test_changes_in_one_transaction_invalidate_once(self, bump, evict):
+        manifests = [disposal_manifest(i) for i in range(5)]
+        pks = {manifest.pk for manifest in manifests}
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for manifest in manifests:
+                manifest.delete()
+            reuse_manifest(9)
+
+        self.assertEqual(len(callbacks), 6)
+        self.assertEqual(bump.call_count, 1)
+        evict.assert_called_once_with(DisposalManifest, pks)
+
+    def test_created_manifests_have_no_fragments_to_evict(self, bump, evict):
+        with self.captureOnCommitCallbacks(execute=True):
+            disposal_manifest(1)
+        self.assertEqual(bump.call_count, 1)
+        evict.assert_not_called()
+
+    def test_change_in_rolled_back_savepoint_is_not_lost(self, bump, evict):
+        manifest = disposal_manifest(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    manifest.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            other = disposal_manifest(2)
+            other.save()
+
+        self.assertEqual(bump.call_count, 1)
+        evict.assert_called_once_with(DisposalManifest, {manifest.pk, other.pk})
@@ -0,0 +1,80 @@
+from django.urls import reverse
+
+from ..caching import bump_manifest_generation
+from .utils import ManifestTestCase, disposal_manifest, reuse_manifest
+
+XHR = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+
+class ManifestDetailConditionalTests(ManifestTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.login_importer()
+        self.disposal = disposal_manifest(1)
+        self.reuse = reuse_manifest(2)
+
+    def detail_url(self, manifest):
+        name = 'disposal_manifest_detail' if manifest is self.disposal else 'reuse_manifest_detail'
+        return reverse(f'waste_transport:{name}', args=[manifest.manifest_id, manifest.waste_id])
+
+    def test_unchanged_manifest_returns_304(self):
+        for manifest in (self.disposal, self.reuse):
+            url = self.detail_url(manifest)
+            for headers in ({}, XHR):
+                response = self.client.get(url, **headers)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('private', response['Cache-Control'])
+
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], **headers)
+                self.assertEqual(response.status_code, 304)
+
+    def test_ajax_and_page_have_different_etags(self):
+        url = self.detail_url(self.disposal)
+        page_etag = self.client.get(url)['ETag']
+        xhr_etag = self.client.get(url, **XHR)['ETag']
+        self.assertNotEqual(page_etag, xhr_etag)
+
+        # 頁面的 ETag 不能讓 AJAX 請求拿到 304
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=page_etag, **XHR).status_code, 200)
+
+    def test_saved_manifest_gets_new_etag(self):
+        url = self.detail_url(self.disposal)
+        etag = self.client.get(url, **XHR)['ETag']
+
+        self.disposal.reported_weight = '20.00'
+        self.disposal.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **XHR)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_missing_manifest_is_404(self):
+        url = reverse('waste_transport:disposal_manifest_detail', args=['E480042799999999', '1'])
+        self.assertEqual(self.client.get(url, **XHR).status_code, 404)
+
+
+class ManifestListConditionalTests(ManifestTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.login_importer()
+        disposal_manifest(1)
+        self.url = reverse('waste_transport:manifest_list')
+
+    def test_ajax_list_returns_304_until_generation_changes(self):
+        etag = self.client.get(self.url, {'page': 1}, **XHR)['ETag']
+        response = self.client.get(self.url, {'page': 1}, HTTP_IF_NONE_MATCH=etag, **XHR)
+        self.assertEqual(response.status_code, 304)
+
+        # 不同的查詢參數有不同的 ETag
+        self.assertNotEqual(self.client.get(self.url, {'page': 2}, **XHR).get('ETag'), etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_manifest_generation()
+        response = self.client.get(self.url, {'page': 1}, HTTP_IF_NONE_MATCH=etag, **XHR)
+        self.assertEqual(response.status_code, 200)
+
+    def test_full_page_has_no_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,49 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..importing.conflicts import find_existing_manifests, row_key, scan_conflicts
+from ..models import DisposalManifest
+from .utils import ManifestTestCase, disposal_manifest, reuse_manifest
+
+
+class ConflictScanTests(ManifestTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(10):
+            disposal_manifest(index)
+        # 同聯單編號不同廢棄物ID、以及另一種聯單的相同鍵都不是衝突
+        disposal_manifest(100, manifest_id='E4800427000000003', waste_id='other')
+        reuse_manifest(4, manifest_id='E4800427000000004', waste_id='4')
+
+    def rows(self, indexes):
+        return [
+            {'聯單編號': f'E4800427{index:09d}', '廢棄物ID': str(index), '事業機構名稱': '高雄榮民總醫院',
+             '申報日期': '2024/01/01'}
+            for index in indexes
+        ]
+
+    def test_row_key_requires_both_ids(self):
+        self.assertEqual(row_key({'聯單編號': 'E480042700000001', '廢棄物ID': '1'}), ('E480042700000001', '1'))
+        self.assertIsNone(row_key({'聯單編號': 'E480042700000001', '廢棄物ID': ''}))
+        self.assertIsNone(row_key({'廢棄物ID': '1'}))
+
+    def test_existing_manifests_in_one_query_per_chunk(self):
+        keys = [row_key(row) for row in self.rows(range(5, 15))] + [None, ('E4800427000000003', '99')]
+        with CaptureQueriesContext(connection) as queries:
+            existing = find_existing_manifests(DisposalManifest, keys, chunk_size=4)
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(sorted(existing), [(f'E4800427{i:09d}', str(i)) for i in range(5, 10)])
+
+    def test_scan_reports_conflicting_rows(self):
+        rows = self.rows(range(6)) + self.rows([20, 21])
+        with CaptureQueriesContext(connection) as queries:
+            records = scan_conflicts('disposal', iter(rows), chunk_size=3)
+        # 8 列分成 3 個區塊，每個區塊一次查詢
+        self.assertEqual(len(queries), 3)
+        self.assertEqual([record['waste_id'] for record in records], ['0', '1', '2', '3', '4', '5'])
+        self.assertEqual(records[0]['existing_data']['事業機構名稱'], '高雄榮民總醫院')
+        self.assertEqual(records[0]['existing_data']['廢棄物代碼'], 'D-1801')
+
+    def test_scan_without_existing_manifests(self):
+        self.assertEqual(scan_conflicts('reuse', iter(self.rows([20, 21]))), [])
@@ -0,0 +1,103 @@
+import base64
+from datetime import date
+from unittest import skipUnless
+
+from django.db import connection
+from django.urls import reverse
+
+from ..models import DisposalManifest
+from ..pagination import InvalidCursor, _seek, decode_cursor, encode_cursor, keyset_page
+from ..projections import ManifestCard, project_manifest_query
+from ..queries import ManifestQuery
+from .test_pagination import MergedListingTestCase
+from .utils import disposal_manifest
+
+
+def encode_cursor_payload(payload):
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+class KeysetPaginationTests(MergedListingTestCase):
+
+    def cursor_pages(self, per_page, manifest_type=''):
+        query = ManifestQuery({'manifest_type': manifest_type})
+        pages, cursor = [], None
+        while True:
+            cards, cursor = keyset_page(query.disposal, query.reuse, cursor, per_page)
+            pages.append([(card.type, card.id) for card in cards])
+            if cursor is None:
+                return pages
+
+    def test_matches_offset_pagination(self):
+        for per_page in (1, 6, 7, 20, 40, 100):
+            cursor_pages = self.cursor_pages(per_page)
+            self.assertEqual(cursor_pages, self.offset_pages(per_page), per_page)
+            flattened = sum(cursor_pages, [])
+            self.assertEqual(len(flattened), len(set(flattened)))
+
+    def test_matches_offset_pagination_for_one_type(self):
+        for manifest_type in ('disposal', 'reuse'):
+            self.assertEqual(self.cursor_pages(4, manifest_type), self.offset_pages(4, manifest_type))
+
+    def test_rows_added_before_the_cursor_do_not_shift_pages(self):
+        query = ManifestQuery()
+        _, cursor = keyset_page(query.disposal, query.reuse, None, 10)
+        expected_next = self.expected_order()[10:20]
+
+        # 比游標新的聯單出現在第一頁之前，以 OFFSET 分頁會使下一頁重複一筆
+        disposal_manifest(99, report_date=date(2024, 2, 1))
+        cards, _ = keyset_page(query.disposal, query.reuse, cursor, 10)
+        self.assertEqual([(card.type, card.id) for card in cards], expected_next)
+
+    def test_seek_has_a_date_upper_bound(self):
+        cursor = (date(2024, 1, 3), 'disposal', 10)
+        query = _seek(DisposalManifest.objects.all(), 'disposal', cursor)
+        # OR 之外另有 report_date <= 游標日期，資料庫可從游標位置開始範圍搜尋
+        where = query.query.where
+        self.assertEqual(where.connector, 'AND')
+        self.assertIn('report_date', str(where.children[-1].lhs))
+        self.assertEqual(where.children[-1].lookup_name, 'lte')
+        self.assertEqual([(m.report_date, m.id) for m in query.order_by('-report_date', '-id')], [
+            (m.report_date, m.id) for m in DisposalManifest.objects.order_by('-report_date', '-id')
+            if m.report_date < cursor[0] or (m.report_date == cursor[0] and m.id < cursor[2])
+        ])
+
+    @skipUnless(connection.vendor == 'sqlite', "以 SQLite 的 EXPLAIN QUERY PLAN 檢查")
+    def test_seek_searches_the_date_index(self):
+        for cursor_type in ('disposal', 'reuse'):
+            query = _seek(DisposalManifest.objects.all(), 'disposal', (date(2024, 1, 3), cursor_type, 10))
+            sql, params = project_manifest_query(query, 'disposal').order_by('-report_date', '-id').query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+            self.assertIn('SEARCH', plan)
+            self.assertIn('disposalmanifest_rdate_idx (report_date<?)', plan)
+
+    def test_empty_result(self):
+        query = ManifestQuery({'company_name': '不存在的機構'})
+        self.assertEqual(keyset_page(query.disposal, query.reuse), ([], None))
+
+    def test_cursor_round_trip(self):
+        card = ManifestCard(5, 'E480042700000005', '5', '高雄榮民總醫院', date(2024, 1, 3), 1, True,
+                            'reuse', 'R-0201', '廢塑膠')
+        self.assertEqual(decode_cursor(encode_cursor(card)), (date(2024, 1, 3), 'reuse', 5))
+
+    def test_invalid_cursor(self):
+        for token in ('not-a-cursor', encode_cursor_payload('["2024-01-01","other",1]'), encode_cursor_payload('[1]')):
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(token)
+
+    def test_listing_view_cursor_mode(self):
+        self.login_importer()
+        url = reverse('waste_transport:manifest_list')
+        collected, cursor = [], ''
+        while True:
+            data = self.client.get(url, {'cursor': cursor}, HTTP_X_REQUESTED_WITH='XMLHttpRequest').json()
+            collected += [(card['type'], card['id']) for card in data['manifests']]
+            if not data['has_next']:
+                break
+            cursor = data['next_cursor']
+        self.assertEqual(collected, self.expected_order())
+
+        response = self.client.get(url, {'cursor': 'broken'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,117 @@
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from ..importing import process
+from ..importing.conflicts import scan_conflicts
+from ..importing.dedupe import DuplicateCollapser
+from ..importing.stream import iter_import_rows
+from ..models import DisposalManifest
+from .utils import ManifestTestCase, disposal_manifest, manifest_csv, manifest_rows
+
+ROWS = [
+    {'聯單編號': 'E480042700000001', '廢棄物ID': '1', '事業機構名稱': '甲', '申報重量': '1'},
+    {'聯單編號': 'E480042700000002', '廢棄物ID': '2', '事業機構名稱': '乙', '申報重量': '2'},
+    {'聯單編號': 'E480042700000001', '廢棄物ID': '1', '事業機構名稱': '', '申報重量': '3'},
+    {'聯單編號': '', '廢棄物ID': '9', '事業機構名稱': '缺少聯單編號', '申報重量': '4'},
+    {'聯單編號': 'E480042700000001', '廢棄物ID': '1', '事業機構名稱': '丙', '申報重量': ''},
+]
+
+
+class CountingRows:
+    """記錄讀取次數的 open_rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.opened = 0
+
+    def __call__(self):
+        self.opened += 1
+        return iter([dict(row) for row in self.rows])
+
+
+class DuplicateCollapserTests(SimpleTestCase):
+
+    def collapse(self, policy):
+        rows = DuplicateCollapser(CountingRows(ROWS), policy)
+        return list(rows), rows.collapsed
+
+    def test_last_policy(self):
+        rows, collapsed = self.collapse('last')
+        self.assertEqual(collapsed, 2)
+        self.assertEqual([row['申報重量'] for row in rows], ['2', '4', ''])
+        self.assertEqual(rows[2]['事業機構名稱'], '丙')
+
+    def test_first_policy(self):
+        rows, collapsed = self.collapse('first')
+        self.assertEqual(collapsed, 2)
+        self.assertEqual([row['申報重量'] for row in rows], ['1', '2', '4'])
+
+    def test_merge_policy_keeps_filled_values(self):
+        rows, collapsed = self.collapse('merge')
+        self.assertEqual(collapsed, 2)
+        self.assertEqual(rows[-1]['事業機構名稱'], '丙')
+        self.assertEqual(rows[-1]['申報重量'], '3')
+
+    def test_rows_without_key_are_kept(self):
+        rows, _ = self.collapse('last')
+        self.assertIn('缺少聯單編號', [row['事業機構名稱'] for row in rows])
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            DuplicateCollapser(CountingRows(ROWS), 'newest')
+
+    def test_track_records_positions_in_the_same_read(self):
+        source = CountingRows(ROWS)
+        rows = DuplicateCollapser(source, 'last')
+        self.assertEqual(list(rows.track()), ROWS)
+        self.assertEqual(rows.positions, {('E480042700000001', '1'): 4})
+
+        collapsed = list(rows)
+        self.assertEqual(source.opened, 2)
+        self.assertEqual(len(collapsed), 3)
+
+    def test_known_positions_skip_the_scan(self):
+        source = CountingRows(ROWS)
+        positions = DuplicateCollapser(CountingRows(ROWS)).duplicate_positions()
+        rows = list(DuplicateCollapser(source, 'first', positions))
+        self.assertEqual(source.opened, 1)
+        self.assertEqual(len(rows), 3)
+
+
+class ScanConflictsTests(ManifestTestCase):
+
+    def test_duplicate_conflicts_are_combined_by_policy(self):
+        disposal_manifest(1, manifest_id='E480042700000001', waste_id='1')
+        for policy, company_name, weight in (('last', '丙', None), ('first', '甲', '1'), ('merge', '丙', '3')):
+            rows = DuplicateCollapser(CountingRows(ROWS), policy)
+            records = scan_conflicts('disposal', rows.track(), chunk_size=2, combine=rows.combine)
+
+            self.assertEqual(len(records), 1, policy)
+            self.assertEqual(records[0]['company_name'], company_name, policy)
+            self.assertEqual(records[0]['new_data'].get('申報重量'), weight, policy)
+            self.assertEqual(rows.positions, {('E480042700000001', '1'): 4})
+
+
+@override_settings(MANIFEST_IMPORT_ASYNC_THRESHOLD=None)
+class AskImportReadsTests(ManifestTestCase):
+
+    def test_ask_without_conflicts_reads_rows_twice(self):
+        self.login_importer()
+        data = manifest_csv('disposal', manifest_rows('disposal', 30, duplicate_rate=0.3, seed=4))
+
+        with mock.patch.object(process, 'iter_import_rows', wraps=iter_import_rows) as import_reads, \
+                mock.patch('WasteTransport.views.iter_import_rows', wraps=iter_import_rows) as scan_reads:
+            result = self.client.post(reverse('waste_transport:import_csv'), {
+                'csv_file': SimpleUploadedFile('manifests.csv', data, content_type='text/csv'),
+                'import_type': 'disposal',
+                'conflict_resolution': 'ask',
+            }).json()
+
+        self.assertTrue(result['success'])
+        # 衝突檢查與重複鍵掃描合併為一次讀取，匯入再讀取一次
+        self.assertEqual((scan_reads.call_count, import_reads.call_count), (1, 1))
+        self.assertGreater(result['collapsed'], 0)
+        self.assertEqual(DisposalManifest.objects.count(), result['total'] - result['collapsed'])
@@ -0,0 +1,59 @@
+from datetime import date
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..facets import cached_manifest_facets, manifest_facets
+from ..queries import ManifestQuery
+from .utils import ManifestTestCase, disposal_manifest, reuse_manifest
+
+
+class ManifestFacetTests(ManifestTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(6):
+            disposal_manifest(index, report_date=date(2024, 1 + index % 2, 10), manifest_confirmation=index < 4)
+        for index in range(3):
+            reuse_manifest(index, report_date=date(2024, 3, 5), manifest_confirmation=False)
+
+    def facets(self, **filters):
+        query = ManifestQuery(filters)
+        with CaptureQueriesContext(connection) as queries:
+            facets = manifest_facets(query.disposal, query.reuse)
+        self.assertLessEqual(len(queries), 1)
+        return facets
+
+    def test_counts_in_one_query(self):
+        facets = self.facets()
+        self.assertEqual(facets['total'], 9)
+        self.assertEqual(facets['by_type'], {'disposal': 6, 'reuse': 3})
+        self.assertEqual(facets['by_confirmation'], {'confirmed': 4, 'unconfirmed': 5})
+        self.assertEqual(
+            [(month.strftime('%Y-%m'), count) for month, count in facets['by_month']],
+            [('2024-03', 3), ('2024-02', 3), ('2024-01', 3)],
+        )
+
+    def test_counts_follow_filters(self):
+        facets = self.facets(manifest_type='disposal', confirmation_status='confirmed')
+        self.assertEqual(facets['total'], 4)
+        self.assertEqual(facets['by_type'], {'disposal': 4, 'reuse': 0})
+
+    def test_excluded_types_send_no_query(self):
+        query = ManifestQuery({'manifest_type': 'reuse'})
+        query.reuse = query.reuse.none()
+        with CaptureQueriesContext(connection) as queries:
+            facets = manifest_facets(query.disposal, query.reuse)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(facets['total'], 0)
+
+    def test_cached_until_manifests_change(self):
+        query = ManifestQuery()
+        self.assertEqual(cached_manifest_facets(query.signature, query.disposal, query.reuse)['total'], 9)
+        with CaptureQueriesContext(connection) as queries:
+            cached_manifest_facets(query.signature, query.disposal, query.reuse)
+        self.assertEqual(len(queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reuse_manifest(10)
+        self.assertEqual(cached_manifest_facets(query.signature, query.disposal, query.reuse)['total'], 10)
@@ -0,0 +1,60 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.urls import reverse
+
+from ..fragments import fragment_key, render_detail_fragment
+from ..models import DisposalManifest, ReuseManifest
+from ..signals import _pending
+from .utils import ManifestTestCase, disposal_manifest, reuse_manifest
+
+XHR = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+
+class DetailFragmentTests(ManifestTestCase):
+
+    def setUp(self):
+        super().setUp()
+        _pending.changes = None
+
+    def test_fragment_is_rendered_once_per_version(self):
+        manifest = disposal_manifest(1)
+        get_manifest = mock.Mock(return_value=manifest)
+
+        html = render_detail_fragment(DisposalManifest, 'ajax', manifest.pk, manifest.updated_at, get_manifest)
+        self.assertIn(manifest.manifest_id, html)
+        self.assertEqual(render_detail_fragment(DisposalManifest, 'ajax', manifest.pk, manifest.updated_at, get_manifest), html)
+        get_manifest.assert_called_once()
+
+        # 更新時間不同即重新渲染
+        manifest.save()
+        render_detail_fragment(DisposalManifest, 'ajax', manifest.pk, manifest.updated_at, get_manifest)
+        self.assertEqual(get_manifest.call_count, 2)
+
+    def test_view_renders_changed_manifest(self):
+        self.login_importer()
+        manifest = reuse_manifest(1, substance_name='廢紙')
+        url = reverse('waste_transport:reuse_manifest_detail', args=[manifest.manifest_id, manifest.waste_id])
+        self.assertIn('廢紙', self.client.get(url, **XHR).json()['html'])
+
+        # 快取命中時不載入整筆聯單
+        with mock.patch.object(ReuseManifest.objects, 'get') as get:
+            self.client.get(url, **XHR)
+        get.assert_not_called()
+
+        manifest.substance_name = '廢塑膠'
+        manifest.save()
+        self.assertIn('廢塑膠', self.client.get(url, **XHR).json()['html'])
+        self.assertIn('廢塑膠', self.client.get(url).content.decode('utf-8'))
+
+    def test_committed_changes_evict_fragments(self):
+        manifest = disposal_manifest(1)
+        render_detail_fragment(DisposalManifest, 'ajax', manifest.pk, manifest.updated_at, lambda: manifest)
+        render_detail_fragment(DisposalManifest, 'page', manifest.pk, manifest.updated_at, lambda: manifest)
+        keys = [fragment_key(DisposalManifest, manifest.pk, variant) for variant in ('ajax', 'page')]
+        self.assertEqual(len(cache.get_many(keys)), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            manifest.reported_weight = '1.00'
+            manifest.save()
+        self.assertEqual(cache.get_many(keys), {})
@@ -0,0 +1,75 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import DisposalManifest, ImportHistory
+from .test_bulk import import_rows
+from .utils import ManifestTestCase, manifest_csv, manifest_rows
+
+
+class UnchangedRowTests(ManifestTestCase):
+
+    def test_unchanged_rows_are_skipped_without_writing(self):
+        rows = manifest_rows('disposal', 6, seed=1)
+        import_rows(rows)
+        updated_at = dict(DisposalManifest.objects.values_list('id', 'updated_at'))
+
+        # 兩筆內容不同，其餘與現有聯單相同
+        changed = manifest_rows('disposal', 6, seed=2)
+        rows[1], rows[4] = changed[1], changed[4]
+        with CaptureQueriesContext(connection) as queries:
+            result = import_rows(rows, 'replace')
+        self.assertEqual((result['imported'], result['skipped']), (2, 4))
+
+        upserts = [query for query in queries if 'ON CONFLICT' in query['sql']]
+        self.assertEqual(len(upserts), 1)
+        rewritten = [pk for pk, stamp in DisposalManifest.objects.values_list('id', 'updated_at') if stamp != updated_at[pk]]
+        self.assertEqual(len(rewritten), 2)
+
+    def test_merge_with_same_values_is_skipped(self):
+        rows = manifest_rows('disposal', 3)
+        import_rows(rows)
+        result = import_rows(rows, 'smart_merge')
+        self.assertEqual((result['imported'], result['skipped']), (0, 3))
+
+
+@override_settings(MANIFEST_IMPORT_ASYNC_THRESHOLD=None)
+class RepeatedUploadTests(ManifestTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.login_importer()
+        self.data = manifest_csv('disposal', manifest_rows('disposal', 4))
+
+    def upload(self, conflict_resolution='skip', **fields):
+        return self.client.post(reverse('waste_transport:import_csv'), {
+            'csv_file': SimpleUploadedFile('manifests.csv', self.data, content_type='text/csv'),
+            'import_type': 'disposal',
+            'conflict_resolution': conflict_resolution,
+            **fields,
+        }).json()
+
+    def test_same_file_returns_previous_result(self):
+        first = self.upload()
+        self.assertEqual(first['imported'], 4)
+
+        second = self.upload()
+        self.assertTrue(second['duplicate'])
+        self.assertEqual((second['imported'], second['skipped'], second['total']), (4, 0, 4))
+        self.assertEqual(ImportHistory.objects.count(), 1)
+        self.assertEqual(len(ImportHistory.objects.get().content_digest), 64)
+
+    def test_ask_matches_any_previous_resolution(self):
+        self.upload('replace')
+        self.assertTrue(self.upload('ask')['duplicate'])
+        # 指定其他處理方式時重新匯入
+        self.assertNotIn('duplicate', self.upload('skip'))
+
+    def test_force_imports_again(self):
+        self.upload()
+        result = self.upload(force=True)
+        self.assertNotIn('duplicate', result)
+        self.assertEqual((result['imported'], result['skipped']), (0, 4))
+        self.assertEqual(ImportHistory.objects.count(), 2)
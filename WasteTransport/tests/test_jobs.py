@@ -0,0 +1,156 @@
+import json
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..importing.jobs import (
+    claim_next_job, claim_staged_import, enqueue_import, fail_stale_jobs, run_import_job, stage_import,
+)
+from ..models import DisposalManifest, ImportJob
+from .utils import ManifestTestCase, manifest_csv, manifest_rows
+
+
+class ImportJobClaimTests(ManifestTestCase):
+
+    def csv_file(self, count=3, seed=0):
+        return ContentFile(manifest_csv('disposal', manifest_rows('disposal', count, seed=seed)), name='manifests.csv')
+
+    def test_queued_job_is_claimed_once(self):
+        first = enqueue_import(self.csv_file(), 'disposal', 'skip', 'first.csv')
+        second = enqueue_import(self.csv_file(), 'disposal', 'skip', 'second.csv')
+
+        self.assertEqual(claim_next_job('worker-a').pk, first.pk)
+        self.assertEqual(claim_next_job('worker-b').pk, second.pk)
+        self.assertIsNone(claim_next_job('worker-c'))
+        self.assertEqual(ImportJob.objects.get(pk=first.pk).worker, 'worker-a')
+
+    def test_claim_loses_race_when_status_changed(self):
+        job = enqueue_import(self.csv_file(), 'disposal', 'skip', 'manifests.csv')
+        # 另一個處理程序在查詢與 UPDATE 之間取得工作
+        ImportJob.objects.filter(pk=job.pk).update(status=ImportJob.STATUS_RUNNING, worker='other')
+        self.assertIsNone(claim_next_job('worker-a'))
+        self.assertEqual(ImportJob.objects.get(pk=job.pk).worker, 'other')
+
+    @override_settings(MANIFEST_IMPORT_ASYNC_THRESHOLD=None)
+    def test_staged_import_is_claimed_once(self):
+        staged = stage_import(self.csv_file(), 'disposal', 'manifests.csv')
+
+        job = claim_staged_import(staged.token, 'replace')
+        self.assertEqual(job.status, ImportJob.STATUS_RUNNING)
+        self.assertEqual(job.conflict_resolution, 'replace')
+        self.assertIsNone(claim_staged_import(staged.token, 'skip'))
+
+    @override_settings(MANIFEST_IMPORT_ASYNC_THRESHOLD=0)
+    def test_large_staged_import_is_queued(self):
+        staged = stage_import(self.csv_file(), 'disposal', 'manifests.csv')
+        self.assertEqual(claim_staged_import(staged.token, 'skip').status, ImportJob.STATUS_QUEUED)
+
+    def test_expired_staging_cannot_be_claimed(self):
+        staged = stage_import(self.csv_file(), 'disposal', 'manifests.csv')
+        ImportJob.objects.filter(pk=staged.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(claim_staged_import(staged.token, 'skip'))
+
+    def test_run_import_job_records_result(self):
+        job = enqueue_import(self.csv_file(5), 'disposal', 'skip', 'manifests.csv')
+        job = claim_next_job('worker-a')
+        path = job.file.name
+        result = run_import_job(job)
+
+        self.assertTrue(result['success'])
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.STATUS_DONE)
+        self.assertEqual((job.total_records, job.imported_records), (5, 5))
+        self.assertEqual(DisposalManifest.objects.count(), 5)
+        self.assertFalse(job.file.storage.exists(path))
+
+    @override_settings(MANIFEST_IMPORT_JOB_STALE_AFTER=60)
+    def test_stale_running_job_fails(self):
+        job = enqueue_import(self.csv_file(), 'disposal', 'skip', 'manifests.csv')
+        claim_next_job('worker-a')
+        ImportJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(fail_stale_jobs(), 1)
+        self.assertEqual(ImportJob.objects.get(pk=job.pk).status, ImportJob.STATUS_FAILED)
+
+
+@override_settings(MANIFEST_IMPORT_ASYNC_THRESHOLD=None)
+class ConflictResolutionTests(ManifestTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.login_importer()
+
+    def upload(self, data, conflict_resolution):
+        return self.client.post(reverse('waste_transport:import_csv'), {
+            'csv_file': SimpleUploadedFile('manifests.csv', data, content_type='text/csv'),
+            'import_type': 'disposal',
+            'conflict_resolution': conflict_resolution,
+            'force': True,
+        }).json()
+
+    def resolve(self, token, conflict_resolution):
+        return self.client.post(
+            reverse('waste_transport:resolve_conflicts'),
+            json.dumps({'token': token, 'conflict_resolution': conflict_resolution}),
+            content_type='application/json',
+        ).json()
+
+    def test_resolving_staged_conflicts_imports_once(self):
+        self.assertTrue(self.upload(manifest_csv('disposal', manifest_rows('disposal', 4, seed=1)), 'skip')['success'])
+
+        # 相同鍵、不同內容，另加一筆新聯單
+        updated = manifest_csv('disposal', manifest_rows('disposal', 5, seed=2))
+        response = self.upload(updated, 'ask')
+        self.assertTrue(response['conflict'])
+        self.assertEqual(len(response['conflicting_records']), 4)
+        token = response['import_data']['token']
+        self.assertEqual(DisposalManifest.objects.count(), 4)
+
+        result = self.resolve(token, 'replace')
+        self.assertTrue(result['success'])
+        self.assertEqual(result['total'], 5)
+        self.assertEqual(DisposalManifest.objects.count(), 5)
+
+        again = self.resolve(token, 'replace')
+        self.assertFalse(again['success'])
+        self.assertEqual(DisposalManifest.objects.count(), 5)
+
+    def test_resolution_rechecks_manifests_changed_after_staging(self):
+        self.upload(manifest_csv('disposal', manifest_rows('disposal', 2, seed=1)), 'skip')
+        token = self.upload(manifest_csv('disposal', manifest_rows('disposal', 4, seed=2)), 'ask')['import_data']['token']
+
+        # 暫存後另一次匯入新增了原本不衝突的聯單，解決衝突時仍須視為衝突
+        self.upload(manifest_csv('disposal', manifest_rows('disposal', 4, seed=3)), 'skip')
+        result = self.resolve(token, 'skip')
+        self.assertEqual((result['imported'], result['skipped']), (0, 4))
+
+
+@override_settings(MANIFEST_IMPORT_ASYNC_THRESHOLD=0)
+class BackgroundImportTests(ManifestTestCase):
+
+    def test_large_upload_is_queued_and_polled(self):
+        self.login_importer()
+        response = self.client.post(reverse('waste_transport:import_csv'), {
+            'csv_file': SimpleUploadedFile('manifests.csv', manifest_csv('disposal', manifest_rows('disposal', 4))),
+            'import_type': 'disposal',
+            'conflict_resolution': 'skip',
+        }).json()
+        self.assertTrue(response['queued'])
+        self.assertFalse(DisposalManifest.objects.exists())
+
+        status = self.client.get(response['status_url']).json()['job']
+        self.assertEqual((status['status'], status['finished']), (ImportJob.STATUS_QUEUED, False))
+
+        run_import_job(claim_next_job('worker-a'))
+        status = self.client.get(response['status_url']).json()['job']
+        self.assertEqual((status['status'], status['finished'], status['imported']), (ImportJob.STATUS_DONE, True, 4))
+        self.assertEqual(DisposalManifest.objects.count(), 4)
+
+    def test_unknown_job(self):
+        self.login_importer()
+        response = self.client.get(reverse('waste_transport:import_job_status', args=[999]))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,49 @@
+from unittest import skipUnless
+
+from django.db import IntegrityError, connection, transaction
+
+from ..models import DisposalManifest, ReuseManifest
+from .utils import ManifestTestCase, disposal_manifest, reuse_manifest
+
+
+class ManifestConstraintTests(ManifestTestCase):
+
+    def test_manifest_and_waste_id_are_unique(self):
+        disposal_manifest(1, manifest_id='E480042710700819', waste_id='877')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            disposal_manifest(2, manifest_id='E480042710700819', waste_id='877')
+
+        # 同一聯單的其他廢棄物、另一種聯單的相同鍵不受限制
+        disposal_manifest(3, manifest_id='E480042710700819', waste_id='878')
+        reuse_manifest(4, manifest_id='E480042710700819', waste_id='877')
+        self.assertEqual(DisposalManifest.objects.filter(manifest_id='E480042710700819').count(), 2)
+
+
+@skipUnless(connection.vendor == 'sqlite', "以 SQLite 的 EXPLAIN QUERY PLAN 檢查")
+class ManifestIndexTests(ManifestTestCase):
+
+    def query_plan(self, query):
+        sql, params = query.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return ' '.join(str(row[-1]) for row in cursor.fetchall())
+
+    def test_lookups_use_indexes(self):
+        for model in (DisposalManifest, ReuseManifest):
+            table = model._meta.model_name
+            plans = {
+                # 唯一約束在 SQLite 建立為自動索引，以索引欄位比對
+                '(manifest_id=? AND waste_id=?)': model.objects.filter(manifest_id='E480042710700819', waste_id='877'),
+                f'{table}_rdate_idx (report_date<?)':
+                    model.objects.filter(report_date__lt='2024-01-01').order_by('-report_date', '-id'),
+                f'{table}_company_idx (company_id=?)': model.objects.filter(company_id='E4800427').order_by('-report_date'),
+            }
+            for index, query in plans.items():
+                plan = self.query_plan(query)
+                self.assertIn(index, plan)
+                self.assertNotIn('USE TEMP B-TREE', plan, index)
+
+            # 確認狀態的選擇性低，查詢計畫可能改用申報日期索引，但都不需要另外排序
+            plan = self.query_plan(model.objects.filter(manifest_confirmation=True).order_by('-report_date'))
+            self.assertIn('USING INDEX', plan)
+            self.assertNotIn('USE TEMP B-TREE', plan)
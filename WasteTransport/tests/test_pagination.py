@@ -0,0 +1,80 @@
+from datetime import date
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import DisposalManifest, ReuseManifest
+from ..pagination import MergedManifestPaginator, merge_manifest_queries
+from ..queries import ManifestQuery
+from .utils import ManifestTestCase, disposal_manifest, reuse_manifest
+
+
+class MergedListingTestCase(ManifestTestCase):
+    """兩種聯單交錯、同一申報日期有多筆的資料"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(23):
+            disposal_manifest(index, report_date=date(2024, 1, 1 + index % 4))
+        for index in range(17):
+            reuse_manifest(index, report_date=date(2024, 1, 1 + index % 5))
+
+    def expected_order(self, manifest_type=''):
+        """依 (申報日期新到舊, 聯單類型, ID 大到小) 在記憶體中排序的 (類型, ID)"""
+        rows = []
+        if manifest_type in ('', 'disposal'):
+            rows += [(m.report_date, 'disposal', m.id) for m in DisposalManifest.objects.all()]
+        if manifest_type in ('', 'reuse'):
+            rows += [(m.report_date, 'reuse', m.id) for m in ReuseManifest.objects.all()]
+        rows.sort(key=lambda row: (-row[0].toordinal(), row[1], -row[2]))
+        return [(manifest_type, pk) for _, manifest_type, pk in rows]
+
+    def offset_pages(self, per_page, manifest_type=''):
+        query = ManifestQuery({'manifest_type': manifest_type})
+        paginator = MergedManifestPaginator(merge_manifest_queries(query.disposal, query.reuse), per_page)
+        return [[(card.type, card.id) for card in paginator.page(number)] for number in paginator.page_range]
+
+
+class MergedPaginationTests(MergedListingTestCase):
+
+    def test_merged_order_matches_both_tables(self):
+        query = ManifestQuery()
+        merged = list(merge_manifest_queries(query.disposal, query.reuse))
+        self.assertEqual([(row[-3], row[0]) for row in merged], self.expected_order())
+
+    def test_pages_cover_every_manifest_once(self):
+        pages = self.offset_pages(7)
+        self.assertEqual([len(page) for page in pages], [7] * 5 + [5])
+        self.assertEqual(sum(pages, []), self.expected_order())
+
+    def test_type_filter_uses_one_table(self):
+        for manifest_type in ('disposal', 'reuse'):
+            self.assertEqual(sum(self.offset_pages(6, manifest_type), []), self.expected_order(manifest_type))
+
+    def test_only_the_page_rows_are_fetched(self):
+        query = ManifestQuery()
+        paginator = MergedManifestPaginator(merge_manifest_queries(query.disposal, query.reuse), 5, count=40)
+        with CaptureQueriesContext(connection) as queries:
+            page = paginator.page(3)
+        self.assertEqual(len(page), 5)
+        # 已知總數時不做 COUNT，只有一個 UNION ... LIMIT 查詢
+        self.assertEqual(len(queries), 1)
+        self.assertIn('LIMIT', queries[0]['sql'])
+
+    def test_pages_are_cached_by_signature(self):
+        query = ManifestQuery()
+        merged = merge_manifest_queries(query.disposal, query.reuse)
+        MergedManifestPaginator(merged, 5, count=40, signature=query.signature).page(2)
+        with CaptureQueriesContext(connection) as queries:
+            page = MergedManifestPaginator(merged, 5, count=40, signature=query.signature).page(2)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual([(card.type, card.id) for card in page], self.expected_order()[5:10])
+
+    def test_listing_view_pages(self):
+        self.login_importer()
+        response = self.client.get(reverse('waste_transport:manifest_list'), {'page': 2},
+                                   HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        data = response.json()
+        self.assertEqual([(card['type'], card['id']) for card in data['manifests']], self.expected_order()[20:40])
+        self.assertFalse(data['has_next'])
@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+
+from ..importing.pipeline import import_workers, prepared_chunks, row_to_fields
+from ..importing.process import process_csv_import
+from ..models import ReuseManifest
+from .utils import ManifestTestCase, manifest_csv, manifest_rows
+
+
+def prepared_values(chunks):
+    return [[(item.row, item.fields, item.merge_fields, item.error) for item in chunk] for chunk in chunks]
+
+
+class PreparedChunkTests(SimpleTestCase):
+
+    def test_worker_processes_match_single_process(self):
+        rows = manifest_rows('disposal', 23, seed=3)
+        for conflict_resolution in ('skip', 'smart_merge'):
+            expected = prepared_values(prepared_chunks(rows, 'disposal', conflict_resolution, 5))
+            self.assertEqual([len(chunk) for chunk in expected], [5, 5, 5, 5, 3])
+            parallel = prepared_values(prepared_chunks(rows, 'disposal', conflict_resolution, 5, workers=2))
+            self.assertEqual(parallel, expected)
+
+    def test_conversion_errors_are_kept_per_row(self):
+        def convert(row, import_type):
+            if row['廢棄物ID'] == '5':
+                raise ValueError('無法轉換')
+            return row_to_fields(row, import_type)
+
+        with mock.patch('WasteTransport.importing.pipeline.row_to_fields', convert):
+            [first, *_] = prepared_chunks(manifest_rows('disposal', 10), 'disposal', 'skip', 10)
+        self.assertEqual([(index, item.error) for index, item in enumerate(first) if item.error], [(5, '無法轉換')])
+        self.assertIsNone(first[5].fields)
+        self.assertIsNotNone(first[6].fields)
+        self.assertIsNone(first[0].merge_fields)
+
+    def test_import_workers_setting(self):
+        with override_settings(MANIFEST_IMPORT_WORKERS='3'):
+            self.assertEqual(import_workers(), 3)
+        with override_settings(MANIFEST_IMPORT_WORKERS=0):
+            self.assertEqual(import_workers(), 1)
+
+
+@override_settings(MANIFEST_IMPORT_BATCH_SIZE=4)
+class ParallelImportTests(ManifestTestCase):
+
+    def import_file(self, rows, workers):
+        csv_file = SimpleUploadedFile('manifests.csv', manifest_csv('reuse', rows), content_type='text/csv')
+        return process_csv_import(csv_file, 'reuse', 'replace', csv_file.name, progress=lambda *counts: None,
+                                  workers=workers)
+
+    def imported(self):
+        return list(ReuseManifest.objects.order_by('manifest_id', 'waste_id').values_list('row_hash', flat=True))
+
+    def test_parallel_import_matches_single_process(self):
+        rows = manifest_rows('reuse', 18, duplicate_rate=0.2, seed=4)
+        single = self.import_file(rows, 1)
+        expected = self.imported()
+        ReuseManifest.objects.all().delete()
+
+        parallel = self.import_file(rows, 2)
+        self.assertEqual(parallel, single)
+        self.assertEqual(self.imported(), expected)
@@ -0,0 +1,49 @@
+import pickle
+from datetime import date
+from decimal import Decimal
+
+from ..models import DisposalManifest, ReuseManifest
+from ..projections import ManifestCard, manifest_cards, project_manifest_query
+from .utils import ManifestTestCase, disposal_manifest, reuse_manifest
+
+
+class ManifestCardTests(ManifestTestCase):
+
+    def test_projection_reads_card_fields_only(self):
+        disposal = disposal_manifest(1, report_date=date(2024, 1, 5), manifest_confirmation=True)
+        reuse = reuse_manifest(2, substance_code='R-0101', substance_name='廢紙')
+
+        [disposal_card] = manifest_cards(project_manifest_query(DisposalManifest.objects.all(), 'disposal'))
+        [reuse_card] = manifest_cards(project_manifest_query(ReuseManifest.objects.all(), 'reuse'))
+
+        self.assertEqual(disposal_card.as_dict(), {
+            'id': disposal.id,
+            'type': 'disposal',
+            'type_display': '清除單',
+            'manifest_id': disposal.manifest_id,
+            'waste_id': '1',
+            'company_name': '高雄榮民總醫院',
+            'report_date': '2024-01-05',
+            'waste_code': 'D-1801',
+            'waste_name': '事業活動產生之一般性垃圾',
+            'reported_weight': '12.50',
+            'manifest_confirmation': True,
+        })
+        # 再利用單的代碼與名稱取自物質欄位
+        self.assertEqual((reuse_card.id, reuse_card.waste_code, reuse_card.waste_name), (reuse.id, 'R-0101', '廢紙'))
+        self.assertEqual(reuse_card.type_display, '再利用單')
+
+        # 不取出與卡片無關的欄位
+        sql = str(project_manifest_query(DisposalManifest.objects.all(), 'disposal').query)
+        self.assertNotIn('company_id', sql)
+
+    def test_cards_have_no_instance_dict(self):
+        card = ManifestCard(1, 'E480042700000001', '1', '臺大醫院', date(2024, 1, 1), Decimal('1.00'), False,
+                            'reuse', 'R-0201', '廢塑膠')
+        self.assertFalse(hasattr(card, '__dict__'))
+
+    def test_pickle_round_trip(self):
+        card = ManifestCard(1, 'E480042700000001', '1', '臺大醫院', date(2024, 1, 1), Decimal('1.00'), False,
+                            'reuse', 'R-0201', '廢塑膠')
+        restored = pickle.loads(pickle.dumps(card))
+        self.assertEqual(restored.as_dict(), card.as_dict())
@@ -0,0 +1,65 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..forms import ManifestFilterForm
+from ..queries import ManifestQuery
+from .utils import ManifestTestCase, disposal_manifest, reuse_manifest
+
+
+class ManifestQueryTests(ManifestTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.disposal = [
+            disposal_manifest(1, company_name='高雄榮民總醫院', report_date=date(2024, 1, 10), manifest_confirmation=True),
+            disposal_manifest(2, company_name='臺北榮民總醫院', waste_code='D-0299', report_date=date(2024, 2, 10),
+                              reported_weight=Decimal('80.00')),
+        ]
+        cls.reuse = [
+            reuse_manifest(1, company_name='高雄長庚醫院', substance_code='R-0101', substance_name='廢紙',
+                           report_date=date(2024, 1, 20)),
+            reuse_manifest(2, company_name='臺大醫院', report_date=date(2024, 3, 1), manifest_confirmation=True),
+        ]
+
+    def ids(self, query):
+        return (sorted(query.disposal.values_list('waste_id', flat=True)),
+                sorted(query.reuse.values_list('waste_id', flat=True)))
+
+    def test_filters_map_to_each_model(self):
+        self.assertEqual(self.ids(ManifestQuery({'waste_code': 'r-01'})), ([], ['1']))
+        self.assertEqual(self.ids(ManifestQuery({'waste_code': 'D-02'})), (['2'], []))
+        self.assertEqual(self.ids(ManifestQuery({'waste_name': '廢紙'})), ([], ['1']))
+        self.assertEqual(self.ids(ManifestQuery({'report_date_from': date(2024, 1, 15),
+                                                 'report_date_to': date(2024, 2, 28)})), (['2'], ['1']))
+        self.assertEqual(self.ids(ManifestQuery({'reported_weight_above': Decimal('50')})), (['2'], []))
+        self.assertEqual(self.ids(ManifestQuery({'confirmation_status': 'confirmed'})), (['1'], ['2']))
+
+    def test_contains_matches_icontains(self):
+        for term in ('高雄', '榮民總醫院', '臺', '不存在的醫院'):
+            query = ManifestQuery({'company_name': term})
+            self.assertEqual(
+                self.ids(query),
+                (sorted(m.waste_id for m in self.disposal if term in m.company_name),
+                 sorted(m.waste_id for m in self.reuse if term in m.company_name)),
+                term,
+            )
+
+    def test_excluded_type_sends_no_query(self):
+        query = ManifestQuery({'manifest_type': 'disposal'})
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(list(query.reuse), [])
+        self.assertEqual(len(queries), 0)
+        self.assertEqual([manifest_type for manifest_type, _ in query.querysets()], ['disposal'])
+
+    def test_signature_ignores_empty_values(self):
+        self.assertEqual(ManifestQuery({'company_name': '', 'manifest_type': None}).signature, ManifestQuery().signature)
+        self.assertNotEqual(ManifestQuery({'company_name': '高雄'}).signature, ManifestQuery().signature)
+
+    def test_invalid_form_applies_no_filters(self):
+        form = ManifestFilterForm({'report_date_from': 'not-a-date', 'company_name': '高雄'})
+        query = ManifestQuery.from_form(form)
+        self.assertEqual(query.data, {})
+        self.assertEqual(self.ids(query), (['1', '2'], ['1', '2']))
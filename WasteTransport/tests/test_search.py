@@ -0,0 +1,61 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase, override_settings
+
+from ..models import DisposalManifest, ReuseManifest
+from ..search import filter_contains, reset_search_index_cache, search_index_available, search_table
+from .utils import TEST_CACHES, disposal_manifest, reuse_manifest
+
+# 0003 建立檢索表之前的遷移
+BEFORE_SEARCH_INDEX = ('WasteTransport', '0002_manifest_indexes_and_unique')
+
+
+@skipUnless(connection.vendor == 'sqlite', "全文檢索索引僅在 SQLite 建立")
+@override_settings(CACHES=TEST_CACHES)
+class SearchIndexTests(TransactionTestCase):
+
+    def setUp(self):
+        reset_search_index_cache()
+        self.addCleanup(reset_search_index_cache)
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+
+    def test_index_follows_rows_after_migrating_to_latest(self):
+        # 重跑 0003 之後的所有遷移，0006 重建資料表時不得遺失同步觸發器
+        self.migrate([BEFORE_SEARCH_INDEX])
+        latest = MigrationExecutor(connection).loader.graph.leaf_nodes('WasteTransport')
+        self.migrate(latest)
+        reset_search_index_cache()
+
+        self.assertTrue(search_index_available(DisposalManifest))
+        self.assertTrue(search_index_available(ReuseManifest))
+
+        disposal = disposal_manifest(1, company_name='高雄榮民總醫院')
+        reuse = reuse_manifest(2, substance_name='廢塑膠容器')
+        self.assertEqual(list(filter_contains(DisposalManifest.objects.all(), 'company_name', '榮民總')), [disposal])
+        self.assertEqual(list(filter_contains(ReuseManifest.objects.all(), 'substance_name', '塑膠容')), [reuse])
+
+        disposal.company_name = '臺大醫院'
+        disposal.save()
+        self.assertFalse(filter_contains(DisposalManifest.objects.all(), 'company_name', '榮民總').exists())
+        self.assertTrue(filter_contains(DisposalManifest.objects.all(), 'company_name', '臺大醫').exists())
+
+    def test_missing_trigger_falls_back_to_like(self):
+        trigger = connection.ops.quote_name(f'{search_table(DisposalManifest)}_ai')
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TRIGGER {trigger}')
+        self.addCleanup(self.restore_search_index)
+
+        self.assertFalse(search_index_available(DisposalManifest))
+        manifest = disposal_manifest(1, company_name='高雄榮民總醫院')
+        # 檢索表未收到新增的聯單，仍須以 LIKE 找到
+        self.assertEqual(list(filter_contains(DisposalManifest.objects.all(), 'company_name', '榮民總')), [manifest])
+
+    def restore_search_index(self):
+        self.migrate([BEFORE_SEARCH_INDEX])
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes('WasteTransport'))
@@ -0,0 +1,84 @@
+import hashlib
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from ..importing.process import process_csv_import
+from ..importing.stream import chunked, file_digest, iter_csv_rows, iter_text_lines
+from ..models import DisposalManifest
+from .utils import ManifestTestCase, manifest_csv, manifest_rows
+
+
+class ChunkedFile(SimpleUploadedFile):
+    """以固定大小分塊讀取的上傳檔案，模擬大型檔案的 chunks()"""
+
+    def __init__(self, name, content, size):
+        super().__init__(name, content, content_type='text/csv')
+        self.read_size = size
+        self.chunks_read = 0
+
+    def chunks(self, chunk_size=None):
+        for chunk in super().chunks(self.read_size):
+            self.chunks_read += 1
+            yield chunk
+
+
+class TextStreamTests(SimpleTestCase):
+
+    def test_multibyte_characters_split_between_chunks(self):
+        data = '聯單編號,事業機構名稱\r\nE480042700000001,高雄榮民總醫院\r\n'.encode('utf-8-sig')
+        for size in (1, 2, 5, 7):
+            chunks = [data[i:i + size] for i in range(0, len(data), size)]
+            self.assertEqual(''.join(iter_text_lines(chunks)), data.decode('utf-8-sig'), size)
+
+    def test_rows_are_read_lazily_from_chunks(self):
+        rows = manifest_rows('disposal', 20)
+        csv_file = ChunkedFile('manifests.csv', manifest_csv('disposal', rows), 64)
+        reader = iter_csv_rows(csv_file)
+        self.assertEqual(next(reader)['聯單編號'], rows[0]['聯單編號'])
+        # 讀取第一列只需要檔案開頭的幾個區塊；BOM 不會出現在第一個欄位名稱
+        self.assertLess(csv_file.chunks_read, 20)
+        self.assertEqual(reader.fieldnames[0], '聯單編號')
+
+        # 可重複呼叫，每次都從頭讀取
+        self.assertEqual([row['廢棄物ID'] for row in iter_csv_rows(csv_file)], [row['廢棄物ID'] for row in rows])
+
+    def test_quoted_field_with_newline(self):
+        data = '聯單編號,起運地\n"E480042700000001","高雄市\n前鎮區"\n'.encode('utf-8')
+        rows = list(iter_csv_rows(ChunkedFile('manifests.csv', data, 8)))
+        self.assertEqual(rows, [{'聯單編號': 'E480042700000001', '起運地': '高雄市\n前鎮區'}])
+
+    def test_chunked(self):
+        self.assertEqual(list(chunked(range(7), 3)), [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(list(chunked([], 3)), [])
+
+    def test_file_digest(self):
+        data = manifest_csv('reuse', manifest_rows('reuse', 5))
+        self.assertEqual(file_digest(ChunkedFile('manifests.csv', data, 10)), hashlib.sha256(data).hexdigest())
+
+
+@override_settings(MANIFEST_IMPORT_BATCH_SIZE=4)
+class StreamingImportTests(ManifestTestCase):
+
+    def test_progress_is_reported_per_chunk(self):
+        rows = manifest_rows('disposal', 10)
+        csv_file = ChunkedFile('manifests.csv', manifest_csv('disposal', rows), 128)
+        progress = []
+        result = process_csv_import(csv_file, 'disposal', 'skip', csv_file.name,
+                                    progress=lambda *counts: progress.append(counts))
+        self.assertEqual(result['imported'], 10)
+        self.assertEqual(progress, [(4, 4, 0), (8, 8, 0), (10, 10, 0)])
+        self.assertEqual(DisposalManifest.objects.count(), 10)
+
+    @override_settings(MANIFEST_IMPORT_MAX_UPLOAD_SIZE=100)
+    def test_upload_size_limit(self):
+        self.login_importer()
+        response = self.client.post(reverse('waste_transport:import_csv'), {
+            'csv_file': SimpleUploadedFile('manifests.csv', manifest_csv('disposal', manifest_rows('disposal', 2))),
+            'import_type': 'disposal',
+            'conflict_resolution': 'skip',
+        }).json()
+        self.assertFalse(response['success'])
+        self.assertIn('csv_file', response['errors'])
+        self.assertFalse(DisposalManifest.objects.exists())
@@ -0,0 +1,93 @@
+import random
+from datetime import date, datetime, time
+
+from django.test import SimpleTestCase
+
+from ..importing import temporal
+from ..management.commands.benchmark_import_parsing import (
+    strptime_format_datetime_entry, strptime_parse_date, strptime_parse_time,
+)
+
+
+# 改寫前的 parse_datetime
+def strptime_parse_datetime(datetime_str):
+    if not datetime_str or datetime_str.strip() == '':
+        return None
+    for fmt in ['%Y/%m/%d %H:%M:%S', '%Y-%m-%d %H:%M:%S', '%Y/%m/%d %H:%M', '%Y-%m-%d %H:%M']:
+        try:
+            return datetime.strptime(datetime_str, fmt)
+        except (ValueError, TypeError):
+            continue
+    return None
+
+
+PARSERS = (
+    (temporal.parse_date, strptime_parse_date),
+    (temporal.parse_time, strptime_parse_time),
+    (temporal.parse_datetime, strptime_parse_datetime),
+    (temporal.format_datetime_entry, strptime_format_datetime_entry),
+)
+
+# 容易出錯的寫法：不存在的日期、12 點、邊界值、少位數、空白與混用的分隔符號
+EDGE_CASES = [
+    '', ' ', '2024/01/05', '2024-01-05', '2024/1/5', '2024/01/ 5', '2024/02/29', '2023/02/29', '2024/02/30',
+    '2024/13/01', '2024/00/10', '2024-01/05', '2024/01/05 ', ' 2024/01/05', '24/01/05', '20240105',
+    '2024/01/05 00:00:00', '2024/01/05 23:59:59', '2024/01/05 24:00:00', '2024/01/05 12:60:00',
+    '2024/01/05 12:30:60', '2024/01/05 12:30:61', '2024/01/05 7:5:3', '2024/01/05  08:00:00', '2024/01/05 08:00',
+    '2024/01/05 上午 12:30:00', '2024/01/05 下午 12:30:00', '2024/01/05 下午 01:05:09', '2024/01/05 上午 00:30:00',
+    '2024/01/05 下午 13:00:00', '2024/01/05 下午 1:2:3', '2024/01/05上午 09:00:00', '下午 2024/01/05 03:00:00',
+    '2024/01/05 上午下午 03:00:00', '2024/02/30 下午 03:00:00',
+    '00:00', '23:59', '24:00', '9:05', '09:05:07', '9:5:7', '12:60', '12:30:60', '12:30:61', ':30', '12:', 'abc',
+    '１２:３０', '2024/０1/05',
+]
+
+
+def fuzzed_values(count, seed=0):
+    """由日期時間的片段隨機組合的字串，包含合法與不合法的寫法"""
+    rng = random.Random(seed)
+    years = ['2024', '1999', '24', '02024']
+    numbers = ['0', '00', '1', '01', '9', '09', '12', '13', '23', '24', '29', '30', '31', '32', '59', '60', '61', ' 5', '']
+    markers = ['', '上午 ', '下午 ']
+    values = []
+    for _ in range(count):
+        separator = rng.choice('/-')
+        value = f'{rng.choice(years)}{separator}{rng.choice(numbers)}{rng.choice([separator, "/", "-"])}{rng.choice(numbers)}'
+        if rng.random() < 0.7:
+            clock = ':'.join(rng.choice(numbers) for _ in range(rng.choice((2, 3))))
+            value = f'{value}{rng.choice([" ", "  ", "T"])}{rng.choice(markers)}{clock}'
+            if rng.random() < 0.2:
+                value = clock
+        values.append(value)
+    return values
+
+
+class TemporalParityTests(SimpleTestCase):
+
+    def setUp(self):
+        temporal.clear_temporal_caches()
+
+    def assert_same_as_strptime(self, values):
+        for parse, reference in PARSERS:
+            for value in values:
+                self.assertEqual(parse(value), reference(value), f'{parse.__name__}({value!r})')
+
+    def test_edge_cases_match_strptime(self):
+        self.assert_same_as_strptime(EDGE_CASES)
+
+    def test_fuzzed_values_match_strptime(self):
+        self.assert_same_as_strptime(fuzzed_values(20000))
+
+    def test_export_entries(self):
+        self.assertEqual(temporal.format_datetime_entry('2024/01/05 下午 03:20:00'), ('2024/01/05', '15:20:00'))
+        self.assertEqual(temporal.format_datetime_entry('2024/01/05 上午 12:10:00'), ('2024/01/05', '00:10:00'))
+        self.assertEqual(temporal.format_datetime_entry('2024/01/05 下午 12:10:00'), ('2024/01/05', '12:10:00'))
+        # 無法解析時回傳去除上午/下午後的字串，與原本的實作相同
+        self.assertEqual(temporal.format_datetime_entry('2024/02/30 下午 03:20:00'), ('2024/02/30  03:20:00', ''))
+        self.assertEqual(temporal.parse_date('2024/01/05'), date(2024, 1, 5))
+        self.assertEqual(temporal.parse_time('15:20'), time(15, 20))
+
+    def test_results_are_memoized(self):
+        temporal.parse_date('2024/01/05')
+        temporal.parse_date('2024/01/05')
+        info = temporal.parse_date.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
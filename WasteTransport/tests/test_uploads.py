@@ -0,0 +1,121 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import DisposalManifest, ImportJob
+from .utils import ManifestTestCase, manifest_csv, manifest_rows
+
+CHUNK_SIZE = 512
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+@override_settings(MANIFEST_IMPORT_UPLOAD_CHUNK_SIZE=CHUNK_SIZE, MANIFEST_IMPORT_ASYNC_THRESHOLD=None)
+class ChunkedUploadTests(ManifestTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.login_importer()
+        self.data = manifest_csv('disposal', manifest_rows('disposal', 6))
+        self.chunks = [self.data[i:i + CHUNK_SIZE] for i in range(0, len(self.data), CHUNK_SIZE)]
+        self.token = self.start()['upload']['token']
+
+    def start(self, **fields):
+        return self.client.post(reverse('waste_transport:start_chunked_upload'), {
+            'filename': 'manifests.csv',
+            'file_size': len(self.data),
+            'import_type': 'disposal',
+            'conflict_resolution': 'skip',
+            **fields,
+        }).json()
+
+    def put(self, index, data, checksum=None):
+        return self.client.put(
+            reverse('waste_transport:upload_chunk', args=[self.token, index]), data,
+            content_type='application/octet-stream', HTTP_X_CHUNK_CHECKSUM=checksum or sha256(data),
+        )
+
+    def status(self):
+        return self.client.get(reverse('waste_transport:chunked_upload_status', args=[self.token]))
+
+    def finish(self, **data):
+        return self.client.post(reverse('waste_transport:finish_chunked_upload', args=[self.token]),
+                                json.dumps(data), content_type='application/json')
+
+    def test_upload_and_import(self):
+        self.assertGreater(len(self.chunks), 2)
+        for index, chunk in enumerate(self.chunks):
+            response = self.put(index, chunk)
+            self.assertEqual(response.json()['next_chunk'], index + 1)
+
+        result = self.finish(checksum=sha256(self.data)).json()
+        self.assertTrue(result['success'])
+        self.assertEqual(result['imported'], 6)
+        self.assertEqual(DisposalManifest.objects.count(), 6)
+
+        job = ImportJob.objects.get(token=self.token)
+        self.assertEqual((job.status, job.file_size, job.content_digest), (ImportJob.STATUS_DONE, len(self.data), sha256(self.data)))
+        # 完成後不能再上傳或重複完成
+        self.assertEqual(self.put(len(self.chunks), b'more').status_code, 404)
+        self.assertEqual(self.finish().status_code, 404)
+
+    def test_checksum_mismatch_is_rejected(self):
+        response = self.put(0, self.chunks[0], checksum=sha256(b'other'))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['next_chunk'], 0)
+
+        upload = self.status().json()['upload']
+        self.assertEqual((upload['next_chunk'], upload['bytes_received']), (0, 0))
+        job = ImportJob.objects.get(token=self.token)
+        self.assertEqual(job.file.size, 0)
+
+    def test_out_of_order_chunk_is_rejected(self):
+        self.put(0, self.chunks[0])
+        response = self.put(2, self.chunks[2])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['next_chunk'], 1)
+
+    def test_resume_after_interruption(self):
+        self.put(0, self.chunks[0])
+        # 重複送出已接收的區塊不會重複寫入
+        self.assertEqual(self.put(0, self.chunks[0]).json()['next_chunk'], 1)
+
+        upload = self.status().json()['upload']
+        self.assertEqual((upload['next_chunk'], upload['bytes_received']), (1, len(self.chunks[0])))
+        for index in range(upload['next_chunk'], len(self.chunks)):
+            self.put(index, self.chunks[index])
+
+        job = ImportJob.objects.get(token=self.token)
+        with job.file.open('rb') as staged:
+            self.assertEqual(staged.read(), self.data)
+        self.assertEqual(self.finish(checksum=sha256(self.data)).json()['imported'], 6)
+
+    def test_oversized_chunk_is_rejected(self):
+        response = self.put(0, self.data)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.status().json()['upload']['bytes_received'], 0)
+
+    def test_expired_upload(self):
+        self.put(0, self.chunks[0])
+        ImportJob.objects.filter(token=self.token).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.status().status_code, 404)
+        self.assertEqual(self.put(1, self.chunks[1]).status_code, 404)
+        self.assertEqual(self.finish().status_code, 404)
+
+    def test_file_checksum_mismatch(self):
+        for index, chunk in enumerate(self.chunks):
+            self.put(index, chunk)
+        result = self.finish(checksum=sha256(b'other')).json()
+        self.assertFalse(result['success'])
+        self.assertFalse(DisposalManifest.objects.exists())
+        self.assertEqual(self.status().status_code, 200)
+
+    @override_settings(MANIFEST_IMPORT_MAX_UPLOAD_SIZE=100)
+    def test_declared_size_over_limit(self):
+        self.assertIn('file_size', self.start()['errors'])
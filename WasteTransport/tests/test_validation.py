@@ -0,0 +1,87 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from ..importing.validation import MANIFEST_ID_RE, MAX_ERROR_SAMPLES, validate_rows
+from ..models import DisposalManifest
+from .utils import ManifestTestCase, manifest_csv, manifest_rows
+
+
+class ManifestIdFormatTests(SimpleTestCase):
+
+    def test_accepts_sixteen_and_seventeen_characters(self):
+        for manifest_id in ('E480042710700819', 'A010023500000001', 'E4800427107008190', 'A0100235000000001'):
+            self.assertTrue(MANIFEST_ID_RE.fullmatch(manifest_id), manifest_id)
+
+    def test_rejects_other_formats(self):
+        for manifest_id in ('A123', 'E48004271070081', 'E48004271070081900', 'e480042710700819',
+                            '4800427107008190', 'E48004271070081X', 'E４80042710700819'):
+            self.assertFalse(MANIFEST_ID_RE.fullmatch(manifest_id), manifest_id)
+
+
+class ValidateRowsTests(SimpleTestCase):
+
+    def test_generated_rows_are_valid(self):
+        for import_type in ('disposal', 'reuse'):
+            report = validate_rows(manifest_rows(import_type, 20), import_type)
+            self.assertEqual((report['total'], report['valid'], report['invalid']), (20, 20, 0))
+            self.assertEqual(report['columns'], {})
+
+    def test_reports_errors_per_column_with_line_numbers(self):
+        rows = manifest_rows('disposal', 4)
+        rows[1]['聯單編號'] = 'A123'
+        rows[2]['申報日期'] = '2024/13/45 上午 10:00:00'
+        rows[2]['申報重量'] = '十公斤'
+        rows[3]['廢棄物代碼'] = ''
+
+        report = validate_rows(rows, 'disposal')
+        self.assertEqual((report['total'], report['valid'], report['invalid']), (4, 1, 3))
+        self.assertEqual(report['columns']['聯單編號']['samples'][0]['line'], 3)
+        self.assertEqual(report['columns']['聯單編號']['samples'][0]['value'], 'A123')
+        # 日期欄位顯示檔案中的原始值
+        self.assertEqual(report['columns']['申報日期']['samples'][0]['value'], '2024/13/45 上午 10:00:00')
+        self.assertEqual(report['columns']['申報重量']['count'], 1)
+        self.assertEqual(report['columns']['廢棄物代碼']['samples'][0]['message'], '必填欄位未填寫')
+
+    def test_samples_are_limited(self):
+        rows = manifest_rows('reuse', MAX_ERROR_SAMPLES + 3)
+        for row in rows:
+            row['物質代碼'] = ''
+
+        summary = validate_rows(rows, 'reuse')['columns']['物質代碼']
+        self.assertEqual(summary['count'], MAX_ERROR_SAMPLES + 3)
+        self.assertEqual(len(summary['samples']), MAX_ERROR_SAMPLES)
+
+
+class DryRunImportTests(ManifestTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.login_importer()
+
+    def dry_run(self, rows):
+        return self.client.post(reverse('waste_transport:import_csv'), {
+            'csv_file': SimpleUploadedFile('manifests.csv', manifest_csv('disposal', rows), content_type='text/csv'),
+            'import_type': 'disposal',
+            'conflict_resolution': 'skip',
+            'dry_run': True,
+        }).json()
+
+    def test_dry_run_reports_without_importing(self):
+        rows = manifest_rows('disposal', 3)
+        rows[0]['聯單編號'] = 'A123'
+
+        response = self.dry_run(rows)
+        self.assertTrue(response['dry_run'])
+        self.assertEqual((response['total'], response['invalid']), (3, 1))
+        self.assertEqual(response['columns']['聯單編號']['samples'][0]['line'], 2)
+        self.assertFalse(DisposalManifest.objects.exists())
+
+    def test_seventeen_character_manifest_ids_pass(self):
+        rows = manifest_rows('disposal', 2)
+        rows[0]['聯單編號'] = 'E4800427107008190'
+        rows[1]['聯單編號'] = 'E480042710700819'
+
+        response = self.dry_run(rows)
+        self.assertEqual((response['total'], response['invalid']), (2, 0))
+        self.assertEqual(response['columns'], {})
@@ -0,0 +1,111 @@
+import io
+from datetime import datetime
+from unittest import mock, skipUnless
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from ..benchmarks.generator import ManifestRowGenerator
+from ..forms import CSVImportForm
+from ..importing.stream import iter_import_rows
+from ..importing.xlsx import cell_text, xlsx_supported
+from ..models import DisposalManifest
+from .utils import ManifestTestCase, manifest_csv, manifest_rows
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def excel_value(column, value):
+    """以 Excel 儲存格的型別寫入：日期時間為 datetime，廢棄物ID 為數字"""
+    for marker, offset in (('上午 ', 0), ('下午 ', 12)):
+        if marker in value:
+            dt = datetime.strptime(value.replace(marker, ''), '%Y/%m/%d %I:%M:%S')
+            return dt.replace(hour=dt.hour % 12 + offset)
+    if column == '廢棄物ID':
+        return float(value)
+    return value or None
+
+
+def manifest_xlsx(import_type, rows):
+    """與匯出檔案欄位相同的 Excel 活頁簿，前面另有一個說明工作表，資料間夾有空白列"""
+    columns = ManifestRowGenerator(import_type).columns
+    workbook = openpyxl.Workbook()
+    workbook.active.append(['匯出說明'])
+    sheet = workbook.create_sheet('聯單')
+    sheet.append(columns + ['備註'])
+    for index, row in enumerate(rows):
+        sheet.append([excel_value(column, row.get(column, '')) for column in columns] + ['不匯入的欄位'])
+        if index == 1:
+            sheet.append([None] * len(columns))
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+class CellTextTests(SimpleTestCase):
+
+    def test_cells_are_read_as_export_text(self):
+        self.assertEqual(cell_text(None), '')
+        self.assertEqual(cell_text(True), 'Y')
+        self.assertEqual(cell_text(877.0), '877')
+        self.assertEqual(cell_text(12.5), '12.5')
+        self.assertEqual(cell_text(datetime(2024, 1, 5, 15, 20)), '2024/01/05 15:20:00')
+        self.assertEqual(cell_text(datetime(2024, 1, 5).date()), '2024/01/05')
+
+    def test_xlsx_rejected_without_openpyxl(self):
+        with mock.patch('WasteTransport.forms.xlsx_supported', return_value=False):
+            form = CSVImportForm({'import_type': 'disposal', 'conflict_resolution': 'skip'}, {
+                'csv_file': SimpleUploadedFile('manifests.xlsx', b'PK', content_type=XLSX_CONTENT_TYPE),
+            })
+            self.assertIn('csv_file', form.errors)
+
+
+@skipUnless(xlsx_supported(), "需要安裝 openpyxl")
+@override_settings(MANIFEST_IMPORT_ASYNC_THRESHOLD=None)
+class XlsxImportTests(ManifestTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.login_importer()
+        self.rows = manifest_rows('disposal', 5, seed=6)
+
+    def upload(self, filename, data):
+        return self.client.post(reverse('waste_transport:import_csv'), {
+            'csv_file': SimpleUploadedFile(filename, data, content_type=XLSX_CONTENT_TYPE),
+            'import_type': 'disposal',
+            'conflict_resolution': 'replace',
+            'force': True,
+        }).json()
+
+    def imported(self):
+        return list(DisposalManifest.objects.order_by('manifest_id', 'waste_id').values_list('row_hash', flat=True))
+
+    def test_rows_match_the_csv_export(self):
+        xlsx_rows = list(iter_import_rows(SimpleUploadedFile('manifests.xlsx', manifest_xlsx('disposal', self.rows)),
+                                          'manifests.xlsx'))
+        self.assertEqual(len(xlsx_rows), 5)
+        self.assertNotIn('備註', xlsx_rows[0])
+        self.assertEqual(xlsx_rows[0]['廢棄物ID'], self.rows[0]['廢棄物ID'])
+
+    def test_import_matches_csv_import(self):
+        result = self.upload('manifests.xlsx', manifest_xlsx('disposal', self.rows))
+        self.assertEqual((result['imported'], result['total']), (5, 5))
+        from_xlsx = self.imported()
+
+        DisposalManifest.objects.all().delete()
+        self.upload('manifests.csv', manifest_csv('disposal', self.rows))
+        self.assertEqual(self.imported(), from_xlsx)
+
+    def test_workbook_without_manifest_sheet(self):
+        workbook = openpyxl.Workbook()
+        workbook.active.append(['其他資料'])
+        output = io.BytesIO()
+        workbook.save(output)
+        result = self.upload('other.xlsx', output.getvalue())
+        self.assertEqual(result['total'], 0)
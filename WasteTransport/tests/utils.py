@@ -0,0 +1,109 @@
+import csv
+import io
+import shutil
+import tempfile
+from datetime import date, time
+from decimal import Decimal
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ..benchmarks.generator import ManifestRowGenerator
+from ..importing.stream import CSV_ENCODING
+from ..models import DisposalManifest, ReuseManifest
+
+# 測試使用記憶體快取，不寫入專案目錄下的 cache 資料夾
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def disposal_manifest(index=0, save=True, **fields):
+    """建立一筆清除單，未指定的必填欄位依 index 產生"""
+    values = {
+        'manifest_id': f'E4800427{index:09d}',
+        'company_id': 'E4800427',
+        'company_name': '高雄榮民總醫院',
+        'report_date': date(2024, 1, 1 + index % 28),
+        'report_time': time(10, index % 60),
+        'waste_code': 'D-1801',
+        'waste_name': '事業活動產生之一般性垃圾',
+        'waste_id': str(index),
+        'reported_weight': Decimal('12.50'),
+        'process_code': 'P01',
+        'process_name': '醫療服務',
+        'carrier_id': 'K0000123',
+        'carrier_name': '南區清運有限公司',
+        'processor_id': 'T0000789',
+        'processor_name': '南部焚化廠',
+    }
+    values.update(fields)
+    manifest = DisposalManifest(**values)
+    if save:
+        manifest.save()
+    return manifest
+
+
+def reuse_manifest(index=0, save=True, **fields):
+    """建立一筆再利用單，未指定的必填欄位依 index 產生"""
+    values = {
+        'manifest_id': f'A0100235{index:09d}',
+        'company_id': 'A0100235',
+        'company_name': '臺大醫院',
+        'report_date': date(2024, 1, 1 + index % 28),
+        'report_time': time(10, index % 60),
+        'waste_code': 'R-0201',
+        'waste_name': '廢塑膠',
+        'waste_id': str(index),
+        'reported_weight': Decimal('3.25'),
+        'process_code': 'P01',
+        'process_name': '醫療服務',
+        'substance_code': 'R-0201',
+        'substance_name': '廢塑膠',
+    }
+    values.update(fields)
+    manifest = ReuseManifest(**values)
+    if save:
+        manifest.save()
+    return manifest
+
+
+def manifest_rows(import_type, count, duplicate_rate=0.0, seed=0):
+    """與環境部匯出檔案格式相同的資料列"""
+    return list(ManifestRowGenerator(import_type, duplicate_rate, seed).rows(count))
+
+
+def manifest_csv(import_type, rows):
+    """將資料列寫成與匯出檔案相同的 CSV 內容（含 BOM）"""
+    columns = ManifestRowGenerator(import_type).columns
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=columns, restval='')
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue().encode(CSV_ENCODING)
+
+
+class ManifestTestCase(TestCase):
+    """使用記憶體快取與暫存 MEDIA_ROOT 的測試，匯入暫存檔不會留在專案目錄"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.isolated_settings = override_settings(CACHES=TEST_CACHES, MEDIA_ROOT=cls.media_root)
+        cls.isolated_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.isolated_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def login_importer(self):
+        """以具有匯入權限的使用者登入"""
+        user = User.objects.create_user('importer', password='importer-password')
+        user.groups.add(Group.objects.get_or_create(name='importer')[0])
+        self.client.force_login(user)
+        return user
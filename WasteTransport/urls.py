@@ -15,6 +15,15 @@ urlpatterns = [
     path('import/', views.import_csv, name='import_csv'),
     path('export/', views.export_manifests_csv, name='export_csv'),
     
+    # 分段上傳：建立上傳、查詢進度、依序上傳區塊、完成後匯入 - AJAX
+    path('import/uploads/', views.start_chunked_upload, name='start_chunked_upload'),
+    path('import/uploads/<str:token>/', views.chunked_upload_status, name='chunked_upload_status'),
+    path('import/uploads/<str:token>/chunks/<int:index>/', views.upload_chunk, name='upload_chunk'),
+    path('import/uploads/<str:token>/finish/', views.finish_chunked_upload, name='finish_chunked_upload'),
+    
+    # 背景匯入工作進度 - AJAX
+    path('import/jobs/<int:job_id>/', views.import_job_status, name='import_job_status'),
+    
     # 衝突解決處理 - AJAX
     path('resolve_conflicts/', views.handle_conflict_resolution, name='resolve_conflicts'),
 ]
\ No newline at end of file
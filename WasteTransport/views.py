@@ -1,189 +1,166 @@
 import csv
-import io
 import json
-import time
 import logging
 from datetime import datetime
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.db import transaction
-from django.http import JsonResponse, HttpResponse
-from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse, HttpResponse
 from django.db.models import Q
 from django.template.loader import render_to_string
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
 from MedicalWasteManagementSystem.permissions import permission_required
-from .models import DisposalManifest, ReuseManifest, ImportHistory
-from .forms import ManifestFilterForm, CSVImportForm
+from .models import DisposalManifest, ReuseManifest, ImportHistory, ImportJob
+from .caching import cached_listing
+from .conditional import manifest_detail_etag, manifest_detail_last_modified, manifest_list_etag, manifest_version
+from .facets import cached_manifest_facets
+from .fragments import render_detail_fragment
+from .forms import ManifestFilterForm, CSVImportForm, ChunkedUploadForm
+from .importing.conflicts import scan_conflicts
+from .importing.dedupe import DuplicateCollapser
+from .importing.history import find_active_job, find_previous_import, previous_import_result
+from .importing.jobs import claim_staged_import, enqueue_import, run_import_job, runs_in_background, stage_import
+from .importing.process import process_csv_import
+from .importing.stream import file_digest, iter_import_rows
+from .importing.uploads import (
+    ChunkRejected, append_chunk, discard_upload, find_upload, finish_upload, start_upload, upload_state,
+)
+from .importing.validation import validate_rows
+from .pagination import (
+    InvalidCursor, MergedManifestPaginator, encode_cursor, keyset_page, merge_manifest_queries
+)
+from .queries import ManifestQuery
 
 # 設定日誌
 logger = logging.getLogger(__name__)
 
 # 聯單清單頁面 - 主視圖
+# AJAX 請求以聯單資料世代產生 ETag，資料未變更時回傳 304
 @permission_required('importer')
+@vary_on_headers('X-Requested-With')
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=manifest_list_etag)
 def manifest_list(request):
     form = ManifestFilterForm(request.GET)
     
-    # 初始化查詢集
-    disposal_query = DisposalManifest.objects.all()
-    reuse_query = ReuseManifest.objects.all()
+    # 將篩選條件編譯為各聯單類型的查詢，被聯單類型排除的模型為空查詢集
+    manifest_query = ManifestQuery.from_form(form)
+    disposal_query, reuse_query = manifest_query.disposal, manifest_query.reuse
     
-    # 套用篩選條件
-    if form.is_valid():
-        data = form.cleaned_data
-        
-        # 根據聯單類型篩選
-        manifest_type = data.get('manifest_type')
-        if manifest_type == 'disposal':
-            reuse_query = ReuseManifest.objects.none()
-        elif manifest_type == 'reuse':
-            disposal_query = DisposalManifest.objects.none()
-            
-        # 聯單編號篩選
-        manifest_id = data.get('manifest_id')
-        if manifest_id:
-            disposal_query = disposal_query.filter(manifest_id__icontains=manifest_id)
-            reuse_query = reuse_query.filter(manifest_id__icontains=manifest_id)
-            
-        # 事業機構名稱篩選
-        company_name = data.get('company_name')
-        if company_name:
-            disposal_query = disposal_query.filter(company_name__icontains=company_name)
-            reuse_query = reuse_query.filter(company_name__icontains=company_name)
-            
-        # 廢棄物代碼篩選
-        waste_code = data.get('waste_code')
-        if waste_code:
-            disposal_query = disposal_query.filter(waste_code__icontains=waste_code)
-            reuse_query = reuse_query.filter(substance_code__icontains=waste_code)
-            
-        # 廢棄物名稱篩選 - 新增
-        waste_name = data.get('waste_name')
-        if waste_name:
-            disposal_query = disposal_query.filter(waste_name__icontains=waste_name)
-            reuse_query = reuse_query.filter(substance_name__icontains=waste_name)
-            
-        # 申報日期篩選
-        report_date_from = data.get('report_date_from')
-        if report_date_from:
-            disposal_query = disposal_query.filter(report_date__gte=report_date_from)
-            reuse_query = reuse_query.filter(report_date__gte=report_date_from)
-            
-        report_date_to = data.get('report_date_to')
-        if report_date_to:
-            disposal_query = disposal_query.filter(report_date__lte=report_date_to)
-            reuse_query = reuse_query.filter(report_date__lte=report_date_to)
-            
-        # 申報重量篩選
-        reported_weight_below = data.get('reported_weight_below')
-        if reported_weight_below:
-            disposal_query = disposal_query.filter(reported_weight__lte=reported_weight_below)
-            reuse_query = reuse_query.filter(reported_weight__lte=reported_weight_below)
-            
-        reported_weight_above = data.get('reported_weight_above')
-        if reported_weight_above:
-            disposal_query = disposal_query.filter(reported_weight__gte=reported_weight_above)
-            reuse_query = reuse_query.filter(reported_weight__gte=reported_weight_above)
-            
-        # 確認狀態篩選 - 新增
-        confirmation_status = data.get('confirmation_status')
-        if confirmation_status == 'confirmed':
-            disposal_query = disposal_query.filter(manifest_confirmation=True)
-            reuse_query = reuse_query.filter(manifest_confirmation=True)
-        elif confirmation_status == 'unconfirmed':
-            disposal_query = disposal_query.filter(manifest_confirmation=False)
-            reuse_query = reuse_query.filter(manifest_confirmation=False)
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
     
-    # 合併查詢結果並轉換為列表
-    disposal_results = list(disposal_query.order_by('-report_date'))
-    reuse_results = list(reuse_query.order_by('-report_date'))
+    # 篩選條件簽章：清單結果與統計資料的快取鍵
+    signature = manifest_query.signature
     
-    # 將兩種類型的聯單合併，並添加類型標記
-    combined_results = []
-    for manifest in disposal_results:
-        combined_results.append({
-            'type': 'disposal',
-            'manifest': manifest,
-            'type_display': '清除單',
-            'manifest_id': manifest.manifest_id,
-            'waste_id': manifest.waste_id,
-            'company_name': manifest.company_name,
-            'report_date': manifest.report_date,
-            'waste_code': manifest.waste_code,
-            'waste_name': manifest.waste_name,
-            'reported_weight': manifest.reported_weight,
-            'manifest_confirmation': manifest.manifest_confirmation
+    # 游標分頁模式（AJAX）：以 (申報日期, 聯單類型, ID) 游標定位下一頁，不需要 COUNT 與 OFFSET
+    if is_ajax and 'cursor' in request.GET:
+        cursor = request.GET.get('cursor')
+        try:
+            cards, next_cursor = cached_listing(
+                signature, f'cursor:{cursor}',
+                lambda: keyset_page(disposal_query, reuse_query, cursor, 20)
+            )
+        except InvalidCursor:
+            return JsonResponse({'success': False, 'error': '無效的分頁游標'}, status=400)
+        
+        manifests_html = render_to_string('waste_transport/partials/manifest_cards.html', {'manifests': cards})
+        return JsonResponse({
+            'html': manifests_html,
+            'manifests': [card.as_dict() for card in cards],
+            'next_cursor': next_cursor,
+            'has_next': next_cursor is not None,
         })
     
-    for manifest in reuse_results:
-        combined_results.append({
-            'type': 'reuse',
-            'manifest': manifest,
-            'type_display': '再利用單',
-            'manifest_id': manifest.manifest_id,
-            'waste_id': manifest.waste_id,
-            'company_name': manifest.company_name,
-            'report_date': manifest.report_date,
-            'waste_code': manifest.substance_code,
-            'waste_name': manifest.substance_name,
-            'reported_weight': manifest.reported_weight,
-            'manifest_confirmation': manifest.manifest_confirmation
-        })
+    # 統計資料：一次分組查詢取得各類型、確認狀態與月份筆數，並依篩選條件快取
+    facets = cached_manifest_facets(signature, disposal_query, reuse_query)
     
-    # 根據申報日期排序
-    combined_results.sort(key=lambda x: x['manifest'].report_date, reverse=True)
+    # 於資料庫端合併兩種聯單並排序，只有目前頁面的資料列會被取出
+    merged_query = merge_manifest_queries(disposal_query, reuse_query)
     
     # 分頁處理
-    paginator = Paginator(combined_results, 20)  # 每頁20筆
+    paginator = MergedManifestPaginator(merged_query, 20, count=facets['total'], signature=signature)  # 每頁20筆
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
+    # 目前頁面最後一筆的游標，供前端「載入更多」接續
+    next_cursor = encode_cursor(page_obj.object_list[-1]) if page_obj.has_next() else None
+    
     # 取得最近的匯入歷史
     recent_imports = ImportHistory.objects.all().order_by('-import_date')[:5]
     
     context = {
         'page_obj': page_obj,
         'form': form,
-        'disposal_count': len(disposal_results),
-        'reuse_count': len(reuse_results),
-        'total_count': len(combined_results),
+        'disposal_count': facets['by_type']['disposal'],
+        'reuse_count': facets['by_type']['reuse'],
+        'total_count': facets['total'],
+        'facets': facets,
         'manifests': page_obj,  # 為了卡片式顯示添加
+        'next_cursor': next_cursor,
         'recent_imports': recent_imports,
         'import_form': CSVImportForm(),
     }
     
     # 如果是AJAX請求，只返回聯單部分的HTML
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+    if is_ajax:
         manifests_html = render_to_string('waste_transport/partials/manifest_cards.html', {'manifests': page_obj})
-        return JsonResponse({'html': manifests_html})
+        return JsonResponse({
+            'html': manifests_html,
+            'manifests': [card.as_dict() for card in page_obj],
+            'next_cursor': next_cursor,
+            'has_next': next_cursor is not None,
+        })
     
     return render(request, 'waste_transport/manifest_list.html', context)
 
 # 清除單詳細資訊 - AJAX
+# 以聯單更新時間產生 ETag/Last-Modified，未變更時回傳 304
 @permission_required('importer')
+@vary_on_headers('X-Requested-With')
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=manifest_detail_etag(DisposalManifest), last_modified_func=manifest_detail_last_modified(DisposalManifest))
 def disposal_manifest_detail(request, manifest_id, waste_id):
-    manifest = get_object_or_404(DisposalManifest, manifest_id=manifest_id, waste_id=waste_id)
+    # 先只取主鍵與更新時間，片段快取命中時不需載入整筆聯單
+    version = manifest_version(request, DisposalManifest, manifest_id, waste_id)
+    if version is None:
+        raise Http404('找不到聯單')
+    pk, updated_at = version
     
     # 如果是AJAX請求，返回HTML片段
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        html = render_to_string('waste_transport/partials/disposal_detail.html', {'manifest': manifest})
+        html = render_detail_fragment(DisposalManifest, 'ajax', pk, updated_at, lambda: DisposalManifest.objects.get(pk=pk))
         return JsonResponse({'html': html})
     
-    # 否則返回完整頁面
-    return render(request, 'waste_transport/disposal_manifest_detail.html', {'manifest': manifest})
+    # 否則返回完整頁面，內容區塊同樣使用片段快取
+    manifest = get_object_or_404(DisposalManifest, pk=pk)
+    detail_html = render_detail_fragment(DisposalManifest, 'page', pk, updated_at, lambda: manifest)
+    return render(request, 'waste_transport/disposal_manifest_detail.html', {'manifest': manifest, 'detail_html': detail_html})
 
 # 再利用單詳細資訊 - AJAX
+# 以聯單更新時間產生 ETag/Last-Modified，未變更時回傳 304
 @permission_required('importer')
+@vary_on_headers('X-Requested-With')
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=manifest_detail_etag(ReuseManifest), last_modified_func=manifest_detail_last_modified(ReuseManifest))
 def reuse_manifest_detail(request, manifest_id, waste_id):
-    manifest = get_object_or_404(ReuseManifest, manifest_id=manifest_id, waste_id=waste_id)
+    # 先只取主鍵與更新時間，片段快取命中時不需載入整筆聯單
+    version = manifest_version(request, ReuseManifest, manifest_id, waste_id)
+    if version is None:
+        raise Http404('找不到聯單')
+    pk, updated_at = version
     
     # 如果是AJAX請求，返回HTML片段
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        html = render_to_string('waste_transport/partials/reuse_detail.html', {'manifest': manifest})
+        html = render_detail_fragment(ReuseManifest, 'ajax', pk, updated_at, lambda: ReuseManifest.objects.get(pk=pk))
         return JsonResponse({'html': html})
     
-    # 否則返回完整頁面
-    return render(request, 'waste_transport/reuse_manifest_detail.html', {'manifest': manifest})
+    # 否則返回完整頁面，內容區塊同樣使用片段快取
+    manifest = get_object_or_404(ReuseManifest, pk=pk)
+    detail_html = render_detail_fragment(ReuseManifest, 'page', pk, updated_at, lambda: manifest)
+    return render(request, 'waste_transport/reuse_manifest_detail.html', {'manifest': manifest, 'detail_html': detail_html})
 
 # CSV匯入處理 - AJAX
 @csrf_exempt
@@ -203,87 +180,172 @@ def import_csv(request):
         csv_file = request.FILES['csv_file']
         import_type = form.cleaned_data['import_type']
         conflict_resolution = form.cleaned_data['conflict_resolution']
+        duplicate_policy = form.cleaned_data['duplicate_policy']
         
-        # 處理CSV檔案
-        csv_file_data = csv_file.read().decode('utf-8-sig')
-        csv_io = io.StringIO(csv_file_data)
-        reader = csv.DictReader(csv_io)
-        rows = list(reader)  # 將所有行先讀入記憶體
+        # 只檢查不匯入：逐列檢查資料格式，回傳各欄位的錯誤統計，不存取資料庫
+        if form.cleaned_data['dry_run']:
+            report = validate_rows(iter_import_rows(csv_file, csv_file.name), import_type)
+            return JsonResponse({
+                'success': True,
+                'dry_run': True,
+                'message': f"檢查 {report['total']} 筆資料，{report['invalid']} 筆有錯誤",
+                **report,
+            })
         
-        # 檢查是否有衝突
-        conflict_exists = False
-        conflicting_records = []
+        digest = file_digest(csv_file)
         
-        for row in rows:
-            manifest_id = row.get('聯單編號')
-            waste_id = row.get('廢棄物ID')
-            if not manifest_id or not waste_id:
-                continue
-                
-            # 檢查是否已存在
-            if import_type == 'disposal':
-                existing = DisposalManifest.objects.filter(manifest_id=manifest_id, waste_id=waste_id).first()
-            else:
-                existing = ReuseManifest.objects.filter(manifest_id=manifest_id, waste_id=waste_id).first()
-                
-            if existing:
-                conflict_exists = True
-                conflict_data = {
-                    'manifest_id': manifest_id,
-                    'waste_id': waste_id,
-                    'company_name': row.get('事業機構名稱', ''),
-                    'report_date': row.get('申報日期', ''),
-                    'new_data': {k: v for k, v in row.items() if v},
-                    'existing_data': {}
-                }
-                
-                # 添加現有資料以顯示差異
-                if import_type == 'disposal':
-                    conflict_data['existing_data'] = {
-                        '聯單編號': existing.manifest_id,
-                        '事業機構代碼': existing.company_id,
-                        '事業機構名稱': existing.company_name,
-                        '申報日期': existing.report_date.strftime('%Y/%m/%d') if existing.report_date else '',
-                        '廢棄物代碼': existing.waste_code,
-                        '廢棄物名稱': existing.waste_name,
-                        '申報重量': str(existing.reported_weight),
-                        '廢棄物ID': existing.waste_id
-                    }
-                else:
-                    conflict_data['existing_data'] = {
-                        '聯單編號': existing.manifest_id,
-                        '事業機構代碼': existing.company_id,
-                        '事業機構名稱': existing.company_name,
-                        '申報日期': existing.report_date.strftime('%Y/%m/%d') if existing.report_date else '',
-                        '物質代碼': existing.substance_code,
-                        '物質名稱': existing.substance_name,
-                        '申報重量': str(existing.reported_weight),
-                        '廢棄物ID': existing.waste_id
-                    }
-                
-                conflicting_records.append(conflict_data)
+        # 相同檔案已匯入過（或正在背景匯入）時直接回傳先前的結果，除非勾選重新匯入
+        if not form.cleaned_data['force']:
+            previous = previous_import_response(digest, import_type, conflict_resolution)
+            if previous is not None:
+                return previous
         
-        if conflict_exists and conflict_resolution == 'ask':
-            # 返回衝突資訊，由前端顯示衝突解決對話框
-            return JsonResponse({
-                'success': False,
-                'conflict': True,
-                'conflicting_records': conflicting_records,
-                'import_data': {
-                    'csv_data': csv_file_data,
-                    'import_type': import_type,
-                    'filename': csv_file.name,
-                }
-            })
-        else:
-            # 直接處理匯入
-            result = process_csv_import(rows, import_type, conflict_resolution, csv_file.name)
-            return JsonResponse(result)
+        # 詢問模式：逐區塊檢查是否與現有聯單衝突，不需將整個檔案載入記憶體；
+        # 同一次讀取一併找出檔案中重複的鍵，沒有衝突時匯入只需再讀取一次檔案
+        duplicate_positions = None
+        if conflict_resolution == 'ask':
+            rows = DuplicateCollapser(lambda: iter_import_rows(csv_file, csv_file.name), duplicate_policy)
+            conflicting_records = scan_conflicts(import_type, rows.track(), combine=rows.combine)
+            duplicate_positions = rows.positions
+            if conflicting_records:
+                # 檔案暫存在伺服器，返回衝突資訊與暫存代碼，由前端顯示衝突解決對話框
+                staged = stage_import(csv_file, import_type, csv_file.name, digest, duplicate_policy)
+                return import_conflict_response(conflicting_records, staged.token)
+        
+        # 大型檔案交由背景工作匯入，立即回傳工作編號
+        if runs_in_background(csv_file.size):
+            job = enqueue_import(csv_file, import_type, conflict_resolution, csv_file.name, digest, duplicate_policy)
+            return import_job_queued(job)
+        
+        # 直接處理匯入，資料列逐區塊讀取、轉換與寫入
+        result = process_csv_import(
+            csv_file, import_type, conflict_resolution, csv_file.name,
+            content_digest=digest, duplicate_policy=duplicate_policy, duplicate_positions=duplicate_positions,
+        )
+        return JsonResponse(result)
             
     except Exception as e:
         logger.error(f"匯入過程中發生錯誤：{str(e)}", exc_info=True)
         return JsonResponse({'success': False, 'error': f"匯入過程中發生錯誤：{str(e)}"})
 
+def previous_import_response(digest, import_type, conflict_resolution):
+    """相同檔案已匯入過或正在背景匯入時回傳先前結果的回應，否則回傳 None"""
+    previous = find_previous_import(digest, import_type, conflict_resolution)
+    if previous is not None:
+        return JsonResponse(previous_import_result(previous))
+    active_job = find_active_job(digest, import_type, conflict_resolution)
+    if active_job is not None:
+        return import_job_queued(active_job)
+    return None
+
+def import_conflict_response(conflicting_records, token):
+    """返回衝突資訊與暫存代碼，由前端顯示衝突解決對話框"""
+    return JsonResponse({
+        'success': False,
+        'conflict': True,
+        'conflicting_records': conflicting_records,
+        'import_data': {
+            'token': token,
+        }
+    })
+
+# 分段上傳 - 建立上傳
+@csrf_exempt
+@permission_required('importer')
+def start_chunked_upload(request):
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': '僅支援POST請求'})
+    
+    form = ChunkedUploadForm(request.POST)
+    if not form.is_valid():
+        errors = {}
+        for field, error_list in form.errors.items():
+            errors[field] = [str(error) for error in error_list]
+        return JsonResponse({'success': False, 'errors': errors})
+    
+    try:
+        job = start_upload(
+            form.cleaned_data['filename'], form.cleaned_data['import_type'],
+            form.cleaned_data['conflict_resolution'], form.cleaned_data['duplicate_policy'],
+        )
+        return JsonResponse({'success': True, 'upload': upload_state(job)})
+    except Exception as e:
+        logger.error(f"建立分段上傳時發生錯誤：{str(e)}", exc_info=True)
+        return JsonResponse({'success': False, 'error': f"建立分段上傳時發生錯誤：{str(e)}"})
+
+# 分段上傳 - 查詢上傳進度（續傳時由 next_chunk 繼續上傳）
+@permission_required('importer')
+def chunked_upload_status(request, token):
+    job = find_upload(token)
+    if job is None:
+        return JsonResponse({'success': False, 'error': '上傳不存在或已逾期，請重新上傳'}, status=404)
+    return JsonResponse({'success': True, 'upload': upload_state(job)})
+
+# 分段上傳 - 上傳區塊，請求內容為區塊的原始位元組，X-Chunk-Checksum 標頭為區塊的 SHA-256
+@csrf_exempt
+@permission_required('importer')
+def upload_chunk(request, token, index):
+    if request.method != 'PUT':
+        return JsonResponse({'success': False, 'error': '僅支援PUT請求'})
+    
+    job = find_upload(token)
+    if job is None:
+        return JsonResponse({'success': False, 'error': '上傳不存在或已逾期，請重新上傳'}, status=404)
+    
+    try:
+        next_chunk = append_chunk(job, index, request, request.headers.get('X-Chunk-Checksum'))
+        return JsonResponse({'success': True, 'upload': upload_state(job), 'next_chunk': next_chunk})
+    except ChunkRejected as e:
+        return JsonResponse({'success': False, 'error': str(e), 'next_chunk': e.next_chunk}, status=409)
+    except Exception as e:
+        logger.error(f"上傳區塊時發生錯誤：{str(e)}", exc_info=True)
+        return JsonResponse({'success': False, 'error': f"上傳區塊時發生錯誤：{str(e)}"})
+
+# 分段上傳 - 完成上傳並匯入，流程與 import_csv 相同
+@csrf_exempt
+@permission_required('importer')
+def finish_chunked_upload(request, token):
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': '僅支援POST請求'})
+    
+    job = find_upload(token)
+    if job is None:
+        return JsonResponse({'success': False, 'error': '上傳不存在或已逾期，請重新上傳'}, status=404)
+    
+    try:
+        # 解析JSON資料：checksum 為整個檔案的 SHA-256（選填），force 為重新匯入相同檔案
+        data = json.loads(request.body or '{}')
+        with job.file.open('rb'):
+            digest = file_digest(job.file)
+            if data.get('checksum') and data['checksum'].lower() != digest:
+                return JsonResponse({'success': False, 'error': '檔案檢查碼不符，請重新上傳'})
+            
+            if not data.get('force'):
+                previous = previous_import_response(digest, job.import_type, job.conflict_resolution)
+                if previous is not None:
+                    discard_upload(job)
+                    return previous
+            
+            conflicting_records = duplicate_positions = None
+            if job.conflict_resolution == 'ask':
+                rows = DuplicateCollapser(lambda: iter_import_rows(job.file, job.filename), job.duplicate_policy)
+                conflicting_records = scan_conflicts(job.import_type, rows.track(), combine=rows.combine)
+                duplicate_positions = rows.positions
+        
+        job = finish_upload(job, digest, bool(conflicting_records))
+        if job is None:
+            return JsonResponse({'success': False, 'error': '上傳已完成，請勿重複送出'})
+        
+        if job.status == ImportJob.STATUS_STAGED:
+            return import_conflict_response(conflicting_records, job.token)
+        if job.status == ImportJob.STATUS_QUEUED:
+            return import_job_queued(job)
+        return JsonResponse(run_import_job(job, background=False, duplicate_positions=duplicate_positions))
+        
+    except Exception as e:
+        logger.error(f"完成分段上傳時發生錯誤：{str(e)}", exc_info=True)
+        return JsonResponse({'success': False, 'error': f"完成分段上傳時發生錯誤：{str(e)}"})
+
 # 處理衝突解決 - AJAX
 @csrf_exempt
 @permission_required('importer')
@@ -294,312 +356,57 @@ def handle_conflict_resolution(request):
     try:
         # 解析JSON資料
         data = json.loads(request.body)
-        csv_data = data.get('csv_data')
-        import_type = data.get('import_type')
-        filename = data.get('filename')
+        token = data.get('token')
         conflict_resolution = data.get('conflict_resolution')
         
-        if not all([csv_data, import_type, filename, conflict_resolution]):
+        if not all([token, conflict_resolution]):
             return JsonResponse({'success': False, 'error': '缺少必要參數'})
         
-        # 處理CSV資料
-        csv_io = io.StringIO(csv_data)
-        reader = csv.DictReader(csv_io)
-        rows = list(reader)
+        # 取得暫存的上傳檔案，同一份暫存只會匯入一次；
+        # 重複鍵的位置不隨暫存保存，匯入時讀取暫存檔兩次（找出重複的鍵、匯入）
+        job = claim_staged_import(token, conflict_resolution)
+        if job is None:
+            return JsonResponse({'success': False, 'error': '暫存的匯入檔案不存在或已逾期，請重新上傳'})
+        
+        # 大型檔案交由背景工作匯入
+        if job.status == ImportJob.STATUS_QUEUED:
+            return import_job_queued(job)
         
         # 處理匯入
-        result = process_csv_import(rows, import_type, conflict_resolution, filename)
+        result = run_import_job(job, background=False)
         return JsonResponse(result)
         
     except Exception as e:
         logger.error(f"處理衝突解決時發生錯誤：{str(e)}", exc_info=True)
         return JsonResponse({'success': False, 'error': f"處理衝突解決時發生錯誤：{str(e)}"})
 
-# 處理CSV匯入
-def process_csv_import(rows, import_type, conflict_resolution, filename):
-    try:
-        # 統計資料
-        total_records = len(rows)
-        imported_records = 0
-        skipped_records = 0
-        
-        # 批次處理，每100筆一個事務
-        batch_size = 100
-        
-        with transaction.atomic():
-            for i in range(0, total_records, batch_size):
-                batch = rows[i:i+batch_size]
-                
-                try:
-                    with transaction.atomic():
-                        for row in batch:
-                            row = transform_waste_record(row)
-                            # 根據聯單類型處理資料
-                            if import_type == 'disposal':
-                                result = handle_disposal_import(row, conflict_resolution)
-                            else:  # 再利用單
-                                result = handle_reuse_import(row, conflict_resolution)
-                            
-                            if result:
-                                imported_records += 1
-                            else:
-                                skipped_records += 1
-                except Exception as e:
-                    logger.error(f"批次處理時發生錯誤：{str(e)}", exc_info=True)
-                    skipped_records += len(batch)
-            
-            # 儲存匯入歷史記錄
-            ImportHistory.objects.create(
-                filename=filename,
-                import_type=import_type,
-                total_records=total_records,
-                imported_records=imported_records,
-                skipped_records=skipped_records
-            )
-            
-            return {
-                'success': True, 
-                'message': f'成功匯入 {imported_records} 筆資料，跳過 {skipped_records} 筆資料',
-                'imported': imported_records,
-                'skipped': skipped_records,
-                'total': total_records
-            }
-            
-    except Exception as e:
-        logger.error(f"匯入過程中發生錯誤：{str(e)}", exc_info=True)
-        return {'success': False, 'error': f"匯入過程中發生錯誤：{str(e)}"}
-
-# 處理清除單匯入
-def handle_disposal_import(row, conflict_resolution):
-    try:
-        # 轉換布林值欄位
-        bool_fields = ['是否由貯存地起運', '聯單確認', '清除者確認', '處理者確認', '最終處置者確認']
-        for field in bool_fields:
-            if field in row:
-                value = row[field]
-                row[field] = value.upper() == 'Y' or value.upper() == 'TRUE' or value == '1'
-        
-        # 檢查聯單是否已存在
-        manifest_id = row.get('聯單編號')
-        waste_id = row.get('廢棄物ID')
-        if not manifest_id or not waste_id:
-            return False
-            
-        existing_manifest = None
-        try:
-            existing_manifest = DisposalManifest.objects.get(manifest_id=manifest_id, waste_id=waste_id)
-        except DisposalManifest.DoesNotExist:
-            existing_manifest = None
-        
-        # 根據衝突處理方式決定如何處理
-        if existing_manifest:
-            if conflict_resolution == 'skip':
-                return False
-            elif conflict_resolution == 'replace':
-                existing_manifest.delete()
-            elif conflict_resolution == 'keep_both':
-                # 修改聯單編號，保留兩者
-                new_manifest_id = f"{manifest_id}_copy_{int(time.time())}"
-                row['聯單編號'] = new_manifest_id
-            elif conflict_resolution == 'smart_merge':
-                # 將新資料合併到舊資料中
-                for key, value in row.items():
-                    if value and hasattr(existing_manifest, get_model_field_name(key)):
-                        setattr(existing_manifest, get_model_field_name(key), value)
-                existing_manifest.save()
-                return True
-        
-        # 建立新的清除單記錄
-        manifest = DisposalManifest(
-            manifest_id=row.get('聯單編號', ''),
-            company_id=row.get('事業機構代碼', ''),
-            company_name=row.get('事業機構名稱', ''),
-            report_date=parse_date(row.get('申報日期', None)),
-            report_time=parse_time(row.get('申報時間', None)),
-            transport_date=parse_date(row.get('清運日期', None)),
-            transport_time=parse_time(row.get('清運時間', None)),
-            waste_code=row.get('廢棄物代碼', ''),
-            waste_name=row.get('廢棄物名稱', ''),
-            waste_id=row.get('廢棄物ID', ''),
-            reported_weight=parse_float(row.get('申報重量', 0)),
-            process_code=row.get('製程代碼', ''),
-            process_name=row.get('製程名稱', ''),
-            from_storage=row.get('是否由貯存地起運', False),
-            origin_location=row.get('起運地', ''),
-            manifest_confirmation=row.get('聯單確認', False),
-            carrier_vehicle=row.get('運載車號', ''),
-            carrier_confirmation=row.get('清除者確認', False),
-            # 清除單特有欄位
-            carrier_id=row.get('清除者代碼', ''),
-            carrier_name=row.get('清除者名稱', ''),
-            delivery_date=parse_date(row.get('運送日期', None)),
-            delivery_time=parse_time(row.get('運送時間', None)),
-            carrier_vehicle_number=row.get('清除者運載車號', ''),
-            processor_id=row.get('處理者代碼', ''),
-            processor_name=row.get('處理者名稱', ''),
-            receive_date=parse_date(row.get('收受日期', None)),
-            receive_time=parse_time(row.get('收受時間', None)),
-            intermediate_treatment=row.get('中間處理方式', ''),
-            processing_completion_date=parse_date(row.get('處理完成日期', None)),
-            processing_completion_time=parse_time(row.get('處理完成時間', None)),
-            final_disposal_method=row.get('最終處置方式', ''),
-            processor_confirmation=row.get('處理者確認', False),
-            processor_vehicle=row.get('處理者運載車號', ''),
-            final_processor_id=row.get('最終處置者代碼', ''),
-            final_processor_name=row.get('最終處置者名稱', ''),
-            entry_date=parse_date(row.get('進場日期', None)),
-            entry_time=parse_time(row.get('進場時間', None)),
-            entry_number=row.get('進場編號', ''),
-            final_processor_confirmation=row.get('最終處置者確認', False),
-            final_destination=row.get('最終流向', '')
-        )
-        manifest.save()
-        return True
-    except Exception as e:
-        logger.error(f"處理清除單匯入時發生錯誤: {e}", exc_info=True)
-        return False
+def import_job_queued(job):
+    """背景匯入工作建立後的回應，前端以 status_url 輪詢進度"""
+    return JsonResponse({
+        'success': True,
+        'queued': True,
+        'message': f'檔案已排入背景匯入（工作 #{job.pk}）',
+        'job': job.as_dict(),
+        'status_url': reverse('waste_transport:import_job_status', args=[job.pk]),
+    })
 
-# 處理再利用單匯入
-def handle_reuse_import(row, conflict_resolution):
-    try:
-        # 轉換布林值欄位
-        bool_fields = ['是否由貯存地起運', '聯單確認', '清除者確認', '再利用者是否確認', '產源是否已確認申報聯單內容']
-        for field in bool_fields:
-            if field in row:
-                value = row[field]
-                row[field] = value.upper() == 'Y' or value.upper() == 'TRUE' or value == '1'
-        
-        # 檢查聯單是否已存在
-        manifest_id = row.get('聯單編號')
-        waste_id = row.get('廢棄物ID')
-        if not manifest_id or not waste_id:
-            return False
-            
-        existing_manifest = None
-        try:
-            existing_manifest = ReuseManifest.objects.get(manifest_id=manifest_id, waste_id=waste_id)
-        except ReuseManifest.DoesNotExist:
-            existing_manifest = None
-        
-        # 根據衝突處理方式決定如何處理
-        if existing_manifest:
-            if conflict_resolution == 'skip':
-                return False
-            elif conflict_resolution == 'replace':
-                existing_manifest.delete()
-            elif conflict_resolution == 'keep_both':
-                # 修改聯單編號，保留兩者
-                new_manifest_id = f"{manifest_id}_copy_{int(time.time())}"
-                row['聯單編號'] = new_manifest_id
-            elif conflict_resolution == 'smart_merge':
-                # 將新資料合併到舊資料中
-                for key, value in row.items():
-                    field_name = get_model_field_name(key)
-                    if value and field_name and hasattr(existing_manifest, field_name):
-                        setattr(existing_manifest, field_name, value)
-                existing_manifest.save()
-                return True
-        
-        # 建立新的再利用單記錄
-        manifest = ReuseManifest(
-            manifest_id=row.get('聯單編號', ''),
-            company_id=row.get('事業機構代碼', ''),
-            company_name=row.get('事業機構名稱', ''),
-            report_date=parse_date(row.get('申報日期', None)),
-            report_time=parse_time(row.get('申報時間', None)),
-            transport_date=parse_date(row.get('清運日期', None)),
-            transport_time=parse_time(row.get('清運時間', None)),
-            reported_weight=parse_float(row.get('申報重量', 0)),
-            process_code=row.get('製程代碼', ''),
-            process_name=row.get('製程名稱', ''),
-            from_storage=row.get('是否由貯存地起運', False),
-            origin_location=row.get('起運地', ''),
-            manifest_confirmation=row.get('聯單確認', False),
-            carrier_vehicle=row.get('運載車號', ''),
-            carrier_confirmation=row.get('清除者確認', False),
-            # 再利用單特有欄位
-            waste_code=row.get('物質代碼', ''),  # 使用基本欄位存物質代碼
-            waste_name=row.get('物質名稱', ''),  # 使用基本欄位存物質名稱
-            waste_id=row.get('廢棄物ID', ''),
-            substance_code=row.get('物質代碼', ''),
-            substance_name=row.get('物質名稱', ''),
-            reuse_purpose=row.get('再利用用途', ''),
-            reuse_purpose_description=row.get('再利用用途說明', ''),
-            reuse_method=row.get('再利用方式', ''),
-            carrier_id=row.get('清除者代碼', ''),
-            carrier_name=row.get('清除者名稱', ''),
-            other_carrier=row.get('其它清除者', ''),
-            delivery_date=parse_date(row.get('運送日期', None)),
-            delivery_time=parse_time(row.get('運送時間', None)),
-            carrier_vehicle_number=row.get('清除者實際運載車號', ''),
-            carrier_rejection_reason=row.get('清除者不接受原因', ''),
-            reuser_id=row.get('再利用者代碼', ''),
-            reuser_name=row.get('再利用者名稱', ''),
-            other_reuser=row.get('其它再利用者', ''),
-            reuser_nature=row.get('再利用者性質', ''),
-            recovery_date=parse_date(row.get('回收日期', None)),
-            recovery_time=parse_time(row.get('回收時間', None)),
-            reuse_completion_time=parse_datetime(row.get('再利用完成時間', None)),
-            reuser_confirmation=row.get('再利用者是否確認', False),
-            reuser_vehicle=row.get('再利用者實際運載車號', ''),
-            reuser_rejection_reason=row.get('再利用者不接受原因', ''),
-            source_confirmed=row.get('產源是否已確認申報聯單內容', False)
-        )
-        manifest.save()
-        return True
-    except Exception as e:
-        logger.error(f"處理再利用單匯入時發生錯誤: {e}", exc_info=True)
-        return False
+# 背景匯入工作進度 - AJAX
+@permission_required('importer')
+def import_job_status(request, job_id):
+    job = ImportJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({'success': False, 'error': '找不到匯入工作'}, status=404)
+    return JsonResponse({'success': True, 'job': job.as_dict()})
 
 # 匯出CSV - 新增功能
 @permission_required('importer')
 def export_manifests_csv(request):
     form = ManifestFilterForm(request.GET)
     
-    # 初始化查詢集
-    disposal_query = DisposalManifest.objects.all()
-    reuse_query = ReuseManifest.objects.all()
-    
-    # 套用篩選條件
-    if form.is_valid():
-        data = form.cleaned_data
-        
-        # 根據聯單類型篩選
-        manifest_type = data.get('manifest_type')
-        if manifest_type == 'disposal':
-            reuse_query = ReuseManifest.objects.none()
-        elif manifest_type == 'reuse':
-            disposal_query = DisposalManifest.objects.none()
-            
-        # 套用其他篩選條件 (與manifest_list相同)
-        # 聯單編號篩選
-        manifest_id = data.get('manifest_id')
-        if manifest_id:
-            disposal_query = disposal_query.filter(manifest_id__icontains=manifest_id)
-            reuse_query = reuse_query.filter(manifest_id__icontains=manifest_id)
-            
-        # 事業機構名稱篩選
-        company_name = data.get('company_name')
-        if company_name:
-            disposal_query = disposal_query.filter(company_name__icontains=company_name)
-            reuse_query = reuse_query.filter(company_name__icontains=company_name)
-            
-        # 廢棄物代碼篩選
-        waste_code = data.get('waste_code')
-        if waste_code:
-            disposal_query = disposal_query.filter(waste_code__icontains=waste_code)
-            reuse_query = reuse_query.filter(substance_code__icontains=waste_code)
-            
-        # 申報日期篩選
-        report_date_from = data.get('report_date_from')
-        if report_date_from:
-            disposal_query = disposal_query.filter(report_date__gte=report_date_from)
-            reuse_query = reuse_query.filter(report_date__gte=report_date_from)
-            
-        report_date_to = data.get('report_date_to')
-        if report_date_to:
-            disposal_query = disposal_query.filter(report_date__lte=report_date_to)
-            reuse_query = reuse_query.filter(report_date__lte=report_date_to)
+    # 與清單頁面使用相同的篩選條件與查詢
+    manifest_query = ManifestQuery.from_form(form)
+    disposal_query, reuse_query = manifest_query.disposal, manifest_query.reuse
+    manifest_type = manifest_query.manifest_type
     
     # 創建響應
     response = HttpResponse(content_type='text/csv')
@@ -702,197 +509,3 @@ def export_manifests_csv(request):
             ])
     
     return response
-
-# 輔助函數：解析日期
-def parse_date(date_str):
-    if not date_str or date_str.strip() == '':
-        return None
-        
-    formats = ['%Y/%m/%d', '%Y-%m-%d', '%Y/%m/%d %H:%M:%S', '%Y-%m-%d %H:%M:%S']
-    for fmt in formats:
-        try:
-            return datetime.strptime(date_str, fmt).date()
-        except (ValueError, TypeError):
-            continue
-    
-    return None
-
-# 輔助函數：解析時間
-def parse_time(time_str):
-    if not time_str or time_str.strip() == '':
-        return None
-        
-    formats = ['%H:%M:%S', '%H:%M']
-    for fmt in formats:
-        try:
-            return datetime.strptime(time_str, fmt).time()
-        except (ValueError, TypeError):
-            continue
-    
-    return None
-
-# 輔助函數：解析日期時間
-def parse_datetime(datetime_str):
-    if not datetime_str or datetime_str.strip() == '':
-        return None
-        
-    formats = ['%Y/%m/%d %H:%M:%S', '%Y-%m-%d %H:%M:%S', '%Y/%m/%d %H:%M', '%Y-%m-%d %H:%M']
-    for fmt in formats:
-        try:
-            return datetime.strptime(datetime_str, fmt)
-        except (ValueError, TypeError):
-            continue
-    
-    return None
-
-# 輔助函數：解析浮點數
-def parse_float(value):
-    if not value:
-        return 0.0
-        
-    try:
-        return float(value)
-    except (ValueError, TypeError):
-        return 0.0
-
-# 根據CSV欄位名稱取得對應的模型欄位名稱
-def get_model_field_name(csv_field_name):
-    # 自訂映射表
-    field_map = {
-        '聯單編號': 'manifest_id',
-        '事業機構代碼': 'company_id',
-        '事業機構名稱': 'company_name',
-        '申報日期': 'report_date',
-        '申報時間': 'report_time',
-        '清運日期': 'transport_date',
-        '清運時間': 'transport_time',
-        '廢棄物代碼': 'waste_code',
-        '廢棄物名稱': 'waste_name',
-        '廢棄物ID': 'waste_id',
-        '申報重量': 'reported_weight',
-        '製程代碼': 'process_code',
-        '製程名稱': 'process_name',
-        '是否由貯存地起運': 'from_storage',
-        '起運地': 'origin_location',
-        '聯單確認': 'manifest_confirmation',
-        '運載車號': 'carrier_vehicle',
-        '清除者確認': 'carrier_confirmation',
-        # 清除單特有欄位
-        '清除者代碼': 'carrier_id',
-        '清除者名稱': 'carrier_name',
-        '運送日期': 'delivery_date',
-        '運送時間': 'delivery_time',
-        '清除者運載車號': 'carrier_vehicle_number',
-        '處理者代碼': 'processor_id',
-        '處理者名稱': 'processor_name',
-        '收受日期': 'receive_date',
-        '收受時間': 'receive_time',
-        '中間處理方式': 'intermediate_treatment',
-        '處理完成日期': 'processing_completion_date',
-        '處理完成時間': 'processing_completion_time',
-        '最終處置方式': 'final_disposal_method',
-        '處理者確認': 'processor_confirmation',
-        '處理者運載車號': 'processor_vehicle',
-        '最終處置者代碼': 'final_processor_id',
-        '最終處置者名稱': 'final_processor_name',
-        '進場日期': 'entry_date',
-        '進場時間': 'entry_time',
-        '進場編號': 'entry_number',
-        '最終處置者確認': 'final_processor_confirmation',
-        '最終流向': 'final_destination',
-        # 再利用單特有欄位
-        '物質代碼': 'substance_code',
-        '物質名稱': 'substance_name',
-        '再利用用途': 'reuse_purpose',
-        '再利用用途說明': 'reuse_purpose_description',
-        '再利用方式': 'reuse_method',
-        '其它清除者': 'other_carrier',
-        '清除者實際運載車號': 'carrier_vehicle_number',
-        '清除者不接受原因': 'carrier_rejection_reason',
-        '再利用者代碼': 'reuser_id',
-        '再利用者名稱': 'reuser_name',
-        '其它再利用者': 'other_reuser',
-        '再利用者性質': 'reuser_nature',
-        '回收日期': 'recovery_date',
-        '回收時間': 'recovery_time',
-        '再利用完成時間': 'reuse_completion_time',
-        '再利用者是否確認': 'reuser_confirmation',
-        '再利用者實際運載車號': 'reuser_vehicle',
-        '再利用者不接受原因': 'reuser_rejection_reason',
-        '產源是否已確認申報聯單內容': 'source_confirmed'
-    }
-    
-    return field_map.get(csv_field_name, '')
-
-def format_datetime_entry(entry):
-    """
-    Formats a datetime entry, separating date and time
-    
-    Args:
-        entry (str): Original datetime string
-    
-    Returns:
-        tuple: Formatted date and time (date, time)
-    """
-    if not entry or entry.strip() == '':
-        return '', ''
-    
-    # Remove extra whitespace
-    entry = entry.strip()
-    
-    # Parse the datetime
-    try:
-        # First, handle AM/PM conversion
-        if '上午' in entry:
-            entry = entry.replace('上午', '').strip()
-            dt = datetime.strptime(entry, '%Y/%m/%d %I:%M:%S')
-        elif '下午' in entry:
-            entry = entry.replace('下午', '').strip()
-            dt = datetime.strptime(entry, '%Y/%m/%d %I:%M:%S')
-            # Adjust time for PM
-            if dt.hour != 12:
-                dt = dt.replace(hour=dt.hour + 12)
-        else:
-            # If no AM/PM marker, assume the time is already in 24-hour format
-            dt = datetime.strptime(entry, '%Y/%m/%d %H:%M:%S')
-        
-        # Format date and time separately
-        return dt.strftime('%Y/%m/%d'), dt.strftime('%H:%M:%S')
-    
-    except ValueError:
-        # If parsing fails, return the original entry
-        return entry, ''
-
-def transform_waste_record(record):
-    """
-    Transforms the datetime entries in a waste record dictionary
-    
-    Args:
-        record (dict): Input dictionary with waste record information
-    
-    Returns:
-        dict: Dictionary with formatted datetime entries
-    """
-    # Dictionary of keys to transform
-    datetime_keys = {
-        '申報日期': ('申報日期', '申報時間'),
-        '清運日期': ('清運日期', '清運時間'),
-        '運送日期': ('運送日期', '運送時間'),
-        '收受日期': ('收受日期', '收受時間'),
-        '回收日期': ('回收日期', '回收時間'),
-        '處理完成日期': ('處理完成日期', '處理完成時間')
-    }
-    
-    # Create a copy of the dictionary to avoid modifying the original
-    transformed_record = record.copy()
-    
-    # Transform specified datetime entries
-    for original_key, (date_key, time_key) in datetime_keys.items():
-        try:
-            formatted_date, formatted_time = format_datetime_entry(record[original_key])
-            transformed_record[date_key] = formatted_date
-            transformed_record[time_key] = formatted_time
-        except:
-            continue
-    
-    return transformed_record
\ No newline at end of file
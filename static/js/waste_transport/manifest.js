@@ -7,6 +7,18 @@
 let importSessionData = null;
 let selectedManifests = new Set();
 
+// 已載入的HTML片段快取（URL → {etag, data}），再次請求時以 If-None-Match 驗證
+const fragmentCache = new Map();
+
+// 背景匯入進度的輪詢間隔（毫秒）
+const IMPORT_POLL_INTERVAL = 1000;
+
+// 檔案大小達此值（位元組）時改以分段上傳，連線中斷時可從最後一個完成的區塊續傳
+const CHUNKED_UPLOAD_THRESHOLD = 5 * 1024 * 1024;
+
+// 每個區塊上傳失敗時的重試次數
+const CHUNK_RETRY_LIMIT = 3;
+
 // 頁面載入完成後初始化
 document.addEventListener('DOMContentLoaded', function() {
     // 初始化篩選表單顯示/隱藏
@@ -59,34 +71,110 @@ function initFilterToggle() {
 
 /**
  * 初始化聯單卡片點擊事件，加載詳細內容
+ * 使用事件委派，讓「載入更多」附加的卡片也能點擊
  */
 function initManifestCardEvents() {
-    const manifestCards = document.querySelectorAll('.manifest-card');
+    const cardsContainer = document.getElementById('manifest-cards');
+    if (!cardsContainer) return;
     
-    manifestCards.forEach(card => {
-        card.addEventListener('click', function(event) {
-            // 如果點擊的是複選框，不要載入詳細資料
-            if (event.target.type === 'checkbox' || event.target.tagName === 'LABEL') {
-                return;
+    cardsContainer.addEventListener('click', function(event) {
+        const card = event.target.closest('.manifest-card');
+        if (!card) return;
+        
+        // 如果點擊的是複選框，不要載入詳細資料
+        if (event.target.type === 'checkbox' || event.target.tagName === 'LABEL') {
+            return;
+        }
+        
+        // 移除所有卡片的活動狀態
+        cardsContainer.querySelectorAll('.manifest-card').forEach(c => c.classList.remove('is-active'));
+        
+        // 設置當前卡片為活動狀態
+        card.classList.add('is-active');
+        
+        // 獲取聯單資訊
+        const manifestId = card.dataset.manifestId;
+        const wasteId = card.dataset.wasteId;
+        const type = card.dataset.type;
+        
+        // 根據類型載入對應的詳細內容
+        loadManifestDetail(type, manifestId, wasteId);
+    });
+}
+
+/**
+ * 以AJAX取得HTML片段，已快取的片段帶上 ETag 驗證
+ * 伺服器回傳 304 時沿用快取內容，不需重新下載
+ */
+function fetchFragment(url) {
+    const cached = fragmentCache.get(url);
+    const headers = {
+        'X-Requested-With': 'XMLHttpRequest'
+    };
+    if (cached) {
+        headers['If-None-Match'] = cached.etag;
+    }
+    
+    return fetch(url, { headers: headers })
+    .then(response => {
+        if (response.status === 304 && cached) {
+            return cached.data;
+        }
+        if (!response.ok) {
+            throw new Error('網路錯誤');
+        }
+        
+        const etag = response.headers.get('ETag');
+        return response.json().then(data => {
+            if (etag) {
+                fragmentCache.set(url, { etag: etag, data: data });
             }
-            
-            // 移除所有卡片的活動狀態
-            manifestCards.forEach(c => c.classList.remove('is-active'));
-            
-            // 設置當前卡片為活動狀態
-            this.classList.add('is-active');
-            
-            // 獲取聯單資訊
-            const manifestId = this.dataset.manifestId;
-            const wasteId = this.dataset.wasteId;
-            const type = this.dataset.type;
-            
-            // 根據類型載入對應的詳細內容
-            loadManifestDetail(type, manifestId, wasteId);
+            return data;
         });
     });
 }
 
+/**
+ * 以游標分頁載入下一批聯單並附加到列表末端
+ * 游標由伺服器產生，深頁查詢不需掃描前面的資料
+ */
+function loadMoreManifests() {
+    const loadMoreBtn = document.getElementById('load-more-manifests');
+    const cardsContainer = document.getElementById('manifest-cards');
+    if (!loadMoreBtn || !cardsContainer) return;
+    
+    const cursor = loadMoreBtn.dataset.nextCursor;
+    if (!cursor) return;
+    
+    // 沿用目前的篩選條件，改以游標取代頁碼
+    const searchParams = new URLSearchParams(window.location.search);
+    searchParams.delete('page');
+    searchParams.set('cursor', cursor);
+    
+    // 禁用按鈕，顯示載入中
+    loadMoreBtn.disabled = true;
+    loadMoreBtn.innerHTML = '<div class="ts-loading is-small"></div> 載入中...';
+    
+    fetchFragment(`/waste_transport/?${searchParams.toString()}`)
+    .then(data => {
+        cardsContainer.insertAdjacentHTML('beforeend', data.html);
+        
+        // 更新下一頁游標，沒有下一頁時隱藏按鈕
+        loadMoreBtn.dataset.nextCursor = data.next_cursor || '';
+        if (!data.has_next) {
+            loadMoreBtn.style.display = 'none';
+        }
+    })
+    .catch(error => {
+        console.error('載入更多聯單失敗:', error);
+        showNotification('載入更多聯單失敗，請重試', 'negative');
+    })
+    .finally(() => {
+        loadMoreBtn.disabled = false;
+        loadMoreBtn.innerHTML = '<span class="ts-icon is-angles-down-icon"></span> 載入更多';
+    });
+}
+
 /**
  * 初始化詳細視圖標籤切換
  */
@@ -282,18 +370,8 @@ function loadManifestDetail(type, manifestId, wasteId) {
         ? `/waste_transport/disposal/${manifestId}/${wasteId}`
         : `/waste_transport/reuse/${manifestId}/${wasteId}`;
     
-    // 發送AJAX請求
-    fetch(url, {
-        headers: {
-            'X-Requested-With': 'XMLHttpRequest'
-        }
-    })
-    .then(response => {
-        if (!response.ok) {
-            throw new Error('網路錯誤');
-        }
-        return response.json();
-    })
+    // 發送AJAX請求，已看過的聯單以 ETag 驗證是否變更
+    fetchFragment(url)
     .then(data => {
         // 更新詳細內容容器
         detailContainer.innerHTML = data.html;
@@ -367,6 +445,7 @@ function openImportModal() {
     
     // 重置匯入資料
     importSessionData = null;
+    hideImportValidation();
 }
 
 /**
@@ -494,17 +573,22 @@ function submitImport() {
         submitBtn.innerHTML = '<div class="ts-loading is-small is-white"></div> 匯入中...';
     }
     
-    // 發送AJAX請求
-    fetch('/waste_transport/import/', {
-        method: 'POST',
-        body: formData
-    })
-    .then(response => {
-        if (!response.ok) {
-            throw new Error('網路錯誤');
-        }
-        return response.json();
-    })
+    // 大型檔案分段上傳（需要 crypto.subtle 計算檢查碼），其他檔案一次上傳
+    const file = formData.get('csv_file');
+    const request = file && file.size >= CHUNKED_UPLOAD_THRESHOLD && window.crypto && crypto.subtle
+        ? uploadInChunks(formData, submitBtn)
+        : fetch('/waste_transport/import/', {
+            method: 'POST',
+            body: formData
+        })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('網路錯誤');
+            }
+            return response.json();
+        });
+    
+    request
     .then(data => {
         // 恢復按鈕狀態
         if (submitBtn) {
@@ -512,7 +596,16 @@ function submitImport() {
             submitBtn.innerHTML = '匯入';
         }
         
-        if (data.success) {
+        if (data.queued) {
+            // 大型檔案已排入背景匯入，輪詢進度
+            closeImportModal();
+            showNotification(data.message, 'info');
+            pollImportJob(data.status_url);
+        } else if (data.duplicate) {
+            // 相同檔案已匯入過，資料沒有變更
+            closeImportModal();
+            showNotification(data.message, 'info');
+        } else if (data.success) {
             // 匯入成功
             closeImportModal();
             showNotification(data.message, 'positive');
@@ -544,6 +637,217 @@ function submitImport() {
     });
 }
 
+/**
+ * 分段上傳檔案後匯入，回傳與一次上傳相同格式的匯入結果。
+ * 上傳代碼記在 localStorage，同一個檔案重新送出時從伺服器記錄的下一個區塊續傳
+ * @param {FormData} formData - 匯入表單資料
+ * @param {HTMLElement} submitBtn - 顯示上傳進度的按鈕
+ */
+async function uploadInChunks(formData, submitBtn) {
+    const file = formData.get('csv_file');
+    const storageKey = `manifest-upload:${file.name}:${file.size}:${file.lastModified}`;
+    
+    let upload = await findChunkedUpload(localStorage.getItem(storageKey));
+    if (!upload) {
+        const params = new FormData();
+        ['import_type', 'conflict_resolution', 'duplicate_policy'].forEach(name => {
+            params.append(name, formData.get(name) || '');
+        });
+        params.append('filename', file.name);
+        params.append('file_size', file.size);
+        
+        const response = await fetch('/waste_transport/import/uploads/', {
+            method: 'POST',
+            body: params
+        });
+        const data = await response.json();
+        if (!data.success) {
+            return data;
+        }
+        upload = data.upload;
+        localStorage.setItem(storageKey, upload.token);
+    }
+    
+    const uploadUrl = `/waste_transport/import/uploads/${upload.token}/`;
+    let index = upload.next_chunk;
+    while (index * upload.chunk_size < file.size) {
+        const body = await file.slice(index * upload.chunk_size, (index + 1) * upload.chunk_size).arrayBuffer();
+        const checksum = await sha256Hex(body);
+        
+        let data = null;
+        for (let attempt = 0; attempt < CHUNK_RETRY_LIMIT; attempt++) {
+            try {
+                const response = await fetch(`${uploadUrl}chunks/${index}/`, {
+                    method: 'PUT',
+                    headers: {
+                        'X-Chunk-Checksum': checksum
+                    },
+                    body: body
+                });
+                data = await response.json();
+                // 檢查碼不符時伺服器要求重傳同一個區塊
+                if (data.success || data.next_chunk !== index) break;
+            } catch (error) {
+                console.error(`上傳第 ${index} 個區塊失敗:`, error);
+            }
+        }
+        
+        // 連線中斷時保留上傳代碼，重新送出同一個檔案即可續傳
+        if (!data) {
+            throw new Error('上傳中斷');
+        }
+        if (!data.success && (data.next_chunk === undefined || data.next_chunk === index)) {
+            localStorage.removeItem(storageKey);
+            return data;
+        }
+        
+        index = data.next_chunk;
+        if (submitBtn) {
+            const percent = Math.min(100, Math.floor(index * upload.chunk_size * 100 / file.size));
+            submitBtn.innerHTML = `<div class="ts-loading is-small is-white"></div> 上傳中 ${percent}%`;
+        }
+    }
+    
+    if (submitBtn) {
+        submitBtn.innerHTML = '<div class="ts-loading is-small is-white"></div> 匯入中...';
+    }
+    const response = await fetch(`${uploadUrl}finish/`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': getCookie('csrftoken')
+        },
+        body: JSON.stringify({
+            force: formData.get('force') === 'on'
+        })
+    });
+    localStorage.removeItem(storageKey);
+    return response.json();
+}
+
+/**
+ * 取得仍可續傳的分段上傳，不存在或已逾期時回傳 null
+ * @param {string} token - 上傳代碼
+ */
+async function findChunkedUpload(token) {
+    if (!token) return null;
+    
+    try {
+        const response = await fetch(`/waste_transport/import/uploads/${token}/`);
+        const data = await response.json();
+        return data.success ? data.upload : null;
+    } catch (error) {
+        return null;
+    }
+}
+
+/**
+ * 計算資料的 SHA-256（十六進位字串）
+ * @param {ArrayBuffer} buffer - 資料
+ */
+async function sha256Hex(buffer) {
+    const digest = await crypto.subtle.digest('SHA-256', buffer);
+    return Array.from(new Uint8Array(digest)).map(byte => byte.toString(16).padStart(2, '0')).join('');
+}
+
+/**
+ * 只檢查不匯入：送出檔案檢查資料格式，在匯入對話框中顯示各欄位的錯誤
+ */
+function validateImport() {
+    const form = document.getElementById('csv-import-form');
+    if (!form) return;
+    
+    const formData = new FormData(form);
+    formData.set('dry_run', 'true');
+    const validateBtn = document.getElementById('import-validate-btn');
+    
+    if (validateBtn) {
+        validateBtn.disabled = true;
+        validateBtn.innerHTML = '<div class="ts-loading is-small"></div> 檢查中...';
+    }
+    
+    fetch('/waste_transport/import/', {
+        method: 'POST',
+        body: formData
+    })
+    .then(response => {
+        if (!response.ok) {
+            throw new Error('網路錯誤');
+        }
+        return response.json();
+    })
+    .then(data => {
+        if (validateBtn) {
+            validateBtn.disabled = false;
+            validateBtn.innerHTML = '檢查檔案';
+        }
+        
+        if (data.dry_run) {
+            showImportValidation(data);
+        } else {
+            hideImportValidation();
+            showNotification(data.error || '檢查失敗', 'negative');
+        }
+    })
+    .catch(error => {
+        console.error('檢查失敗:', error);
+        
+        if (validateBtn) {
+            validateBtn.disabled = false;
+            validateBtn.innerHTML = '檢查檔案';
+        }
+        
+        showNotification('檢查失敗，請重試', 'negative');
+    });
+}
+
+/**
+ * 顯示檔案檢查結果
+ * @param {Object} report - 檢查結果，columns 為各欄位的錯誤數與範例
+ */
+function showImportValidation(report) {
+    const panel = document.getElementById('import-validation');
+    const summary = document.getElementById('import-validation-summary');
+    const errors = document.getElementById('import-validation-errors');
+    if (!panel || !summary || !errors) return;
+    
+    summary.textContent = report.invalid
+        ? report.message
+        : `檢查 ${report.total} 筆資料，沒有發現錯誤`;
+    errors.innerHTML = '';
+    
+    for (const [column, detail] of Object.entries(report.columns)) {
+        const item = document.createElement('div');
+        item.className = 'item';
+        
+        const title = document.createElement('div');
+        title.className = 'ts-text is-bold';
+        title.textContent = `${column}：${detail.count} 筆`;
+        item.appendChild(title);
+        
+        detail.samples.forEach(sample => {
+            const line = document.createElement('div');
+            line.className = 'ts-text is-description';
+            line.textContent = `第 ${sample.line} 行：${sample.message}${sample.value ? `（${sample.value}）` : ''}`;
+            item.appendChild(line);
+        });
+        
+        errors.appendChild(item);
+    }
+    
+    panel.style.display = '';
+}
+
+/**
+ * 隱藏檔案檢查結果
+ */
+function hideImportValidation() {
+    const panel = document.getElementById('import-validation');
+    if (panel) {
+        panel.style.display = 'none';
+    }
+}
+
 /**
  * 解決衝突並繼續匯入
  */
@@ -592,7 +896,12 @@ function resolveConflicts() {
             resolveBtn.innerHTML = '確認處理';
         }
         
-        if (data.success) {
+        if (data.queued) {
+            // 大型檔案已排入背景匯入，輪詢進度
+            closeConflictModal();
+            showNotification(data.message, 'info');
+            pollImportJob(data.status_url);
+        } else if (data.success) {
             // 處理成功
             closeConflictModal();
             showNotification(data.message, 'positive');
@@ -619,6 +928,78 @@ function resolveConflicts() {
     });
 }
 
+/**
+ * 輪詢背景匯入工作的進度，完成後重新載入頁面
+ * @param {string} statusUrl - 工作進度網址
+ */
+function pollImportJob(statusUrl) {
+    fetch(statusUrl, {
+        headers: {
+            'X-Requested-With': 'XMLHttpRequest'
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (!data.success) {
+            hideImportProgress();
+            showNotification(data.error || '無法取得匯入進度', 'negative');
+            return;
+        }
+        
+        const job = data.job;
+        showImportProgress(job);
+        
+        if (!job.finished) {
+            setTimeout(() => pollImportJob(statusUrl), IMPORT_POLL_INTERVAL);
+            return;
+        }
+        
+        hideImportProgress();
+        if (job.status === 'done') {
+            showNotification(job.message, 'positive');
+            
+            // 重新載入頁面以顯示新資料
+            setTimeout(() => {
+                window.location.reload();
+            }, 1500);
+        } else {
+            showNotification(job.message || '匯入失敗', 'negative');
+        }
+    })
+    .catch(error => {
+        console.error('取得匯入進度失敗:', error);
+        setTimeout(() => pollImportJob(statusUrl), IMPORT_POLL_INTERVAL);
+    });
+}
+
+/**
+ * 顯示背景匯入進度
+ * @param {Object} job - 匯入工作
+ */
+function showImportProgress(job) {
+    const panel = document.getElementById('import-progress');
+    if (!panel) return;
+    
+    document.getElementById('import-progress-title').textContent = `${job.filename}（${job.status_display}）`;
+    const bar = document.getElementById('import-progress-bar');
+    bar.style.setProperty('--value', job.percent);
+    bar.querySelector('.text').textContent = `${job.percent}%`;
+    document.getElementById('import-progress-detail').textContent =
+        `已處理 ${job.total} 筆，匯入 ${job.imported} 筆，跳過 ${job.skipped} 筆`;
+    
+    panel.classList.add('is-visible');
+}
+
+/**
+ * 隱藏背景匯入進度
+ */
+function hideImportProgress() {
+    const panel = document.getElementById('import-progress');
+    if (panel) {
+        panel.classList.remove('is-visible');
+    }
+}
+
 /**
  * 顯示通知訊息
  * @param {string} message - 訊息內容